@@ -1,7 +1,24 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = FastAPI(title="Mocked Open Banking API")
 
@@ -16,10 +33,256 @@ app.add_middleware(
 
 DATA_DIR = Path(__file__).parent / "data"
 
+MAX_PAGE_SIZE = 10000
+STREAM_CHUNK_SIZE = 1000
+
+# Respuestas ya serializadas (bytes) por endpoint + parámetros, en un LRU acotado
+# por tamaño. La clave incluye mtime y tamaño del CSV: si el archivo cambia el
+# dataset se recarga y sus respuestas anteriores se descartan. Cada respuesta
+# lleva un ETag (hash del cuerpo): un cliente que repite la consulta con
+# If-None-Match recibe un 304 sin cuerpo. La versión gzip se comprime una vez, al
+# guardar la respuesta, así el tamaño de cada entrada queda fijo y el cache lleva
+# el total en bytes sin recorrer las entradas.
+CACHE_MAX_MB = float(os.environ.get("API_CACHE_MB", "256"))
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+DATASET_SPECS = {
+    "demographics": {"file": "demographics.csv", "sort_by": ["user_id"]},
+    "products": {"file": "products.csv", "sort_by": ["user_id", "product_type"], "date_col": "contract_date"},
+    "transactions": {"file": "transactions.csv", "sort_by": ["date", "transaction_id"], "date_col": "date"},
+}
+
+
+def dumps(payload):
+    # orjson si está instalado (varias veces más rápido); si no, json de la stdlib
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class Dataset:
+    # Dataset en memoria ordenado de forma estable, con índice por usuario y
+    # (si corresponde) por fecha, para paginar y filtrar sin recorrer todo el frame
+    def __init__(self, df, sort_by, date_col=None):
+        self.df = df.sort_values(sort_by, kind="stable").reset_index(drop=True)
+        self.user_positions = self.df.groupby("user_id").indices
+        self.date_col = date_col
+        self.dates = self.df[date_col].to_numpy() if date_col else None
+        self.sorted_by_date = date_col is not None and sort_by[0] == date_col
+
+    @staticmethod
+    def _date_range(date_from, date_to):
+        # Fechas ya validadas por FastAPI (date) a texto ISO, comparable con las del CSV;
+        # el límite superior es exclusivo (día siguiente) para incluir también fechas con hora
+        lo = date_from.isoformat() if date_from else None
+        hi = (date_to + timedelta(days=1)).isoformat() if date_to else None
+        return lo, hi
+
+    def _date_bounds(self, date_from, date_to):
+        lo, hi = 0, len(self.df)
+        if self.sorted_by_date:
+            date_lo, date_hi = self._date_range(date_from, date_to)
+            if date_lo:
+                lo = int(np.searchsorted(self.dates, date_lo, side="left"))
+            if date_hi:
+                hi = int(np.searchsorted(self.dates, date_hi, side="left"))
+        return lo, hi
+
+    def _filter_block(self, positions, date_from, date_to, merchant_category):
+        if self.date_col and not self.sorted_by_date and (date_from or date_to):
+            date_lo, date_hi = self._date_range(date_from, date_to)
+            dates = self.dates[positions]
+            positions = positions[((dates >= date_lo) if date_lo else True) & ((dates < date_hi) if date_hi else True)]
+        if merchant_category and "merchant_category" in self.df.columns:
+            categories = self.df["merchant_category"].to_numpy()[positions]
+            positions = positions[categories == merchant_category]
+        return positions
+
+    def iter_matches(self, start=0, user_id=None, date_from=None, date_to=None,
+                     merchant_category=None, chunk_size=STREAM_CHUNK_SIZE):
+        # Genera bloques de posiciones que cumplen los filtros, a partir de `start`
+        lo, hi = self._date_bounds(date_from, date_to)
+        lo = max(lo, start)
+
+        if user_id is not None:
+            positions = self.user_positions.get(user_id, np.array([], dtype=np.intp))
+            positions = positions[(positions >= lo) & (positions < hi)]
+            for i in range(0, len(positions), chunk_size):
+                block = self._filter_block(positions[i:i + chunk_size], date_from, date_to, merchant_category)
+                if len(block):
+                    yield block
+            return
+
+        for block_start in range(lo, hi, chunk_size):
+            block = np.arange(block_start, min(block_start + chunk_size, hi))
+            block = self._filter_block(block, date_from, date_to, merchant_category)
+            if len(block):
+                yield block
+
+    def page(self, limit, cursor=None, **filters):
+        start = decode_cursor(cursor)
+        selected = []
+        n = 0
+        for block in self.iter_matches(start=start, chunk_size=max(limit, STREAM_CHUNK_SIZE), **filters):
+            selected.append(block)
+            n += len(block)
+            if n > limit:
+                break
+        positions = np.concatenate(selected) if selected else np.array([], dtype=np.intp)
+
+        # Se pide un registro extra para saber si hay página siguiente
+        next_cursor = encode_cursor(positions[limit]) if len(positions) > limit else None
+        return {
+            "data": self.df.iloc[positions[:limit]].to_dict(orient="records"),
+            "next_cursor": next_cursor,
+        }
+
+    def stream(self, **filters):
+        # NDJSON por bloques: nunca se materializa el resultado completo
+        for block in self.iter_matches(**filters):
+            yield self.df.iloc[block].to_json(orient="records", lines=True, force_ascii=False)
+
+    def records(self, **filters):
+        blocks = list(self.iter_matches(**filters))
+        positions = np.concatenate(blocks) if blocks else np.array([], dtype=np.intp)
+        return self.df.iloc[positions].to_dict(orient="records")
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(str(int(position)).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        position = int(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if position < 0:
+            raise ValueError(position)
+        return position
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+class CachedBody:
+    def __init__(self, body):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        self.nbytes = len(body) + (len(self.gzipped) if self.gzipped is not None else 0)
+
+
+class ResponseCache:
+    def __init__(self, max_mb=CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body):
+        # La compresión (CachedBody) queda fuera del lock
+        entry = CachedBody(body)
+        with self.lock:
+            replaced = self.entries.pop(key, None)
+            if replaced is not None:
+                self.nbytes -= replaced.nbytes
+            self.entries[key] = entry
+            self.nbytes += entry.nbytes
+            while len(self.entries) > 1 and self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return entry
+
+    def invalidate(self, name):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == name]:
+                self.nbytes -= self.entries.pop(key).nbytes
+
+
+response_cache = ResponseCache()
+_datasets = {}
+_datasets_lock = threading.Lock()
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_dataset(name):
+    # Carga perezosa: el CSV se lee en la primera consulta y se recarga si cambió
+    spec = DATASET_SPECS[name]
+    path = DATA_DIR / spec["file"]
+    stamp = file_stamp(path)
+    loaded = _datasets.get(name)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded
+    with _datasets_lock:
+        loaded = _datasets.get(name)
+        if loaded is None or loaded[0] != stamp:
+            dataset = Dataset(pd.read_csv(path), sort_by=spec["sort_by"], date_col=spec.get("date_col"))
+            loaded = _datasets[name] = (stamp, dataset)
+            response_cache.invalidate(name)
+    return loaded
+
+
+def etag_matches(if_none_match, etag):
+    # Comparación débil (RFC 9110): se ignora el prefijo W/
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def accepts_gzip(accept_encoding):
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def cached_response(request, entry):
+    use_gzip = entry.gzipped is not None and accepts_gzip(request.headers.get("accept-encoding"))
+    # La representación comprimida lleva el mismo ETag en versión débil
+    headers = {"ETag": f"W/{entry.etag}" if use_gzip else entry.etag, "Cache-Control": "no-cache",
+               "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.gzipped, media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def respond(request, name, limit, cursor, stream, **filters):
+    stamp, dataset = get_dataset(name)
+    if stream:
+        return StreamingResponse(dataset.stream(**filters), media_type="application/x-ndjson")
 
-demographics_df = pd.read_csv(DATA_DIR / "demographics.csv")
-products_df = pd.read_csv(DATA_DIR / "products.csv")
-transactions_df = pd.read_csv(DATA_DIR / "transactions.csv")
+    key = (name, stamp, limit, cursor, tuple(sorted(filters.items())))
+    entry = response_cache.get(key)
+    if entry is None:
+        # Sin limit/cursor/stream se mantiene la respuesta original (lista completa)
+        if limit is not None or cursor is not None:
+            payload = dataset.page(limit or MAX_PAGE_SIZE, cursor, **filters)
+        else:
+            payload = dataset.records(**filters)
+        entry = response_cache.put(key, dumps(payload))
+    return cached_response(request, entry)
 
 
 @app.get("/")
@@ -27,13 +290,38 @@ def root():
     return {"message": "Mock API para extracción de datos"}
 
 @app.get("/demographics/")
-def get_demographics():
-    return demographics_df.to_dict(orient="records")
+def get_demographics(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user_id: Optional[str] = None,
+):
+    return respond(request, "demographics", limit, cursor, stream, user_id=user_id)
 
 @app.get("/products/")
-def get_products():
-    return products_df.to_dict(orient="records")
+def get_products(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    return respond(request, "products", limit, cursor, stream, user_id=user_id, date_from=date_from,
+                   date_to=date_to)
 
 @app.get("/transactions/")
-def get_transactions():
-    return transactions_df.to_dict(orient="records")
+def get_transactions(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    merchant_category: Optional[str] = None,
+):
+    return respond(request, "transactions", limit, cursor, stream, user_id=user_id, date_from=date_from,
+                   date_to=date_to, merchant_category=merchant_category)
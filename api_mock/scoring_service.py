@@ -0,0 +1,185 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List
+
+import joblib
+import numpy as np
+from fastapi import FastAPI, HTTPException
+
+from src.inference import InferenceEngine
+from src.model_registry import CURRENT, REGISTRY_DIR, resolve_version
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+MODEL_PATH = ROOT_DIR / "outputs/models/xgboost_tuned_model.pkl"
+# Versión del registro de modelos a servir ("current" o una fija, p. ej. v0003)
+MODEL_VERSION = os.environ.get("SCORING_MODEL_VERSION", "current")
+TRANSFORMER_PATH = ROOT_DIR / "outputs/models/feature_transformer.pkl"
+
+# Micro-batching: las requests individuales concurrentes se agrupan hasta
+# MAX_BATCH_SIZE o hasta esperar MAX_WAIT_MS, y se puntúan con una sola llamada
+# al motor de inferencia (booster inplace_predict o árboles compilados a NumPy)
+MAX_BATCH_SIZE = int(os.environ.get("SCORING_MAX_BATCH_SIZE", "64"))
+MAX_WAIT_MS = float(os.environ.get("SCORING_MAX_WAIT_MS", "5"))
+SCORING_BACKEND = os.environ.get("SCORING_BACKEND", "booster")
+SCORING_THREADS = int(os.environ.get("SCORING_THREADS", "0")) or None
+
+SEGMENT_BINS = [0.3, 0.6]
+SEGMENT_LABELS = ["Baja", "Media", "Alta"]
+
+
+def segment_for(score):
+    # Mismos cortes que 04_business_insights: [0, 0.3], (0.3, 0.6], (0.6, 1]
+    return SEGMENT_LABELS[int(np.searchsorted(SEGMENT_BINS, score, side="left"))]
+
+
+class LatencyStats:
+    def __init__(self, window=10000):
+        self.latencies_ms = deque(maxlen=window)
+        self.requests = 0
+        self.records = 0
+        self.batches = 0
+        self.started_at = time.perf_counter()
+
+    def record_request(self, latency_ms, n_records=1):
+        self.latencies_ms.append(latency_ms)
+        self.requests += 1
+        self.records += n_records
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started_at
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "records": self.records,
+            "batches": self.batches,
+            "avg_batch_size": self.records / self.batches if self.batches else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "throughput_rps": self.requests / elapsed if elapsed else 0.0,
+            "throughput_records_per_s": self.records / elapsed if elapsed else 0.0,
+        }
+
+
+class MicroBatcher:
+    def __init__(self, engine, stats, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.engine = engine
+        self.stats = stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.worker = None
+
+    def start(self):
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+
+    def score_matrix(self, X):
+        self.stats.batches += 1
+        return self.engine.predict(X)
+
+    async def submit(self, features):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((features, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            X = np.vstack([features for features, _ in batch])
+            try:
+                scores = await loop.run_in_executor(None, self.score_matrix, X)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(float(score))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Modelo y transformer se cargan una única vez al iniciar el servicio
+    # La versión se resuelve antes de cargar: un promote concurrente no cambia lo que se reporta
+    model_version = resolve_version(MODEL_VERSION, ROOT_DIR / REGISTRY_DIR)
+    engine = InferenceEngine.from_registry(model_version or CURRENT, ROOT_DIR / REGISTRY_DIR,
+                                           n_threads=SCORING_THREADS, backend=SCORING_BACKEND,
+                                           fallback_path=MODEL_PATH)
+    transformer = joblib.load(TRANSFORMER_PATH)
+    # transform_record escribe en el orden de feature_names_: se valida una vez contra el modelo
+    if engine.validate_columns(transformer.feature_names_) is not None:
+        raise RuntimeError("El orden de features del transformer no coincide con el del modelo")
+    stats = LatencyStats()
+    app.state.transformer = transformer
+    app.state.model_version = model_version or "legacy"
+    app.state.stats = stats
+    app.state.batcher = MicroBatcher(engine, stats)
+    app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+
+
+app = FastAPI(title="Servicio de Propensión a Seguros", lifespan=lifespan)
+
+
+def _features(record):
+    # transform_record valida columnas y tipos (ValueError); TypeError cubre lo que se le escape
+    try:
+        return app.state.transformer.transform_record(record)
+    except (KeyError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Registro inválido: {e}")
+
+
+@app.post("/score")
+async def score(record: Dict[str, Any]):
+    start = time.perf_counter()
+    probability = await app.state.batcher.submit(_features(record))
+    app.state.stats.record_request((time.perf_counter() - start) * 1000)
+    return {"propensity_score": probability, "propensity_segment": segment_for(probability)}
+
+
+@app.post("/score/batch")
+async def score_batch(records: List[Dict[str, Any]]):
+    start = time.perf_counter()
+    if not records:
+        return []
+    X = np.vstack([_features(record) for record in records])
+    scores = await asyncio.get_running_loop().run_in_executor(None, app.state.batcher.score_matrix, X)
+    app.state.stats.record_request((time.perf_counter() - start) * 1000, n_records=len(records))
+    return [
+        {"propensity_score": float(s), "propensity_segment": segment_for(s)}
+        for s in scores
+    ]
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "max_batch_size": app.state.batcher.max_batch_size,
+        "max_wait_ms": app.state.batcher.max_wait * 1000,
+        "backend": app.state.batcher.engine.backend,
+        "model_version": app.state.model_version,
+        **app.state.stats.summary(),
+    }
@@ -1,10 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import pandas as pd
-import joblib
+import numpy as np
 import datetime
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+from PIL import Image
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
-import os
+from src.storage import file_hash
+from src.instrumentation import instrument, current_span
+from src.model_registry import (
+    CURRENT, LEGACY_MODEL_PATH, MODEL_NAME, REGISTRY_DIR, load_model, resolve_version, version_dir,
+)
+
+# Caché propia del reporte: data/processed/propensity_scores.parquet es de 04_business_insights
+SCORES_PATH = "outputs/cache/report/propensity_scores.parquet"
+THUMBNAIL_DIR = "outputs/cache/thumbnails"
+SECTIONS_DIR = "reports/sections"
+BATCH_SIZE = 100_000
+# Mismos cortes que 04_business_insights: [0, 0.3], (0.3, 0.6], (0.6, 1]
+SEGMENTS = {"Baja": (-np.inf, 0.3), "Media": (0.3, 0.6), "Alta": (0.6, np.inf)}
 
 def draw_paragraph(c, text, x, y, max_width=500, line_height=14):
     from textwrap import wrap
@@ -13,14 +36,189 @@ def draw_paragraph(c, text, x, y, max_width=500, line_height=14):
         y -= line_height
     return y
 
-def generate_pdf_report(data_path, model_path, output_path="reports/final_report.pdf"):
-    df = pd.read_csv(data_path)
-    model = joblib.load(model_path)
-    df["pred_proba"] = model.predict_proba(df.drop(columns=["has_insurance"]))[:, 1]
 
-    top10 = df.sort_values("pred_proba", ascending=False).head(10)
-    avg_proba = df["pred_proba"].mean()
-    high_propensity = (df["pred_proba"] > 0.6).sum()
+# ----------------------------
+# Scores: precalculados si están al día; si no, se calculan por bloques y se guardan
+# ----------------------------
+
+def feature_source(data_path):
+    # El parquet si existe, si no el CSV (igual que iter_feature_batches)
+    parquet_path = Path(data_path).with_suffix(".parquet")
+    return parquet_path if parquet_path.exists() else parquet_path.with_suffix(".csv")
+
+
+def score_fingerprint(data_path, model_version=CURRENT, registry_dir=REGISTRY_DIR):
+    # Versión resuelta y hash del modelo y de las features: cambia con cada promote/rollback
+    # o reentrenamiento, aunque los mtimes no lo reflejen
+    version = resolve_version(model_version, registry_dir)
+    model_path = version_dir(version, registry_dir) / MODEL_NAME if version else Path(LEGACY_MODEL_PATH)
+    return {
+        "model_version": version,
+        "model_sha256": file_hash(model_path),
+        "data_sha256": file_hash(feature_source(data_path)),
+    }
+
+
+def scores_are_fresh(scores_path, fingerprint):
+    meta_path = f"{scores_path}.json"
+    if not (os.path.exists(scores_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path) as f:
+        return json.load(f) == fingerprint
+
+
+def iter_feature_batches(data_path, batch_size=BATCH_SIZE):
+    path = feature_source(data_path)
+    if path.suffix == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=batch_size)
+
+
+def iter_score_batches(data_path, model_version=CURRENT, scores_path=SCORES_PATH, batch_size=BATCH_SIZE,
+                       registry_dir=REGISTRY_DIR):
+    fingerprint = score_fingerprint(data_path, model_version, registry_dir)
+    if scores_are_fresh(scores_path, fingerprint):
+        for batch in pq.ParquetFile(scores_path).iter_batches(batch_size=batch_size, columns=["propensity_score"]):
+            yield batch.column(0).to_numpy()
+        return
+
+    model = load_model(fingerprint["model_version"] or CURRENT, registry_dir)
+    os.makedirs(os.path.dirname(scores_path) or ".", exist_ok=True)
+    tmp_path = f"{scores_path}.tmp"
+    writer = None
+    for features in iter_feature_batches(data_path, batch_size):
+        scores = model.predict_proba(features.drop(columns=["has_insurance"]))[:, 1]
+        table = pa.table({"propensity_score": scores})
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, table.schema)
+        writer.write_table(table)
+        yield scores
+    if writer is not None:
+        writer.close()
+        os.replace(tmp_path, scores_path)
+        # La huella se publica después de los scores: si falta o no coincide, se recalculan
+        with open(f"{tmp_path}.json", "w") as f:
+            json.dump(fingerprint, f, indent=2)
+        os.replace(f"{tmp_path}.json", f"{scores_path}.json")
+
+
+class ScoreSummary:
+    # Estadísticas en una sola pasada: promedio, conteos por segmento y top-N sin ordenar todo
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.count = 0
+        self.total = 0.0
+        self.high = 0
+        self.top_scores = np.array([])
+        self.top_rows = np.array([], dtype=np.int64)
+        self.segments = {name: {"count": 0, "total": 0.0} for name in SEGMENTS}
+
+    def update(self, scores, rows):
+        self.count += len(scores)
+        self.total += float(scores.sum())
+        self.high += int((scores > 0.6).sum())
+        for name, (lo, hi) in SEGMENTS.items():
+            in_segment = scores[(scores > lo) & (scores <= hi)]
+            self.segments[name]["count"] += len(in_segment)
+            self.segments[name]["total"] += float(in_segment.sum())
+
+        candidates = np.concatenate([self.top_scores, scores])
+        candidate_rows = np.concatenate([self.top_rows, rows])
+        if len(candidates) > self.top_n:
+            keep = np.argpartition(-candidates, self.top_n - 1)[:self.top_n]
+            candidates, candidate_rows = candidates[keep], candidate_rows[keep]
+        self.top_scores, self.top_rows = candidates, candidate_rows
+
+    def top(self):
+        order = np.lexsort((self.top_rows, -self.top_scores))
+        return list(zip(self.top_rows[order], self.top_scores[order]))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float("nan")
+
+
+# ----------------------------
+# Miniaturas cacheadas por hash de archivo
+# ----------------------------
+
+def cached_thumbnail(img_path, max_size=(800, 600), cache_dir=THUMBNAIL_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    thumb_path = os.path.join(cache_dir, f"{file_hash(img_path)[:16]}_{max_size[0]}x{max_size[1]}.png")
+    if not os.path.exists(thumb_path):
+        with Image.open(img_path) as img:
+            img.thumbnail(max_size)
+            tmp_path = f"{thumb_path}.tmp.png"
+            img.save(tmp_path, optimize=True)
+        os.replace(tmp_path, thumb_path)
+    return thumb_path
+
+
+# ----------------------------
+# Secciones por segmento (una por proceso)
+# ----------------------------
+
+def render_segment_section(segment, scores_path, output_dir, top_n=10):
+    # Cada worker recorre el archivo de scores, se queda con su segmento y escribe su propio PDF
+    lo, hi = SEGMENTS[segment]
+    summary = ScoreSummary(top_n)
+    offset = 0
+    for batch in pq.ParquetFile(scores_path).iter_batches(batch_size=BATCH_SIZE, columns=["propensity_score"]):
+        scores = batch.column(0).to_numpy()
+        rows = np.flatnonzero((scores > lo) & (scores <= hi))
+        summary.update(scores[rows], rows + offset)
+        offset += len(scores)
+
+    output_path = os.path.join(output_dir, f"segmento_{segment.lower()}.pdf")
+    c = canvas.Canvas(output_path, pagesize=A4)
+    width, height = A4
+    y = height - 40
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(40, y, f"Segmento de Propensión: {segment}")
+    y -= 30
+
+    c.setFont("Helvetica", 12)
+    y = draw_paragraph(c, f"Fecha: {datetime.date.today()}", 40, y)
+    y = draw_paragraph(c, f"Clientes en el segmento: {summary.count}", 40, y)
+    y = draw_paragraph(c, f"Promedio de propensión: {summary.mean:.2f}", 40, y)
+    y -= 20
+
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y, f"Top {top_n} Clientes del Segmento")
+    y -= 20
+
+    c.setFont("Helvetica", 10)
+    for idx, score in summary.top():
+        y = draw_paragraph(c, f"Cliente #{idx} - Probabilidad: {score:.2f}", 50, y)
+    c.save()
+    return output_path
+
+
+def render_segment_sections(scores_path=SCORES_PATH, output_dir=SECTIONS_DIR, max_workers=None, top_n=10):
+    os.makedirs(output_dir, exist_ok=True)
+    # "spawn": el reporte corre en un thread del pipeline; un fork heredaría locks de otros threads
+    with ProcessPoolExecutor(max_workers=max_workers or len(SEGMENTS),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(render_segment_section, segment, scores_path, output_dir, top_n)
+                   for segment in SEGMENTS]
+        return [future.result() for future in futures]
+
+
+@instrument("stage:report", profile=True)
+def generate_pdf_report(data_path, model_version=CURRENT, output_path="reports/final_report.pdf",
+                        scores_path=SCORES_PATH, segment_sections=False, registry_dir=REGISTRY_DIR):
+    summary = ScoreSummary(top_n=10)
+    offset = 0
+    for scores in iter_score_batches(data_path, model_version, scores_path, registry_dir=registry_dir):
+        summary.update(scores, np.arange(offset, offset + len(scores)))
+        offset += len(scores)
+
+    current_span().update(rows_in=summary.count)
+    avg_proba = summary.mean
+    high_propensity = summary.high
 
     c = canvas.Canvas(output_path, pagesize=A4)
     width, height = A4
@@ -35,6 +233,9 @@ def generate_pdf_report(data_path, model_path, output_path="reports/final_report
     y = draw_paragraph(c, f"Fecha: {datetime.date.today()}", 40, y)
     y = draw_paragraph(c, f"Promedio de propensión: {avg_proba:.2f}", 40, y)
     y = draw_paragraph(c, f"Clientes con alta propensión (> 60%): {high_propensity}", 40, y)
+    for name, stats in summary.segments.items():
+        segment_mean = stats["total"] / stats["count"] if stats["count"] else 0.0
+        y = draw_paragraph(c, f"Segmento {name}: {stats['count']} clientes (promedio {segment_mean:.2f})", 40, y)
     y -= 20
 
     c.setFont("Helvetica-Bold", 14)
@@ -42,8 +243,8 @@ def generate_pdf_report(data_path, model_path, output_path="reports/final_report
     y -= 20
 
     c.setFont("Helvetica", 10)
-    for idx, row in top10.iterrows():
-        y = draw_paragraph(c, f"Cliente #{idx} - Probabilidad: {row['pred_proba']:.2f}", 50, y)
+    for idx, score in summary.top():
+        y = draw_paragraph(c, f"Cliente #{idx} - Probabilidad: {score:.2f}", 50, y)
         if y < 100:
             c.showPage()
             y = height - 40
@@ -75,7 +276,9 @@ def generate_pdf_report(data_path, model_path, output_path="reports/final_report
             for fimg in files:
                 img_path = os.path.join(folder_path, fimg)
                 try:
-                    img = ImageReader(img_path)
+                    # Miniatura cacheada: no se decodifica la imagen original en cada corrida
+                    thumb_path = cached_thumbnail(img_path)
+                    img = ImageReader(thumb_path)
                     iw, ih = img.getSize()
                     ratio = min(400 / iw, 300 / ih)
                     iw *= ratio
@@ -83,7 +286,7 @@ def generate_pdf_report(data_path, model_path, output_path="reports/final_report
                     if y - ih < 60:
                         c.showPage()
                         y = height - 40
-                    c.drawImage(img_path, 40, y - ih, width=iw, height=ih)
+                    c.drawImage(img, 40, y - ih, width=iw, height=ih)
                     y -= ih + 20
                 except Exception as e:
                     y = draw_paragraph(c, f"[Error al cargar imagen: {fimg}]", 50, y)
@@ -95,9 +298,14 @@ def generate_pdf_report(data_path, model_path, output_path="reports/final_report
     c.save()
     print(f"✅ PDF generado exitosamente en: {output_path}")
 
+    if segment_sections and os.path.exists(scores_path):
+        for section_path in render_segment_sections(scores_path):
+            print(f"✅ Sección generada en: {section_path}")
+
 # Ejecutar
 if __name__ == "__main__":
     generate_pdf_report(
-        data_path="data/processed/final_dataset.csv",
-        model_path="outputs/models/xgboost_tuned_model.pkl"
+        data_path="data/processed/final_dataset.parquet",
+        model_version=CURRENT,
+        segment_sections="--sections" in sys.argv
     )
@@ -1,29 +1,24 @@
-import subprocess
+import argparse
 import os
-
-def run_script(path):
-    print(f"\n🚀 Ejecutando {path}")
-    result = subprocess.run(["python3", path])
-    if result.returncode != 0:
-        raise RuntimeError(f"❌ Error en {path}")
+from src.pipeline import ROOT_DIR, run_pipeline
 
 def main():
-    try:
-        # Paso 1: Exploración
-        run_script("scripts/01_eda.py")
-
-        # Paso 2: Feature Engineering
-        run_script("scripts/02_feature_engineering.py")
-
-        # Paso 3: Modelado
-        run_script("scripts/03_modeling.py")
-
-        # Paso 4: Business Insights
-        run_script("scripts/04_business_insights.py")
-
-        # Paso 5: Generar Reporte Final
-        run_script("reports/report_generator.py")
+    parser = argparse.ArgumentParser(description="Ejecuta el pipeline completo en un solo proceso")
+    parser.add_argument("--force", action="store_true", help="Reejecutar todas las etapas aunque no haya cambios")
+    parser.add_argument("--workers", type=int, default=2, help="Etapas independientes en paralelo")
+    parser.add_argument("--warm", action="store_true",
+                        help="Enviar el pipeline al worker persistente (python scripts/warm_worker.py serve)")
+    args = parser.parse_args()
+    # Las etapas usan rutas relativas a la raíz del repo (también el worker, que corre ahí)
+    os.chdir(ROOT_DIR)
 
+    try:
+        if args.warm:
+            # Sin importar dependencias pesadas en este proceso: ya están cargadas en el worker
+            from src.warm_worker import submit
+            print(submit({"job": "pipeline", "force": args.force, "workers": args.workers})["output"], end="")
+        else:
+            run_pipeline(force=args.force, max_workers=args.workers)
         print("\n✅ Flujo completo ejecutado exitosamente.")
 
     except Exception as e:
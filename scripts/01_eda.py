@@ -2,97 +2,127 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import os
 from src.data_preparation import load_datasets, preprocess_transactions, merge_datasets
+from src.streaming import stream_customer_table, MEMORY_MB
+from src.storage import save_dataset, load_dataset
+from src.instrumentation import instrument
+from src.figures import render_figures, bar_chart, histogram_grid, heatmap, histogram_data
 
-def run_eda():
-    
-    sns.set(style="whitegrid")
-    plt.rcParams["figure.figsize"] = (12, 6)
-
+@instrument("stage:unify", profile=True)
+def build_unified_dataset(streaming=False, memory_mb=MEMORY_MB):
     
     demo_path = "data/raw/demographics.csv"
     products_path = "data/raw/products.csv"
     trans_path = "data/raw/transactions.csv"
 
-    demographics, products, transactions = load_datasets(demo_path, products_path, trans_path)
-    transactions = preprocess_transactions(transactions)
-    df_model = merge_datasets(demographics, transactions, products)
+    if streaming:
+        # Transacciones por bloques con memoria acotada (exportes más grandes que la RAM)
+        print(f"🔄 Leyendo transacciones por bloques (presupuesto {memory_mb:,.0f} MB)...")
+        df_model = stream_customer_table(demo_path, products_path, trans_path, memory_mb=memory_mb,
+                                         compact=True, verbose=True)
+    else:
+        demographics, products, transactions = load_datasets(demo_path, products_path, trans_path, compact=True)
+        transactions = preprocess_transactions(transactions)
+        df_model = merge_datasets(demographics, transactions, products)
     
-    print("\n Análisis de Ocupación:")
-    
-    top_occupations = df_model['occupation'].value_counts().head(15)
-    print("Top 15 Ocupaciones:\n", top_occupations)
-
-    
-    plt.figure(figsize=(12, 8))
-    avg_spent_by_occupation = df_model[df_model['occupation'].isin(top_occupations.index)] \
-        .groupby('occupation')['avg_spent'].mean().sort_values(ascending=False)
-    sns.barplot(y=avg_spent_by_occupation.index, x=avg_spent_by_occupation.values)
-    plt.title('Gasto Promedio Mensual por Ocupación (Top 15)')
-    plt.xlabel('Gasto Promedio Mensual')
-    plt.ylabel('Ocupación')
-    plt.tight_layout()
-    plt.savefig("outputs/figures/gasto_vs_ocupacion_top15.png")
-    plt.close()
-    print("Gráfico Gasto vs Ocupación guardado.")
-
-    # ----------------------------
     print("\n Análisis de Combinaciones de Productos:")
     product_cols = [col for col in df_model.columns if col.startswith('has_') and col != 'has_insurance']
     df_model['product_count_eda'] = df_model[product_cols].sum(axis=1)
     print("Distribución de cantidad de productos por cliente:\n", df_model['product_count_eda'].value_counts())
 
-    plt.figure(figsize=(10, 6))
-    sns.countplot(data=df_model, x='product_count_eda')
-    plt.title('Distribución de Cantidad de Productos por Cliente')
-    plt.xlabel('Número de Productos Contratados')
-    plt.ylabel('Número de Clientes')
-    plt.savefig("outputs/figures/distribucion_num_productos.png")
-    plt.close()
-    print("Gráfico Distribución Número de Productos guardado.")
-
     # Combinaciones específicas (si pocas)
     if len(product_cols) < 5:
         product_combinations = df_model[product_cols].astype(str).agg('-'.join, axis=1)
         common_combinations = product_combinations.value_counts().head(10)
         print("\nCombinaciones de productos más comunes:\n", common_combinations)
     
-    os.makedirs("data/processed", exist_ok=True)
-    df_model.to_csv("data/processed/clientes_unificados.csv", index=False)
+    save_dataset(df_model, "data/processed/clientes_unificados.parquet")
     print("✅ Dataset unificado guardado.")
 
     
     print(df_model.head())
     print(df_model.describe(include="all"))
+    return df_model
 
-    
-    df_model[["age", "total_spent", "avg_spent", "txn_count"]].hist(bins=20)
-    plt.suptitle("Distribuciones numéricas")
-    plt.tight_layout()
-    plt.savefig("outputs/figures/histogramas_numericos.png")
 
-    
+def eda_figure_specs(df_model):
+    # Se agrega en el proceso principal: a los workers sólo viajan conteos y medias
+    num_cols = ["age", "total_spent", "avg_spent", "txn_count"]
+    top_occupations = df_model['occupation'].value_counts().head(15)
+    avg_spent_by_occupation = df_model[df_model['occupation'].isin(top_occupations.index)] \
+        .groupby('occupation')['avg_spent'].mean().sort_values(ascending=False)
     order = ["<30k", "30k-50k", "50k-100k", "100k-150k", ">150k"]
-    plt.figure()
-    sns.barplot(data=df_model, x="income_range", y="avg_spent", ci=None, order=order)
-    plt.title("Gasto promedio mensual vs. ingreso declarado")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("outputs/figures/gasto_vs_ingreso.png")
+    avg_spent_by_income = df_model.groupby("income_range")["avg_spent"].mean().reindex(order).dropna()
+
+    return [
+        {
+            "output": "outputs/figures/gasto_vs_ocupacion_top15.png",
+            "render": bar_chart,
+            "data": avg_spent_by_occupation,
+            "options": {"figsize": (12, 8), "horizontal": True,
+                        "title": 'Gasto Promedio Mensual por Ocupación (Top 15)',
+                        "xlabel": 'Gasto Promedio Mensual', "ylabel": 'Ocupación'},
+            "style": "whitegrid",
+        },
+        {
+            "output": "outputs/figures/distribucion_num_productos.png",
+            "render": bar_chart,
+            "data": df_model['product_count_eda'].value_counts().sort_index(),
+            "options": {"figsize": (10, 6), "title": 'Distribución de Cantidad de Productos por Cliente',
+                        "xlabel": 'Número de Productos Contratados', "ylabel": 'Número de Clientes'},
+            "style": "whitegrid",
+            "tight_layout": False,
+        },
+        {
+            "output": "outputs/figures/histogramas_numericos.png",
+            "render": histogram_grid,
+            "data": histogram_data(df_model, num_cols, bins=20),
+            "options": {"title": "Distribuciones numéricas"},
+            "style": "whitegrid",
+        },
+        {
+            "output": "outputs/figures/gasto_vs_ingreso.png",
+            "render": bar_chart,
+            "data": avg_spent_by_income,
+            "options": {"figsize": (12, 6), "title": "Gasto promedio mensual vs. ingreso declarado",
+                        "xlabel": "income_range", "ylabel": "avg_spent", "rotation": 45},
+            "style": "whitegrid",
+        },
+        {
+            "output": "outputs/figures/heatmap_correlaciones.png",
+            "render": heatmap,
+            "data": df_model[num_cols].corr(),
+            "options": {"title": "Correlación entre variables numéricas"},
+            "style": "whitegrid",
+        },
+    ]
+
 
+@instrument("stage:eda_figures", profile=True)
+def render_eda_figures(df_model=None, force=False, max_workers=None):
+    if df_model is None:
+        df_model = load_dataset("data/processed/clientes_unificados.parquet")
+
+    print("\n Análisis de Ocupación:")
     
-    corr = df_model[["age", "total_spent", "avg_spent", "txn_count"]].corr()
-    plt.figure()
-    sns.heatmap(corr, annot=True, cmap="coolwarm")
-    plt.title("Correlación entre variables numéricas")
-    plt.tight_layout()
-    plt.savefig("outputs/figures/heatmap_correlaciones.png")
+    top_occupations = df_model['occupation'].value_counts().head(15)
+    print("Top 15 Ocupaciones:\n", top_occupations)
 
+    render_figures(eda_figure_specs(df_model), max_workers=max_workers, force=force)
     print("📊 Visualizaciones guardadas en outputs/figures/")
 
+
+def run_eda(streaming=False, memory_mb=MEMORY_MB):
+    df_model = build_unified_dataset(streaming, memory_mb)
+    render_eda_figures(df_model)
+
 if __name__ == "__main__":
-    run_eda()
+    parser = argparse.ArgumentParser(description="Dataset unificado y visualizaciones de EDA")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Leer transacciones por bloques con memoria acotada")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_MB,
+                        help="Presupuesto de memoria de la lectura por bloques")
+    args = parser.parse_args()
+    run_eda(args.streaming, args.memory_mb)
@@ -1,83 +1,82 @@
 # scripts/02_feature_engineering.py
 
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import StandardScaler
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import pandas as pd
+import joblib
+from src.feature_transformer import FeatureTransformer, add_transaction_features
+from src.window_features import window_features
+from src.incremental import MANIFEST_NAME, matches_source
+from src.storage import load_dataset, save_dataset
+from src.schema import read_table, downcast_floats
+from src.instrumentation import instrument, current_span
+
+TRANSFORMER_PATH = "outputs/models/feature_transformer.pkl"
+IDS_PATH = "data/processed/customer_ids.parquet"
+WINDOW_FEATURES_PATH = "data/processed/window_features.parquet"
+TRANSACTIONS_PATH = "data/raw/transactions.csv"
+AGGREGATES_PATH = "data/processed/user_aggregates.parquet"
+STATE_DIR = "data/processed/user_state"
+
+
+def load_user_aggregates(path=AGGREGATES_PATH, state_dir=STATE_DIR, source_path=TRANSACTIONS_PATH):
+    # RFM y volatilidad del estado incremental (scripts/update_user_aggregates.py), sólo si
+    # el manifest del estado registra exactamente el transactions.csv actual (tamaño y hash
+    # del final) y las features se derivaron después de esa actualización del estado
+    if not os.path.exists(path):
+        print(f"⚠️  No existe {path}: RFM y volatilidad se calculan desde las transacciones")
+        return None
+    manifest_path = os.path.join(state_dir, MANIFEST_NAME)
+    if (not matches_source(state_dir, source_path) or not os.path.exists(manifest_path)
+            or os.path.getmtime(path) < os.path.getmtime(manifest_path)):
+        print(f"⚠️  {path} no está al día con {source_path}: RFM y volatilidad se recalculan")
+        return None
+    return load_dataset(path, columns=["user_id", "recency", "frequency", "monetary", "spending_volatility"])
+
+@instrument("stage:features", profile=True)
 def run_feature_engineering():
     
-    df = pd.read_csv("data/processed/clientes_unificados.csv")
-    transactions_df = pd.read_csv("data/raw/transactions.csv")
-    transactions_df["date"] = pd.to_datetime(transactions_df["date"])
-
-   
-    if "has_insurance" not in df.columns:
-        df["has_insurance"] = 0
-    df["has_insurance"] = df["has_insurance"].astype(int)
-
-    
-    df["product_count"] = df.filter(like="has_").drop(columns=["has_insurance"]).sum(axis=1)
-
-    
-    top_cats = df["favorite_category"].value_counts().index[:5]
-    df["favorite_category_enc"] = df["favorite_category"].apply(lambda x: x if x in top_cats else "other")
+    df = load_dataset("data/processed/clientes_unificados.parquet")
+    # Sólo user_id, fecha, monto y categoría (sin transaction_id ni description)
+    transactions_df = read_table(TRANSACTIONS_PATH, "transactions")
 
 
+    # has_insurance, product_count, RFM y volatilidad del gasto mensual
     reference_date = transactions_df["date"].max() + pd.Timedelta(days=1)
-    rfm_df = transactions_df.groupby('user_id').agg(
-        recency=('date', lambda x: (reference_date - x.max()).days),
-        frequency=('transaction_id', 'count'),
-        monetary=('amount', 'sum')
-    ).reset_index()
-
-    df = pd.merge(df, rfm_df, on='user_id', how='left')
-    df['recency'] = df['recency'].fillna(999)
-    df['frequency'] = df['frequency'].fillna(0)
-    df['monetary'] = df['monetary'].fillna(0)
-
-
-    transactions_df['month'] = transactions_df['date'].dt.to_period('M')
-    monthly_spending = transactions_df.groupby(['user_id', 'month'])['amount'].sum().reset_index()
-
-    spending_volatility = monthly_spending.groupby('user_id')['amount'].std(ddof=0).reset_index()
-    spending_volatility.rename(columns={'amount': 'spending_volatility'}, inplace=True)
-
-    df = pd.merge(df, spending_volatility, on='user_id', how='left')
-    df['spending_volatility'] = df['spending_volatility'].fillna(0)
-
-
-    occupation_counts = df['occupation'].value_counts()
-    threshold = 5
-    rare_occupations = occupation_counts[occupation_counts < threshold].index
-    df['occupation_enc'] = df['occupation'].replace(rare_occupations, 'Other_Occupation')
-
-
-    df['age_x_product_count'] = df['age'] * df['product_count']
-    df['avg_spent_x_frequency'] = df['avg_spent'] * df['frequency']
-
+    df = add_transaction_features(df, transactions_df, reference_date, load_user_aggregates())
+    user_ids = df["user_id"].reset_index(drop=True)
 
-    categorical_vars = ["income_range", "risk_profile", "favorite_category_enc", "occupation_enc"]
-    df = pd.get_dummies(df, columns=categorical_vars, drop_first=True)
+    # Gasto, cantidad y participación por categoría en los últimos 30/90/365 días,
+    # en el mismo orden de clientes que final_dataset (0 si no tuvo transacciones)
+    with instrument("features.windows", rows_in=len(transactions_df)) as span:
+        windows = window_features(transactions_df, reference_date)
+        windows = user_ids.to_frame().merge(windows, on="user_id", how="left").fillna(0)
+        windows = windows.astype({col: "int64" for col in windows.columns if col.startswith("txn_count_")})
+        span.update(rows_out=len(windows))
 
 
-    drop_cols = ["user_id", "favorite_category", "occupation"]
-    df.drop(columns=[col for col in drop_cols if col in df.columns], inplace=True)
+    # Top de categorías, ocupaciones frecuentes, dummies y escalado quedan
+    # guardados en el transformer para poder puntuar clientes nuevos
+    transformer = FeatureTransformer(top_categories=5, occupation_threshold=5)
+    df = transformer.fit_transform(df, reference_date=reference_date, include_target=True)
 
+    os.makedirs(os.path.dirname(TRANSFORMER_PATH), exist_ok=True)
+    joblib.dump(transformer, TRANSFORMER_PATH)
+    print(f"✅ Transformer de features guardado en {TRANSFORMER_PATH}")
 
-    num_cols = [
-        "age", "total_spent", "avg_spent", "txn_count", "product_count",
-        "recency", "frequency", "monetary", "spending_volatility",
-        "age_x_product_count", "avg_spent_x_frequency"
-    ]
 
-    scaler = StandardScaler()
-    df[num_cols] = scaler.fit_transform(df[num_cols])
+    current_span().update(rows_in=len(transactions_df), rows_out=len(df))
+    output_path = save_dataset(downcast_floats(df), "data/processed/final_dataset.parquet")
+    print(f"✅ Dataset para modelado guardado en {output_path}")
 
+    # user_id fila a fila con final_dataset (el transformer lo descarta como feature)
+    save_dataset(user_ids.to_frame(), IDS_PATH)
+    print(f"✅ Identificadores de clientes guardados en {IDS_PATH}")
 
-    os.makedirs("data/processed", exist_ok=True)
-    df.to_csv("data/processed/final_dataset.csv", index=False)
-    print("✅ Dataset para modelado guardado en data/processed/final_dataset.csv")
+    save_dataset(downcast_floats(windows), WINDOW_FEATURES_PATH)
+    print(f"✅ Features por ventana ({windows.shape[1] - 1} columnas) guardadas en {WINDOW_FEATURES_PATH}")
 
 if __name__ == "__main__":
     run_feature_engineering()
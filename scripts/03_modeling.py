@@ -1,20 +1,32 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, StratifiedKFold, cross_val_score, RandomizedSearchCV
+from sklearn.model_selection import train_test_split, StratifiedKFold, RandomizedSearchCV
 from sklearn.metrics import classification_report, roc_auc_score, RocCurveDisplay
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from xgboost import XGBClassifier
 from imblearn.over_sampling import SMOTE
-import shap
 import matplotlib.pyplot as plt
 import joblib
-import os
+import time
 from scipy.stats import uniform, randint
+from src.storage import load_dataset
+from src.tuning import successive_halving_search
+from src.model_comparison import compare_models
+from src.shap_store import get_shap_store
+from src.instrumentation import instrument
+from src.model_registry import register_model
 
-def run_modeling():
+DATA_PATH = "data/processed/final_dataset.parquet"
+
+@instrument("stage:modeling", profile=True)
+def run_modeling(tuning="random", time_budget=None, promote=True):
    
-    df = pd.read_csv("data/processed/final_dataset.csv")
+    df = load_dataset(DATA_PATH)
     X = df.drop("has_insurance", axis=1)
     y = df["has_insurance"]
 
@@ -27,8 +39,10 @@ def run_modeling():
     balance_ratio = y_train.value_counts()[0] / y_train.value_counts()[1]
     print(f"Ratio Clase 0 / Clase 1: {balance_ratio:.2f}")
 
-    smote = SMOTE(random_state=42)
-    X_train_res, y_train_res = smote.fit_resample(X_train, y_train)
+    with instrument("modeling.smote", rows_in=len(X_train)) as span:
+        smote = SMOTE(random_state=42)
+        X_train_res, y_train_res = smote.fit_resample(X_train, y_train)
+        span.update(rows_out=len(X_train_res))
 
     models = {
         "Logistic Regression": LogisticRegression(max_iter=1000, class_weight='balanced'),
@@ -42,14 +56,20 @@ def run_modeling():
     os.makedirs("outputs/models", exist_ok=True)
     os.makedirs("outputs/figures", exist_ok=True)
 
+    # Todos los modelos y folds en paralelo sobre una copia memmapeada de los datos;
+    # las predicciones por fold quedan cacheadas para las próximas ejecuciones
+    with instrument("modeling.compare_models", rows_in=len(X_train_res)):
+        comparison = compare_models(models, X_train_res, y_train_res, X_test, cv_strategy)
+
     for name, model in models.items():
         print(f"Evaluando modelo: {name}")
-        auc_scores = cross_val_score(model, X_train_res, y_train_res, cv=cv_strategy, scoring='roc_auc', n_jobs=-1)
-        print(f"AUC promedio (CV): {np.mean(auc_scores):.4f} ± {np.std(auc_scores):.4f}")
+        cv_result = comparison[name]
+        print(f"AUC promedio (CV): {cv_result['cv_auc']:.4f} ± {cv_result['cv_auc_std']:.4f}"
+              f" ({cv_result['cached_folds']}/{len(cv_result['fold_auc'])} folds desde caché)")
 
-        model.fit(X_train_res, y_train_res)
-        y_pred = model.predict(X_test)
-        y_proba = model.predict_proba(X_test)[:, 1]
+        # Test: promedio de las probabilidades de los modelos de cada fold
+        y_proba = cv_result["test_proba"]
+        y_pred = (y_proba >= 0.5).astype(int)
 
         print(f"Reporte de clasificación (Test) para {name}:")
         print(classification_report(y_test, y_pred))
@@ -61,7 +81,7 @@ def run_modeling():
         plt.savefig(f"outputs/figures/roc_{name.replace(' ', '_').lower()}.png")
         plt.close()
 
-        results[name] = {"model": model, "auc": final_auc}
+        results[name] = {"cv_auc": cv_result["cv_auc"], "auc": final_auc}
 
     print("Ajuste de hiperparámetros para XGBoost:")
     param_dist = {
@@ -74,22 +94,64 @@ def run_modeling():
         'scale_pos_weight': [balance_ratio]
     }
 
-    random_search = RandomizedSearchCV(
-        XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=42),
-        param_distributions=param_dist,
-        n_iter=50,
-        scoring='roc_auc',
-        cv=cv_strategy,
-        n_jobs=-1,
-        random_state=42,
-        verbose=1
-    )
-
-    random_search.fit(X_train_res, y_train_res)
+    search_results = {}
+
+    if tuning in ("random", "compare"):
+        random_search = RandomizedSearchCV(
+            XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=42),
+            param_distributions=param_dist,
+            n_iter=50,
+            scoring='roc_auc',
+            cv=cv_strategy,
+            n_jobs=-1,
+            random_state=42,
+            verbose=1
+        )
+
+        start = time.perf_counter()
+        with instrument("modeling.random_search", rows_in=len(X_train_res)):
+            random_search.fit(X_train_res, y_train_res)
+        search_results["random"] = {
+            "model": random_search.best_estimator_,
+            "params": random_search.best_params_,
+            "cv_auc": random_search.best_score_,
+            "elapsed": time.perf_counter() - start,
+        }
+
+    if tuning in ("halving", "compare"):
+        # Successive halving con early stopping y matrices de folds reutilizadas
+        start = time.perf_counter()
+        with instrument("modeling.halving_search", rows_in=len(X_train_res)):
+            halving = successive_halving_search(
+                X_train_res, y_train_res, param_dist, cv_strategy,
+                n_candidates=50, max_rounds=500, time_budget=time_budget, random_state=42
+            )
+        halving_xgb = XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=42,
+                                    **halving["best_params"])
+        halving_xgb.fit(X_train_res, y_train_res)
+        search_results["halving"] = {
+            "model": halving_xgb,
+            "params": halving["best_params"],
+            "cv_auc": halving["best_score"],
+            "elapsed": time.perf_counter() - start,
+        }
+
+    for mode, result in search_results.items():
+        result["test_auc"] = roc_auc_score(y_test, result["model"].predict_proba(X_test)[:, 1])
+        print(f"[{mode}] {result['elapsed']:.1f}s | AUC CV: {result['cv_auc']:.4f} | AUC Test: {result['test_auc']:.4f}")
+
+    if tuning == "compare":
+        random_res, halving_res = search_results["random"], search_results["halving"]
+        saved = random_res["elapsed"] - halving_res["elapsed"]
+        print(f"⏱️  Tiempo ahorrado con successive halving: {saved:.1f}s "
+              f"({saved / random_res['elapsed']:.0%})")
+        print(f"Diferencia AUC Test (halving - random): {halving_res['test_auc'] - random_res['test_auc']:+.4f}")
+
+    selected = search_results["halving" if tuning == "halving" else "random"]
     print("Mejores hiperparámetros encontrados:")
-    print(random_search.best_params_)
+    print(selected["params"])
 
-    best_xgb = random_search.best_estimator_
+    best_xgb = selected["model"]
 
     y_pred_best = best_xgb.predict(X_test)
     y_proba_best = best_xgb.predict_proba(X_test)[:, 1]
@@ -101,9 +163,21 @@ def run_modeling():
     joblib.dump(best_xgb, "outputs/models/xgboost_tuned_model.pkl")
     print("Modelo XGBoost ajustado guardado.")
 
+    # Versión en el registro (booster nativo + metadata); se promueve a "current" salvo --no-promote
+    version = register_model(
+        best_xgb, data_path=DATA_PATH,
+        metrics={"cv_auc": selected["cv_auc"], "test_auc": final_auc_best},
+        params=selected["params"], extra={"tuning": "halving" if tuning == "halving" else "random"},
+        promote=promote,
+    )
+    print(f"📦 Modelo registrado como {version}" + (" (promovido a current)" if promote else ""))
+
+    # shap (con numba e IPython) sólo hace falta para los gráficos finales: ~1.5s menos al importar el script
+    import shap
+
     print("Calculando SHAP values para XGBoost ajustado...")
-    explainer = shap.TreeExplainer(best_xgb)
-    shap_values = explainer.shap_values(X_test)
+    with instrument("modeling.shap", rows_in=len(X_test)):
+        shap_values = np.asarray(get_shap_store(best_xgb, X_test).values)
 
     plt.figure()
     shap.summary_plot(shap_values, X_test, plot_type="bar", show=False)
@@ -119,4 +193,13 @@ def run_modeling():
     print("Gráficos SHAP guardados.")
 
 if __name__ == "__main__":
-    run_modeling()
+    import argparse
+    parser = argparse.ArgumentParser(description="Entrenamiento y ajuste de modelos")
+    parser.add_argument("--tuning", choices=["random", "halving", "compare"], default="random",
+                        help="random: RandomizedSearchCV original | halving: successive halving con early stopping "
+                             "| compare: ambos, reportando tiempo ahorrado y diferencia de AUC")
+    parser.add_argument("--time-budget", type=float, default=None, help="Presupuesto en segundos para halving")
+    parser.add_argument("--no-promote", action="store_true",
+                        help="Registrar la versión sin promoverla a current")
+    args = parser.parse_args()
+    run_modeling(tuning=args.tuning, time_budget=args.time_budget, promote=not args.no_promote)
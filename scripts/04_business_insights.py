@@ -1,22 +1,27 @@
 # scripts/04_business_insights.py
 
-import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
+import sys
 import os
-import shap
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+from src.storage import load_dataset, save_dataset
+from src.shap_store import get_shap_store
+from src.instrumentation import instrument
+from src.model_registry import load_model
+from src.figures import render_figures, bar_chart, sample_bar_chart, mean_abs_bar, downsample
 
+@instrument("stage:insights", profile=True)
 def run_business_insights():
     # Cargar dataset final para insights
-    df = pd.read_csv("data/processed/final_dataset.csv")
+    df = load_dataset("data/processed/final_dataset.parquet")
 
     # Separar features y target
     X = df.drop(columns=['has_insurance'])
     y = df['has_insurance']
 
-    # Cargar modelo ajustado
-    model = joblib.load("outputs/models/xgboost_tuned_model.pkl")
+    # Cargar modelo ajustado (versión current del registro)
+    model = load_model()
 
     # Predecir probabilidades
     df['propensity_score'] = model.predict_proba(X)[:, 1]
@@ -26,53 +31,54 @@ def run_business_insights():
     labels = ['Baja', 'Media', 'Alta']
     df['propensity_segment'] = pd.cut(df['propensity_score'], bins=bins, labels=labels, include_lowest=True)
 
-    os.makedirs("reports/insights", exist_ok=True)
-
-    # Visualización 1: Distribución de segmentos
-    plt.figure(figsize=(8, 5))
-    sns.countplot(data=df, x='propensity_segment', palette='Blues')
-    plt.title('Distribución de Clientes por Segmento de Propensión')
-    plt.xlabel('Segmento de Propensión')
-    plt.ylabel('Número de Clientes')
-    plt.savefig("reports/insights/distribucion_segmentos.png")
-    plt.close()
-
-    # Visualización 2: Edad promedio por segmento
-    plt.figure(figsize=(8, 5))
-    sns.barplot(data=df, x='propensity_segment', y='age', palette='Blues')
-    plt.title('Edad Promedio por Segmento de Propensión')
-    plt.xlabel('Segmento de Propensión')
-    plt.ylabel('Edad Promedio (estandarizada)')
-    plt.savefig("reports/insights/edad_promedio_segmentos.png")
-    plt.close()
+    # Scores persistidos para el reporte (evita volver a puntuar a todos los clientes)
+    save_dataset(df[['propensity_score', 'propensity_segment']], "data/processed/propensity_scores.parquet")
 
-    # Visualización 3: Gasto promedio mensual por segmento
-    plt.figure(figsize=(8, 5))
-    sns.barplot(data=df, x='propensity_segment', y='avg_spent', palette='Blues')
-    plt.title('Gasto Promedio Mensual por Segmento de Propensión')
-    plt.xlabel('Segmento de Propensión')
-    plt.ylabel('Gasto Promedio Mensual (estandarizado)')
-    plt.savefig("reports/insights/gasto_promedio_segmentos.png")
-    plt.close()
-
-    # Visualización 4: Número promedio de productos contratados por segmento
-    plt.figure(figsize=(8, 5))
-    sns.barplot(data=df, x='propensity_segment', y='product_count', palette='Blues')
-    plt.title('Número Promedio de Productos Contratados por Segmento')
-    plt.xlabel('Segmento de Propensión')
-    plt.ylabel('Número Promedio de Productos (estandarizado)')
-    plt.savefig("reports/insights/productos_promedio_segmentos.png")
-    plt.close()
+    os.makedirs("reports/insights", exist_ok=True)
 
-    # Análisis SHAP (para entender qué variables impulsan la predicción)
-    explainer = shap.Explainer(model)
-    shap_values = explainer(X)
+    # Análisis SHAP (para entender qué variables impulsan la predicción);
+    # se calcula por bloques y queda guardado para el dashboard
+    with instrument("insights.shap", rows_in=len(X)):
+        shap_store = get_shap_store(model, X)
 
-    # SHAP summary plot
-    shap.summary_plot(shap_values, X, plot_type='bar', show=False)
-    plt.tight_layout()
-    plt.savefig("reports/insights/shap_summary.png")
-    plt.close()
+    # Figuras: conteos y muestra acotada por segmento, renderizadas en paralelo
+    # (sólo se vuelven a dibujar las que cambiaron)
+    segments = downsample(df[['propensity_segment', 'age', 'avg_spent', 'product_count']])
+    segment_means = [
+        ('age', 'Edad Promedio por Segmento de Propensión', 'Edad Promedio (estandarizada)',
+         "reports/insights/edad_promedio_segmentos.png"),
+        ('avg_spent', 'Gasto Promedio Mensual por Segmento de Propensión',
+         'Gasto Promedio Mensual (estandarizado)', "reports/insights/gasto_promedio_segmentos.png"),
+        ('product_count', 'Número Promedio de Productos Contratados por Segmento',
+         'Número Promedio de Productos (estandarizado)', "reports/insights/productos_promedio_segmentos.png"),
+    ]
+    specs = [
+        {
+            "output": "reports/insights/distribucion_segmentos.png",
+            "render": bar_chart,
+            "data": df['propensity_segment'].value_counts().reindex(labels),
+            "options": {"figsize": (8, 5), "palette": 'Blues',
+                        "title": 'Distribución de Clientes por Segmento de Propensión',
+                        "xlabel": 'Segmento de Propensión', "ylabel": 'Número de Clientes'},
+            "tight_layout": False,
+        },
+    ]
+    for col, title, ylabel, output in segment_means:
+        specs.append({
+            "output": output,
+            "render": sample_bar_chart,
+            "data": segments[['propensity_segment', col]],
+            "options": {"x": 'propensity_segment', "y": col, "order": labels, "palette": 'Blues',
+                        "title": title, "xlabel": 'Segmento de Propensión', "ylabel": ylabel},
+            "tight_layout": False,
+        })
+    # SHAP summary plot (importancia media |SHAP|, desde los agregados del store)
+    specs.append({
+        "output": "reports/insights/shap_summary.png",
+        "render": mean_abs_bar,
+        "data": shap_store.mean_abs,
+    })
+    render_figures(specs)
 
     print("✅ Insights de negocio generados y guardados en 'reports/insights/'")
 
@@ -0,0 +1,42 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from src.instrumentation import instrument, current_span
+from src.batch_scoring import score_dataset, FEATURES_PATH, IDS_PATH, OUTPUT_PATH, CHUNK_SIZE
+from src.model_registry import CURRENT, REGISTRY_DIR
+
+
+@instrument("stage:scoring", profile=True)
+def run_batch_scoring(features_path=FEATURES_PATH, ids_path=IDS_PATH, model_version=CURRENT,
+                      output_path=OUTPUT_PATH, chunk_size=CHUNK_SIZE, workers=None, threads_per_worker=1,
+                      backend="booster", registry_dir=REGISTRY_DIR):
+    print(f"🔄 Puntuando clientes de {features_path} en bloques de {chunk_size:,} filas...")
+    metrics = score_dataset(features_path, ids_path, model_version, output_path, chunk_size=chunk_size,
+                            max_workers=workers, threads_per_worker=threads_per_worker, backend=backend,
+                            registry_dir=registry_dir)
+    print(f"✅ {metrics['rows']:,} clientes puntuados en {metrics['elapsed_s']:.2f}s "
+          f"({metrics['rows_per_s']:,.0f} filas/s, {metrics['chunks']} bloques, "
+          f"{metrics['workers']} workers x {metrics['threads_per_worker']} threads, backend {backend}, "
+          f"modelo {metrics['model_version']})")
+    print(f"✅ Scores guardados en {output_path}")
+    current_span().update(rows_in=metrics["rows"], rows_out=metrics["rows"])
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scoring por lotes: user_id, score y segmento de propensión")
+    parser.add_argument("--features", default=FEATURES_PATH)
+    parser.add_argument("--ids", default=IDS_PATH)
+    parser.add_argument("--model-version", default=CURRENT, help="Versión del registro (p. ej. v0003)")
+    parser.add_argument("--registry-dir", default=REGISTRY_DIR)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--backend", choices=["booster", "numpy"], default="booster",
+                        help="booster: inplace_predict de XGBoost; numpy: árboles compilados a NumPy")
+    args = parser.parse_args()
+    run_batch_scoring(args.features, args.ids, args.model_version, args.output, args.chunk_size,
+                      args.workers, args.threads_per_worker, args.backend, args.registry_dir)
@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from src.inference import InferenceEngine, MODEL_PATH
+from src.storage import load_dataset
+
+# Latencia de inferencia por tamaño de lote: predict_proba sobre DataFrame (camino
+# actual) contra el motor de src/inference.py con el booster (inplace_predict) y
+# con los árboles compilados a NumPy. Las filas se muestrean con reemplazo de
+# final_dataset para llegar a lotes de hasta 10^6.
+
+FEATURES_PATH = "data/processed/final_dataset.parquet"
+RESULTS_PATH = "outputs/benchmarks/inference.csv"
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def _time_calls(func, X, min_seconds):
+    # Repite hasta acumular min_seconds (al menos 3 llamadas) y devuelve la mediana
+    func(X)
+    latencies, total = [], 0.0
+    while len(latencies) < 3 or total < min_seconds:
+        start = time.perf_counter()
+        func(X)
+        latencies.append(time.perf_counter() - start)
+        total += latencies[-1]
+    return float(np.median(latencies)), float(np.percentile(latencies, 99))
+
+
+def run_benchmark(batch_sizes=BATCH_SIZES, model_path=MODEL_PATH, features_path=FEATURES_PATH,
+                  n_threads=None, min_seconds=0.5, output_path=RESULTS_PATH, seed=42):
+    df = load_dataset(features_path).drop(columns=["has_insurance"])
+    booster = InferenceEngine.load(model_path, n_threads=n_threads)
+    compiled = InferenceEngine(booster.model, n_threads=n_threads, backend="numpy")
+    model = booster.model
+    rng = np.random.default_rng(seed)
+
+    rows = []
+    print(f"⚡ Inferencia con {booster.n_threads} threads (mediana por llamada)")
+    print(f"   {'lote':>9}  {'predict_proba':>14}  {'booster':>12}  {'numpy':>12}  {'máx |Δ|':>9}")
+    for batch_size in batch_sizes:
+        sample = df.iloc[rng.integers(0, len(df), batch_size)].reset_index(drop=True)
+        X = booster.as_matrix(sample)
+        reference = model.predict_proba(sample)[:, 1]
+        max_diff = max(float(np.abs(booster.predict(X) - reference).max()),
+                       float(np.abs(compiled.predict(X) - reference).max()))
+
+        timings = {
+            "predict_proba": _time_calls(lambda data: model.predict_proba(data)[:, 1], sample, min_seconds),
+            "booster": _time_calls(booster.predict, X, min_seconds),
+            "numpy": _time_calls(compiled.predict, X, min_seconds),
+        }
+        for method, (p50, p99) in timings.items():
+            rows.append({"batch_size": batch_size, "method": method, "p50_ms": p50 * 1000, "p99_ms": p99 * 1000,
+                         "rows_per_s": batch_size / p50, "threads": booster.n_threads, "max_abs_diff": max_diff})
+        cells = "  ".join(f"{timings[m][0] * 1000:>10.3f}ms" for m in ("predict_proba", "booster", "numpy"))
+        print(f"   {batch_size:>9,}  {cells:>42}  {max_diff:>9.1e}")
+
+    results = pd.DataFrame(rows)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    results.to_csv(output_path, index=False)
+    print(f"✅ Resultados guardados en {output_path}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de latencia de inferencia por tamaño de lote")
+    parser.add_argument("--batch-sizes", type=float, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--features", default=FEATURES_PATH)
+    parser.add_argument("--threads", type=int, default=None, help="Threads del booster (por defecto, uno por CPU)")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Tiempo mínimo medido por lote y método")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+    run_benchmark([int(n) for n in args.batch_sizes], args.model, args.features, args.threads,
+                  args.min_seconds, args.output)
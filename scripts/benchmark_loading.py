@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import tempfile
+from src.data_preparation import load_datasets
+from src.schema import memory_usage_mb
+from src.benchmarking import measure, run_isolated
+from src.synthetic import generate_synthetic_data
+
+# Benchmark de carga: lectura legacy (todo como object/float64/int64) contra la
+# lectura por esquema (columnas podadas, categóricos, user_id codificado, float32)
+# sobre datos sintéticos grandes. Cada variante corre en su propio proceso para
+# medir el pico de memoria (RSS) sin interferencias.
+
+
+def _measure(paths, compact):
+    with measure() as record:
+        frames = load_datasets(*paths, compact=compact)
+    record["frames_mb"] = sum(memory_usage_mb(df) for df in frames)
+    return record
+
+
+def run_benchmark(n_transactions=2_000_000, n_users=100_000, seed=42):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"🔄 Generando {n_transactions:,} transacciones sintéticas para {n_users:,} usuarios...")
+        paths = generate_synthetic_data(tmp_dir, n_transactions, n_users, seed, verbose=False)
+        results = {"legacy": run_isolated(_measure, paths, False), "esquema": run_isolated(_measure, paths, True)}
+
+    print(f"\n{'Lectura':<10}{'Tiempo (s)':>12}{'DataFrames (MB)':>18}{'Pico RSS (MB)':>16}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['seconds']:>12.2f}{r['frames_mb']:>18.1f}{r['peak_rss_mb']:>16.1f}")
+    legacy, compact = results["legacy"], results["esquema"]
+    print(f"\n✅ Memoria de DataFrames: -{1 - compact['frames_mb'] / legacy['frames_mb']:.0%}, "
+          f"pico RSS: -{1 - compact['peak_rss_mb'] / legacy['peak_rss_mb']:.0%}, "
+          f"tiempo: x{legacy['seconds'] / compact['seconds']:.1f} más rápido")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de memoria/tiempo de la carga por esquema")
+    parser.add_argument("--transactions", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_benchmark(args.transactions, args.users, args.seed)
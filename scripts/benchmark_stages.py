@@ -0,0 +1,204 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import joblib
+import pandas as pd
+from src.benchmarking import measure, run_isolated, append_results, load_results, previous_result, RESULTS_PATH
+from src.synthetic import generate_synthetic_data
+
+# Benchmark por etapa sobre datos sintéticos: cada etapa corre en un proceso
+# nuevo, lee lo que dejó la anterior en el directorio de trabajo y mide sólo su
+# propio cuerpo (tiempo, CPU, pico de RSS y filas). Los resultados se agregan a
+# outputs/benchmarks/stages.jsonl y se comparan con la última corrida equivalente.
+
+BENCH_DIR = "outputs/cache/benchmarks"
+STAGE_NAMES = ["load", "merge", "features", "windows", "sparse", "training", "scoring", "shap", "report"]
+
+
+def _paths(data_dir):
+    return [os.path.join(data_dir, f"{name}.csv") for name in ("demographics", "products", "transactions")]
+
+
+def stage_load(data_dir, work_dir):
+    from src.data_preparation import load_datasets
+
+    with measure() as record:
+        frames = load_datasets(*_paths(data_dir), compact=True)
+    record["rows_in"] = record["rows_out"] = sum(len(df) for df in frames)
+    return record
+
+
+def stage_merge(data_dir, work_dir):
+    from src.data_preparation import load_datasets, preprocess_transactions, merge_datasets
+    from src.feature_transformer import product_flag_columns
+    from src.storage import save_dataset
+
+    demographics, products, transactions = load_datasets(*_paths(data_dir), compact=True)
+    with measure() as record:
+        transactions = preprocess_transactions(transactions)
+        df = merge_datasets(demographics, transactions, products)
+        df["product_count_eda"] = df[product_flag_columns(df)].sum(axis=1)
+    record.update(rows_in=len(transactions), rows_out=len(df))
+    save_dataset(df, os.path.join(work_dir, "clientes_unificados.parquet"))
+    return record
+
+
+def stage_features(data_dir, work_dir):
+    from src.feature_transformer import FeatureTransformer, add_transaction_features
+    from src.schema import read_table, downcast_floats
+    from src.storage import load_dataset, save_dataset
+
+    df = load_dataset(os.path.join(work_dir, "clientes_unificados.parquet"))
+    transactions = read_table(_paths(data_dir)[2], "transactions")
+    with measure() as record:
+        reference_date = transactions["date"].max() + pd.Timedelta(days=1)
+        df = add_transaction_features(df, transactions, reference_date)
+        user_ids = df["user_id"].reset_index(drop=True)
+        features = FeatureTransformer().fit_transform(df, reference_date=reference_date, include_target=True)
+    record.update(rows_in=len(transactions), rows_out=len(features))
+    save_dataset(downcast_floats(features), os.path.join(work_dir, "final_dataset.parquet"))
+    save_dataset(user_ids.to_frame(), os.path.join(work_dir, "customer_ids.parquet"))
+    return record
+
+
+def stage_windows(data_dir, work_dir):
+    from src.schema import read_table
+    from src.window_features import window_features
+
+    transactions = read_table(_paths(data_dir)[2], "transactions")
+    with measure() as record:
+        features = window_features(transactions)
+    record.update(rows_in=len(transactions), rows_out=len(features))
+    return record
+
+
+def stage_sparse(data_dir, work_dir):
+    from src.data_preparation import load_datasets
+    from src.sparse_features import SparseFeatureAssembler
+
+    demographics, products, transactions = load_datasets(*_paths(data_dir), compact=True)
+    with measure() as record:
+        X = SparseFeatureAssembler().fit_transform(demographics, products, transactions)
+    record.update(rows_in=len(transactions), rows_out=X.shape[0], nnz=int(X.nnz))
+    return record
+
+
+def stage_training(data_dir, work_dir):
+    from imblearn.over_sampling import SMOTE
+    from scipy.stats import uniform, randint
+    from sklearn.model_selection import train_test_split, StratifiedKFold
+    from xgboost import XGBClassifier
+    from src.model_registry import register_model
+    from src.storage import load_dataset, save_dataset
+    from src.tuning import successive_halving_search
+
+    df = load_dataset(os.path.join(work_dir, "final_dataset.parquet"))
+    X, y = df.drop(columns=["has_insurance"]), df["has_insurance"]
+    with measure() as record:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+        X_train_res, y_train_res = SMOTE(random_state=42).fit_resample(X_train, y_train)
+        # Búsqueda acotada: mide el costo de SMOTE + tuning + ajuste final, no la calidad
+        param_dist = {
+            "learning_rate": uniform(0.01, 0.3),
+            "max_depth": randint(3, 10),
+            "subsample": uniform(0.6, 0.4),
+            "colsample_bytree": uniform(0.6, 0.4),
+        }
+        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+        search = successive_halving_search(X_train_res, y_train_res, param_dist, cv, n_candidates=9,
+                                           min_rounds=10, max_rounds=90, verbose=False)
+        model = XGBClassifier(eval_metric="logloss", random_state=42, **search["best_params"])
+        model.fit(X_train_res, y_train_res)
+    record.update(rows_in=len(X_train_res), rows_out=len(X_test))
+    joblib.dump(model, os.path.join(work_dir, "model.pkl"))
+    register_model(model, registry_dir=os.path.join(work_dir, "registry"), promote=True)
+    save_dataset(X_test, os.path.join(work_dir, "X_test.parquet"))
+    return record
+
+
+def stage_scoring(data_dir, work_dir):
+    from src.batch_scoring import score_dataset
+
+    with measure() as record:
+        metrics = score_dataset(
+            os.path.join(work_dir, "final_dataset.parquet"), os.path.join(work_dir, "customer_ids.parquet"),
+            output_path=os.path.join(work_dir, "customer_scores.parquet"),
+            registry_dir=os.path.join(work_dir, "registry"), verbose=False,
+        )
+    record.update(rows_in=metrics["rows"], rows_out=metrics["rows"])
+    return record
+
+
+def stage_shap(data_dir, work_dir):
+    from src.shap_store import compute_shap_store
+    from src.storage import load_dataset
+
+    model = joblib.load(os.path.join(work_dir, "model.pkl"))
+    X = load_dataset(os.path.join(work_dir, "final_dataset.parquet")).drop(columns=["has_insurance"])
+    with measure() as record:
+        store = compute_shap_store(model, X, os.path.join(work_dir, "shap"))
+    record.update(rows_in=len(X), rows_out=len(store))
+    return record
+
+
+def stage_report(data_dir, work_dir):
+    from reports.report_generator import generate_pdf_report
+
+    scores_path = os.path.join(work_dir, "propensity_scores.parquet")
+    if os.path.exists(scores_path):
+        os.remove(scores_path)
+    with measure() as record:
+        generate_pdf_report(os.path.join(work_dir, "final_dataset.parquet"),
+                            output_path=os.path.join(work_dir, "final_report.pdf"), scores_path=scores_path,
+                            registry_dir=os.path.join(work_dir, "registry"))
+    record["rows_in"] = record["rows_out"] = len(pd.read_parquet(scores_path))
+    return record
+
+
+STAGES = {name: globals()[f"stage_{name}"] for name in STAGE_NAMES}
+
+
+def prepare_data(n_transactions, seed):
+    data_dir = os.path.join(BENCH_DIR, f"{n_transactions}_{seed}")
+    if not os.path.exists(os.path.join(data_dir, "synthetic.json")):
+        print(f"🔄 Generando {n_transactions:,} transacciones sintéticas...")
+        generate_synthetic_data(data_dir, n_transactions, seed=seed, verbose=False)
+    work_dir = os.path.join(data_dir, "work")
+    os.makedirs(work_dir, exist_ok=True)
+    return data_dir, work_dir
+
+
+def run_benchmarks(sizes, stages=STAGE_NAMES, seed=42, results_path=RESULTS_PATH):
+    history = load_results(results_path)
+    records = []
+    for n_transactions in sizes:
+        data_dir, work_dir = prepare_data(n_transactions, seed)
+        print(f"\n📏 {n_transactions:,} transacciones")
+        for name in stages:
+            record = run_isolated(STAGES[name], data_dir, work_dir)
+            record.update(stage=name, n_transactions=n_transactions, seed=seed)
+            records.append(record)
+
+            previous = previous_result(history, stage=name, n_transactions=n_transactions, seed=seed)
+            delta = ""
+            if previous and previous["seconds"]:
+                reference = previous["revision"] or previous["timestamp"]
+                delta = f"  ({record['seconds'] / previous['seconds'] - 1:+.0%} vs {reference})"
+            print(f"  {name:<10} {record['seconds']:8.2f}s  CPU {record['cpu_seconds']:8.2f}s  "
+                  f"RSS {record['peak_rss_mb']:8.1f} MB  filas {record['rows_in']:>12,}{delta}")
+
+    append_results(records, results_path)
+    print(f"\n✅ Resultados agregados a {results_path}")
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark por etapa sobre datos sintéticos")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e4, 1e5], help="Transacciones por corrida")
+    parser.add_argument("--stages", nargs="+", choices=STAGE_NAMES, default=STAGE_NAMES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--results", default=RESULTS_PATH)
+    args = parser.parse_args()
+    run_benchmarks([int(n) for n in args.sizes], args.stages, args.seed, args.results)
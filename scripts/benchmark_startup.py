@@ -0,0 +1,127 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import subprocess
+import time
+import numpy as np
+from src.benchmarking import append_results, load_results, previous_result
+from src.pipeline import ROOT_DIR, STAGES
+from src.warm_worker import submit, worker_running
+
+# Costo de arranque: tiempo de importar cada módulo de etapa en un intérprete
+# nuevo (lo que paga cada `python scripts/...`) y tiempo de un trabajo de etapa
+# completo en frío (proceso nuevo) contra el mismo trabajo enviado al worker
+# persistente ya caliente. Con --root se miden los imports de otra copia del repo
+# (p. ej. un `git worktree` de la revisión anterior) para comparar antes/después.
+
+RESULTS_PATH = "outputs/benchmarks/startup.jsonl"
+SOCKET_PATH = "outputs/cache/benchmarks/startup_worker.sock"
+STAGE_MODULES = sorted({stage["target"].split(":")[0] for stage in STAGES})
+JOBS = ["scoring", "insights", "report"]
+
+IMPORT_CODE = """
+import sys, time
+sys.path.insert(0, ".")
+start = time.perf_counter()
+import importlib
+importlib.import_module(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+COLD_JOB_CODE = """
+import sys
+sys.path.insert(0, ".")
+from src.pipeline import STAGES, run_pipeline
+run_pipeline([s for s in STAGES if s["name"] == sys.argv[1]], force=True, max_workers=1)
+"""
+
+
+def _run(code, arg, root):
+    env = dict(os.environ, MPLBACKEND="Agg")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code, arg], cwd=root, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{arg} falló:\n{result.stderr[-2000:]}")
+    return wall, result.stdout
+
+
+def import_times(modules=STAGE_MODULES, root=ROOT_DIR, repeats=3):
+    records = []
+    for module in modules:
+        runs = [_run(IMPORT_CODE, module, root) for _ in range(repeats)]
+        records.append({
+            "kind": "import", "target": module,
+            "seconds": float(np.median([float(out.strip().splitlines()[-1]) for _, out in runs])),
+            "wall_seconds": float(np.median([wall for wall, _ in runs])),
+        })
+    return records
+
+
+def job_times(jobs=JOBS, root=ROOT_DIR, repeats=3, socket_path=SOCKET_PATH):
+    records = []
+    for job in jobs:
+        walls = [_run(COLD_JOB_CODE, job, root)[0] for _ in range(repeats)]
+        records.append({"kind": "job", "target": job, "mode": "frío", "seconds": float(np.median(walls))})
+
+    # Ruta absoluta: el worker resuelve las relativas desde su propia raíz
+    socket_path = os.path.join(root, socket_path)
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, os.path.join("scripts", "warm_worker.py"), "--socket", socket_path,
+                               "serve"], cwd=root, stdout=subprocess.DEVNULL)
+    try:
+        submit({"job": "ping"}, socket_path, timeout=300)
+        records.append({"kind": "worker", "target": "arranque", "mode": "caliente",
+                        "seconds": time.perf_counter() - start})
+        for job in jobs:
+            walls = []
+            for _ in range(repeats + 1):
+                start = time.perf_counter()
+                submit({"job": "stage", "names": [job], "force": True}, socket_path)
+                walls.append(time.perf_counter() - start)
+            # El primer envío también importa el módulo de la etapa
+            records.append({"kind": "job", "target": job, "mode": "caliente (1º)", "seconds": walls[0]})
+            records.append({"kind": "job", "target": job, "mode": "caliente", "seconds": float(np.median(walls[1:]))})
+    finally:
+        if worker_running(socket_path):
+            submit({"job": "shutdown"}, socket_path)
+        server.wait(timeout=60)
+    return records
+
+
+def run_benchmark(root=ROOT_DIR, repeats=3, jobs=JOBS, results_path=RESULTS_PATH):
+    history = load_results(results_path)
+    print(f"⏱️  Import de módulos de etapa en un intérprete nuevo ({root})")
+    records = import_times(root=root, repeats=repeats)
+    if jobs:
+        print(f"⏱️  Etapas completas: proceso nuevo vs worker caliente ({', '.join(jobs)})")
+        records += job_times(jobs, root, repeats)
+
+    for record in records:
+        record["root"] = str(root)
+        key = {k: record.get(k) for k in ("kind", "target", "mode")}
+        previous = previous_result(history, **key)
+        delta = ""
+        if previous and previous["seconds"]:
+            reference = previous["revision"] or previous["timestamp"]
+            delta = f"  ({record['seconds'] / previous['seconds'] - 1:+.0%} vs {reference})"
+        label = f"{record['kind']}:{record['target']}" + (f" [{record['mode']}]" if record.get("mode") else "")
+        wall = f"  (proceso {record['wall_seconds']:.2f}s)" if "wall_seconds" in record else ""
+        print(f"  {label:<48} {record['seconds']:7.2f}s{wall}{delta}")
+
+    append_results(records, results_path)
+    print(f"\n✅ Resultados agregados a {results_path}")
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de arranque: imports y worker caliente")
+    parser.add_argument("--root", default=str(ROOT_DIR), help="Copia del repo a medir (imports y etapas)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--jobs", nargs="*", choices=[s["name"] for s in STAGES], default=JOBS,
+                        help="Etapas a comparar en frío y en el worker (vacío: sólo imports)")
+    parser.add_argument("--results", default=RESULTS_PATH)
+    args = parser.parse_args()
+    run_benchmark(args.root, args.repeats, args.jobs, args.results)
@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import tempfile
+import pandas as pd
+from src.benchmarking import measure, run_isolated
+from src.data_preparation import load_datasets, merge_datasets
+from src.streaming import stream_customer_table
+from src.synthetic import generate_synthetic_data
+
+# Benchmark de la ingesta por bloques: tabla de clientes en memoria (load_datasets
+# + merge_datasets) contra src/streaming.py con distintos presupuestos, sobre
+# archivos sintéticos de varios tamaños con la misma cantidad de usuarios. Con
+# la lectura por bloques el pico de RSS debe seguir al presupuesto, no al archivo.
+
+
+def _in_memory(paths):
+    with measure() as record:
+        demographics, products, transactions = load_datasets(*paths, compact=True)
+        df = merge_datasets(demographics, transactions, products)
+    record["rows"] = len(df)
+    return record
+
+
+def _streaming(paths, memory_mb):
+    with measure() as record:
+        df = stream_customer_table(*paths, memory_mb=memory_mb, compact=True)
+    record["rows"] = len(df)
+    return record
+
+
+def _check_equal(paths, memory_mb):
+    demographics, products, transactions = load_datasets(*paths)
+    expected = merge_datasets(demographics, transactions, products)
+    pd.testing.assert_frame_equal(expected, stream_customer_table(*paths, memory_mb=memory_mb), check_exact=False)
+    return True
+
+
+def run_benchmark(sizes=(1_000_000, 4_000_000), n_users=50_000, budgets=(64, 256), seed=42, check=True):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_transactions in sizes:
+            print(f"🔄 Generando {n_transactions:,} transacciones sintéticas para {n_users:,} usuarios...")
+            paths = generate_synthetic_data(os.path.join(tmp_dir, str(n_transactions)), n_transactions, n_users,
+                                            seed, verbose=False)
+            file_mb = os.path.getsize(paths[2]) / 1024 ** 2
+            rows.append({"transacciones": n_transactions, "archivo_mb": file_mb, "modo": "en memoria",
+                         **run_isolated(_in_memory, paths)})
+            for memory_mb in budgets:
+                rows.append({"transacciones": n_transactions, "archivo_mb": file_mb, "modo": f"bloques {memory_mb} MB",
+                             **run_isolated(_streaming, paths, memory_mb)})
+            if check:
+                run_isolated(_check_equal, paths, budgets[0])
+                print("   ✅ Misma tabla que merge_datasets")
+
+    print(f"\n{'Transacciones':>14}{'CSV (MB)':>10}  {'Modo':<18}{'Tiempo (s)':>11}{'Pico RSS (MB)':>15}")
+    for r in rows:
+        print(f"{r['transacciones']:>14,}{r['archivo_mb']:>10.0f}  {r['modo']:<18}{r['seconds']:>11.2f}"
+              f"{r['peak_rss_mb']:>15.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de memoria de la ingesta por bloques")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e6, 4e6], help="Transacciones por archivo")
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--budgets", type=float, nargs="+", default=[64, 256], help="Presupuestos de memoria (MB)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-check", action="store_true", help="No comparar contra merge_datasets")
+    args = parser.parse_args()
+    run_benchmark([int(n) for n in args.sizes], args.users, args.budgets, args.seed, check=not args.no_check)
@@ -0,0 +1,25 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from src.synthetic import generate_synthetic_data, CHUNK_SIZE
+
+
+def run_generation(n_transactions, output_dir=None, n_users=None, seed=42, chunk_size=CHUNK_SIZE):
+    output_dir = output_dir or f"data/synthetic/{n_transactions}_{seed}"
+    print(f"🔄 Generando {n_transactions:,} transacciones sintéticas en {output_dir}...")
+    paths = generate_synthetic_data(output_dir, n_transactions, n_users=n_users, seed=seed, chunk_size=chunk_size)
+    print(f"✅ Datos sintéticos guardados: {', '.join(paths)}")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos con las distribuciones de data/raw")
+    parser.add_argument("transactions", type=float, help="Cantidad de transacciones (p.ej. 1e6)")
+    parser.add_argument("--users", type=int, default=None, help="Por defecto, las mismas transacciones por usuario que data/raw")
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    run_generation(int(args.transactions), args.output_dir, args.users, args.seed, args.chunk_size)
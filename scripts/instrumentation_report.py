@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import pandas as pd
+from src.instrumentation import load_records, LOG_PATH
+
+
+def summarize(path=LOG_PATH, last=None):
+    records = pd.DataFrame(load_records(path))
+    if records.empty:
+        print(f"⚠️  No hay registros en {path}")
+        return records
+    if last:
+        records = records.tail(last)
+
+    summary = records.groupby("event").agg(
+        calls=("seconds", "size"),
+        seconds=("seconds", "sum"),
+        cpu_seconds=("cpu_seconds", "sum"),
+        peak_rss_mb=("peak_rss_mb", "max"),
+        rows_in=("rows_in", "max"),
+        rows_out=("rows_out", "max"),
+    ).sort_values("seconds", ascending=False)
+    print(summary.to_string(float_format=lambda x: f"{x:,.2f}"))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumen por etapa/función de los registros de instrumentación")
+    parser.add_argument("--log", default=LOG_PATH)
+    parser.add_argument("--last", type=int, default=None, help="Sólo los últimos N registros")
+    args = parser.parse_args()
+    summarize(args.log, args.last)
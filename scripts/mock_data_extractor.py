@@ -1,10 +1,19 @@
 import requests
 import pandas as pd
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 API_URL = "http://localhost:8000"
 RAW_DATA_DIR = Path("data/raw/")
 RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
+STATE_PATH = RAW_DATA_DIR / ".extraction_state.json"
+PAGE_SIZE = 1000
 
 endpoints = {
     "demographics": "/demographics/",
@@ -29,5 +38,210 @@ def run_mock_extraction():
         fetch_and_save(name, path)
     print("🚀 Extracción completa.")
 
+
+# ----------------------------
+# Extracción concurrente e incremental
+# ----------------------------
+
+def build_session(pool_size=10, retries=5, backoff_factor=0.5):
+    # Sesión compartida con pool de conexiones y reintentos con backoff exponencial
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def load_state():
+    if STATE_PATH.exists():
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def _write_state(state):
+    tmp_path = STATE_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def save_state(state, lock):
+    with lock:
+        _write_state(state)
+
+
+def update_state(state, lock, name, remove=(), **changes):
+    # El estado es compartido por los threads de todos los endpoints: cada cambio
+    # se aplica y se persiste bajo el lock, así el JSON nunca se serializa a mitad
+    # de una modificación. Devuelve una copia del estado del endpoint
+    with lock:
+        endpoint_state = state.setdefault(name, {})
+        for key in remove:
+            endpoint_state.pop(key, None)
+        endpoint_state.update(changes)
+        _write_state(state)
+        return dict(endpoint_state)
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _copy_rows(source, target, n_rows):
+    # Primeras n_rows filas de la extracción anterior, tal cual (texto, sin inferir tipos)
+    rows = pd.read_csv(source, nrows=n_rows, dtype=str, keep_default_na=False)
+    rows.to_csv(target, index=False)
+
+
+def extract_endpoint(session, name, path, state, lock, page_size=PAGE_SIZE):
+    # Descarga página por página y escribe cada una a disco apenas llega.
+    # Transacciones: si hay marca de agua, sólo se piden fechas >= última fecha
+    # y se descartan los ids ya vistos en esa fecha; el resto se reescribe completo.
+    # endpoint_state es una copia local: el estado compartido sólo cambia vía update_state
+    #
+    # Pedidos condicionales: por página (parámetros + cursor) se guarda el ETag y el
+    # cursor siguiente, y se envía If-None-Match. Un 304 no trae cuerpo:
+    #   incremental -> la página ya se incorporó (su ETag se guarda junto con el cursor)
+    #   completo    -> sus filas son las mismas del archivo anterior; si todas las
+    #                  páginas responden 304 el archivo no se reescribe
+    with lock:
+        endpoint_state = dict(state.get(name, {}))
+    output_file = RAW_DATA_DIR / f"{name}.csv"
+    incremental = name == "transactions" and endpoint_state.get("last_date") is not None
+
+    params = {"limit": page_size}
+    if incremental:
+        params["date_from"] = endpoint_state["last_date"]
+        seen_ids = set(endpoint_state.get("ids_at_last_date", []))
+        target_file = output_file
+    else:
+        seen_ids = set()
+        target_file = output_file.with_suffix(".csv.partial")
+
+    # Si una corrida anterior se interrumpió, se retoma desde el último cursor
+    cursor = endpoint_state.get("cursor")
+    if cursor is None and not incremental and target_file.exists():
+        target_file.unlink()
+
+    if cursor is None:
+        endpoint_state.pop("pending_last_date", None)
+        endpoint_state.pop("pending_ids", None)
+    last_date = endpoint_state.get("pending_last_date", endpoint_state.get("last_date"))
+    ids_at_last_date = set(endpoint_state.get("pending_ids", endpoint_state.get("ids_at_last_date", [])))
+    n_rows = 0
+
+    known_pages = endpoint_state.get("pages", {})
+    pages = {}
+    # En extracción completa sólo se pregunta mientras no haya cambiado ninguna página
+    # (al retomar un .partial ya hubo cambios) y si el archivo anterior es el que
+    # escribió la corrida de esos ETags (no se reescribió después)
+    conditional = incremental or (cursor is None and output_file.exists()
+                                  and endpoint_state.get("file_stamp") == _file_stamp(output_file))
+    unchanged_rows = 0
+
+    print(f"🔄 Extrayendo {name}{' (incremental desde ' + last_date + ')' if incremental else ''}...")
+    while True:
+        page_params = dict(params, cursor=cursor) if cursor else params
+        page_key = json.dumps(page_params, sort_keys=True)
+        known = known_pages.get(page_key) if conditional else None
+        headers = {"If-None-Match": known["etag"]} if known else {}
+        response = session.get(f"{API_URL}{path}", params=page_params, headers=headers, timeout=30)
+
+        if known and response.status_code == 304:
+            pages[page_key] = known
+            cursor = known["next_cursor"]
+            if incremental:
+                update_state(state, lock, name, cursor=cursor, pages={**known_pages, **pages})
+            else:
+                unchanged_rows += known["rows"]
+            if cursor is None:
+                break
+            continue
+
+        response.raise_for_status()
+        page = response.json()
+        if conditional and not incremental:
+            # Primera página con cambios: las anteriores se copian del archivo previo
+            if unchanged_rows:
+                _copy_rows(output_file, target_file, unchanged_rows)
+            conditional = False
+
+        df = pd.DataFrame(page["data"])
+        if seen_ids and not df.empty:
+            df = df[~df["transaction_id"].isin(seen_ids)]
+
+        if not df.empty:
+            write_header = not target_file.exists() or target_file.stat().st_size == 0
+            df.to_csv(target_file, mode="a", header=write_header, index=False)
+            n_rows += len(df)
+
+            if name == "transactions":
+                page_last_date = df["date"].max()
+                if last_date is None or page_last_date > last_date:
+                    last_date = page_last_date
+                    ids_at_last_date = set()
+                ids_at_last_date |= set(df.loc[df["date"] == last_date, "transaction_id"])
+
+        cursor = page["next_cursor"]
+        if response.headers.get("ETag"):
+            pages[page_key] = {"etag": response.headers["ETag"], "next_cursor": cursor, "rows": len(page["data"])}
+        changes = {"cursor": cursor}
+        if incremental:
+            changes["pages"] = {**known_pages, **pages}
+        if name == "transactions":
+            changes.update(pending_last_date=last_date, pending_ids=sorted(ids_at_last_date))
+        update_state(state, lock, name, **changes)
+        if cursor is None:
+            break
+
+    # Sólo las páginas de esta corrida: las de marcas de agua anteriores ya no se piden
+    # (en extracción completa se guardan recién acá, cuando el archivo ya las contiene)
+    changes = {"pages": pages}
+    if not incremental:
+        if target_file.exists():
+            os.replace(target_file, output_file)
+        elif conditional:
+            print(f"⏭️  {name}: sin cambios (304)")
+        changes["file_stamp"] = _file_stamp(output_file) if output_file.exists() else None
+    if name == "transactions":
+        changes.update(last_date=last_date, ids_at_last_date=sorted(ids_at_last_date))
+    update_state(state, lock, name, remove=("pending_last_date", "pending_ids"), **changes)
+    print(f"✅ {name}: {n_rows} registros nuevos en {output_file}")
+    return n_rows
+
+
+def run_incremental_extraction(full_refresh=False, max_workers=3, page_size=PAGE_SIZE):
+    state = {} if full_refresh else load_state()
+    lock = threading.Lock()
+    session = build_session(pool_size=max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            name: pool.submit(extract_endpoint, session, name, path, state, lock, page_size)
+            for name, path in endpoints.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+    print("🚀 Extracción completa.")
+    return results
+
+
 if __name__ == "__main__":
-    run_mock_extraction()
+    parser = argparse.ArgumentParser(description="Extrae datos de la API mock")
+    parser.add_argument("--legacy", action="store_true", help="Extracción secuencial original (respuesta completa)")
+    parser.add_argument("--full-refresh", action="store_true", help="Ignorar la marca de agua guardada")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    if args.legacy:
+        run_mock_extraction()
+    else:
+        run_incremental_extraction(full_refresh=args.full_refresh, max_workers=args.workers, page_size=args.page_size)
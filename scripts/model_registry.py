@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+from src.model_registry import (
+    CURRENT, REGISTRY_DIR, current_version, list_versions, promote_version, read_metadata, rollback,
+)
+
+# Administración del registro de modelos: listar versiones con sus métricas,
+# ver la metadata de una versión, promover una versión a current o volver a la
+# anterior. Los consumidores (insights, dashboard, reporte, servicio) leen current.
+
+
+def print_versions(registry_dir=REGISTRY_DIR):
+    current = current_version(registry_dir)
+    print(f"{'':2}{'Versión':<9}{'Creada':<21}{'AUC CV':>8}{'AUC Test':>10}  {'Datos (sha256)':<14}")
+    for version in list_versions(registry_dir):
+        meta = read_metadata(version, registry_dir)
+        metrics = meta.get("metrics", {})
+        data_hash = (meta.get("data") or {}).get("sha256", "")[:12]
+        marker = "* " if version == current else "  "
+        print(f"{marker}{version:<9}{meta['created_at']:<21}{metrics.get('cv_auc', float('nan')):>8.4f}"
+              f"{metrics.get('test_auc', float('nan')):>10.4f}  {data_hash:<14}")
+    if current is None:
+        print("⚠️  Ninguna versión promovida: los consumidores usan el modelo .pkl legado")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registro de modelos versionados")
+    parser.add_argument("--registry-dir", default=REGISTRY_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Versiones registradas (* = current)")
+    show = subparsers.add_parser("show", help="Metadata de una versión")
+    show.add_argument("version", nargs="?", default=CURRENT)
+    promote = subparsers.add_parser("promote", help="Promover una versión a current")
+    promote.add_argument("version")
+    subparsers.add_parser("rollback", help="Volver a la versión promovida anterior")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print_versions(args.registry_dir)
+    elif args.command == "show":
+        print(json.dumps(read_metadata(args.version, args.registry_dir), indent=2, ensure_ascii=False))
+    elif args.command == "promote":
+        print(f"✅ current -> {promote_version(args.version, args.registry_dir)}")
+    else:
+        print(f"↩️  current -> {rollback(args.registry_dir)}")
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from src.incremental import (
+    append_delta, compact_state, derive_user_features, load_state, read_manifest, save_state, source_marker,
+)
+from src.storage import save_dataset
+from src.streaming import aggregate_transactions, MEMORY_MB
+from src.instrumentation import instrument, current_span
+
+# Estado agregado por usuario (src/incremental.py) y features derivadas en
+# data/processed/user_aggregates.parquet, que usa 02_feature_engineering. El
+# extractor agrega transacciones nuevas al final de transactions.csv: sólo se leen
+# los bytes posteriores a lo ya incorporado y se guardan como un delta. Si lo ya
+# leído cambió (el archivo se reescribió), se reconstruye desde cero.
+
+STATE_DIR = "data/processed/user_state"
+SOURCE_PATH = "data/raw/transactions.csv"
+OUTPUT_PATH = "data/processed/user_aggregates.parquet"
+
+
+def sync_source(path=SOURCE_PATH, state_dir=STATE_DIR, memory_mb=MEMORY_MB, rebuild=False):
+    # Incorpora lo agregado a `path` desde la última corrida; devuelve las transacciones leídas
+    size = os.path.getsize(path)
+    source = read_manifest(state_dir)["source"]
+    appended = (not rebuild and source is not None and source["path"] == os.path.abspath(path)
+                and size >= source["offset"] and source_marker(path, source["offset"]) == source)
+    if appended and size == source["offset"]:
+        print(f"⏭️  {path}: sin transacciones nuevas")
+        return 0
+    if appended:
+        print(f"🔄 Incorporando {(size - source['offset']) / 1024 ** 2:,.1f} MB nuevos de {path}...")
+        delta, n_rows = aggregate_transactions(path, memory_mb, start=source["offset"], end=size)
+        append_delta(delta, state_dir, source=source_marker(path, size))
+    else:
+        print(f"🔄 Reconstruyendo el estado desde {path}...")
+        state, n_rows = aggregate_transactions(path, memory_mb, end=size)
+        save_state(state, state_dir, source=source_marker(path, size))
+    print(f"   {n_rows:,} transacciones")
+    return n_rows
+
+
+@instrument("stage:user_aggregates", profile=True)
+def run_update(batch_paths=None, state_dir=STATE_DIR, rebuild=False, memory_mb=MEMORY_MB, source_path=SOURCE_PATH):
+    # Sin lotes explícitos se sincroniza con transactions.csv (lo que corre el pipeline);
+    # con --rebuild se descarta el estado y se vuelve a leer el archivo completo
+    n_rows = 0
+    if rebuild or not batch_paths:
+        n_rows += sync_source(source_path, state_dir, memory_mb, rebuild=rebuild)
+
+    for path in batch_paths or []:
+        # Cada lote se lee por bloques: la memoria no depende del tamaño del archivo
+        print(f"🔄 Incorporando lote {path}...")
+        delta, batch_rows = aggregate_transactions(path, memory_mb)
+        append_delta(delta, state_dir)
+        print(f"   {batch_rows:,} transacciones")
+        n_rows += batch_rows
+
+    state = load_state(state_dir)
+    if compact_state(state_dir, state=state):
+        print("🗜️  Deltas compactados en una base nueva")
+    features = derive_user_features(state)
+    output_path = save_dataset(features, OUTPUT_PATH)
+    current_span().update(rows_in=n_rows, rows_out=len(features))
+    print(f"✅ Estado actualizado ({len(features)} usuarios) y features guardadas en {output_path}")
+    return features
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza el estado agregado por usuario con nuevos lotes de transacciones")
+    parser.add_argument("batches", nargs="*", help="CSV con transacciones nuevas (por defecto, lo agregado a --source)")
+    parser.add_argument("--state-dir", default=STATE_DIR)
+    parser.add_argument("--source", default=SOURCE_PATH, help="Archivo de transacciones que crece por el final")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruir el estado desde cero")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_MB,
+                        help="Presupuesto de memoria de la lectura por bloques")
+    args = parser.parse_args()
+    run_update(args.batches, state_dir=args.state_dir, rebuild=args.rebuild, memory_mb=args.memory_mb,
+               source_path=args.source)
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from src.pipeline import STAGES
+from src.warm_worker import SOCKET_PATH, serve, submit, worker_running
+
+# Worker persistente con las dependencias pesadas ya importadas (src/warm_worker.py).
+#   python scripts/warm_worker.py serve             # en una terminal aparte
+#   python scripts/warm_worker.py stage report      # etapas del pipeline
+#   python scripts/warm_worker.py score             # scoring por lotes
+#   python scripts/warm_worker.py shutdown
+# Los comandos cliente sólo importan la stdlib y src.pipeline: arrancan en milisegundos.
+
+
+def print_reply(reply):
+    if reply.get("output"):
+        print(reply["output"], end="")
+    print(f"⏱️  {reply.get('seconds', 0.0):.2f}s en el worker")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker persistente para etapas y scoring")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("serve", help="Iniciar el worker (queda en primer plano)")
+    subparsers.add_parser("ping", help="Verificar que el worker responde")
+    stage = subparsers.add_parser("stage", help="Ejecutar etapas del pipeline")
+    stage.add_argument("names", nargs="+", choices=[s["name"] for s in STAGES])
+    stage.add_argument("--force", action="store_true")
+    pipeline = subparsers.add_parser("pipeline", help="Ejecutar el pipeline completo")
+    pipeline.add_argument("--force", action="store_true")
+    pipeline.add_argument("--workers", type=int, default=2)
+    score = subparsers.add_parser("score", help="Scoring por lotes (src/batch_scoring.py)")
+    score.add_argument("--features", default=None)
+    score.add_argument("--output", default=None)
+    score.add_argument("--model-version", default="current", help="Versión del registro (p. ej. v0003)")
+    score.add_argument("--backend", choices=["booster", "numpy"], default="booster")
+    subparsers.add_parser("shutdown", help="Detener el worker")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.socket)
+    elif not worker_running(args.socket):
+        sys.exit(f"❗ No hay un worker escuchando en {args.socket}: iniciarlo con `serve`")
+    elif args.command == "ping":
+        reply = submit({"job": "ping"}, args.socket)
+        print(f"✅ Worker {reply['result']['pid']} activo")
+    elif args.command == "stage":
+        print_reply(submit({"job": "stage", "names": args.names, "force": args.force}, args.socket))
+    elif args.command == "pipeline":
+        print_reply(submit({"job": "pipeline", "force": args.force, "workers": args.workers}, args.socket))
+    elif args.command == "score":
+        params = {"backend": args.backend, "model_version": args.model_version}
+        # El worker corre desde la raíz del repo: rutas absolutas
+        if args.features:
+            params["features_path"] = os.path.abspath(args.features)
+        if args.output:
+            params["output_path"] = os.path.abspath(args.output)
+        reply = submit({"job": "score", "params": params}, args.socket)
+        metrics = reply["result"]
+        print(f"✅ {metrics['rows']:,} clientes puntuados ({metrics['rows_per_s']:,.0f} filas/s)")
+        print_reply(reply)
+    else:
+        submit({"job": "shutdown"}, args.socket)
+        print("👋 Worker detenido")
@@ -0,0 +1,59 @@
+import pandas as pd
+
+
+# Agregaciones por usuario sin callbacks de Python por grupo: todas las
+# operaciones usan las reducciones nativas de pandas/numpy. Con observed=True
+# funcionan igual con user_id/merchant_category como texto o como categóricos.
+
+
+def month_key(dates):
+    # Clave entera año*12+mes, equivalente a dt.to_period("M") pero sin objetos Period
+    return dates.dt.year * 12 + dates.dt.month
+
+
+def favorite_category(transactions):
+    # Conteo por (usuario, categoría); en caso de empate gana la categoría
+    # alfabéticamente menor, igual que Series.mode().iloc[0]
+    counts = transactions.groupby(["user_id", "merchant_category"], observed=True).size().rename("n").reset_index()
+    counts = counts.sort_values(["user_id", "n"], ascending=[True, False], kind="stable")
+    favorite = counts.drop_duplicates("user_id", keep="first")
+    return favorite.set_index("user_id")["merchant_category"].rename("favorite_category")
+
+
+def transaction_summary(transactions):
+    grouped = transactions.groupby("user_id", observed=True)["amount"]
+    summary = pd.DataFrame({
+        "total_spent": grouped.sum(),
+        "avg_spent": grouped.mean(),
+        "txn_count": grouped.count(),
+    })
+    summary["favorite_category"] = favorite_category(transactions)
+    return summary.reset_index()
+
+
+def rfm_features(transactions, reference_date=None):
+    if reference_date is None:
+        reference_date = transactions["date"].max() + pd.Timedelta(days=1)
+
+    grouped = transactions.groupby("user_id", observed=True)
+    rfm = pd.DataFrame({
+        "recency": (reference_date - grouped["date"].max()).dt.days,
+        "frequency": grouped.size(),
+        "monetary": grouped["amount"].sum(),
+    })
+    return rfm.reset_index()
+
+
+def spending_volatility(transactions):
+    # Desvío estándar (ddof=0) del gasto mensual, sólo sobre meses con transacciones
+    monthly = transactions.groupby(["user_id", month_key(transactions["date"])], observed=True)["amount"].sum()
+    volatility = monthly.groupby(level="user_id", observed=True).std(ddof=0)
+    return volatility.rename("spending_volatility").reset_index()
+
+
+def aggregate_user_features(transactions, reference_date=None):
+    # Totales, conteos, categoría favorita, RFM y volatilidad en una sola tabla por usuario
+    features = transaction_summary(transactions) \
+        .merge(rfm_features(transactions, reference_date), on="user_id", how="outer") \
+        .merge(spending_volatility(transactions), on="user_id", how="left")
+    return features
@@ -0,0 +1,157 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.inference import InferenceEngine
+from src.model_registry import CURRENT, LEGACY_MODEL_PATH, REGISTRY_DIR, resolve_version
+
+# Scoring por lotes: las filas de features se leen por bloques (sin cargar el
+# dataset completo), cada bloque se puntúa en un pool de procesos donde cada
+# worker tiene el motor de inferencia (src/inference.py) cargado una sola vez y
+# un número acotado de threads, y los resultados (user_id, score, segmento) se escriben en orden a un Parquet.
+# El modelo es el del registro (current por defecto, el mismo que usan insights y
+# el reporte); la versión se resuelve una vez al empezar, así un promote durante
+# la corrida no mezcla modelos entre workers.
+
+FEATURES_PATH = "data/processed/final_dataset.parquet"
+IDS_PATH = "data/processed/customer_ids.parquet"
+OUTPUT_PATH = "data/processed/customer_scores.parquet"
+TARGET = "has_insurance"
+CHUNK_SIZE = 100_000
+
+# Mismos cortes que 04_business_insights: [0, 0.3], (0.3, 0.6], (0.6, 1]
+SEGMENT_BINS = [0.3, 0.6]
+SEGMENT_LABELS = ["Baja", "Media", "Alta"]
+
+
+def assign_segments(scores):
+    return np.searchsorted(SEGMENT_BINS, scores, side="left").astype(np.int8)
+
+
+def _rebatch(batches, chunk_size):
+    # iter_batches corta también en los límites de row group: se re-agrupa en
+    # bloques de exactamente chunk_size filas para que features e ids queden alineados
+    pending, n_pending = [], 0
+    for batch in batches:
+        pending.append(batch)
+        n_pending += batch.num_rows
+        while n_pending >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size)
+            rest = table.slice(chunk_size)
+            pending, n_pending = rest.to_batches(), rest.num_rows
+    if n_pending:
+        yield pa.Table.from_batches(pending)
+
+
+def iter_scoring_chunks(features_path=FEATURES_PATH, ids_path=IDS_PATH, chunk_size=CHUNK_SIZE):
+    features_file = pq.ParquetFile(features_path)
+    ids_file = pq.ParquetFile(ids_path)
+    if features_file.metadata.num_rows != ids_file.metadata.num_rows:
+        raise ValueError(f"{features_path} y {ids_path} no tienen la misma cantidad de filas; "
+                         "volvé a correr 02_feature_engineering.py")
+
+    columns = [col for col in features_file.schema_arrow.names if col != TARGET]
+    features = _rebatch(features_file.iter_batches(batch_size=chunk_size, columns=columns), chunk_size)
+    ids = _rebatch(ids_file.iter_batches(batch_size=chunk_size, columns=["user_id"]), chunk_size)
+    for feature_table, id_table in zip(features, ids):
+        yield id_table.column("user_id"), feature_table.to_pandas()
+
+
+# ----------------------------
+# Workers
+# ----------------------------
+
+_ENGINE = None
+
+
+def _init_worker(model_version, registry_dir, n_threads, backend):
+    global _ENGINE
+    _ENGINE = InferenceEngine.from_registry(model_version, registry_dir, n_threads=n_threads, backend=backend)
+
+
+def _score_chunk(X):
+    start = time.perf_counter()
+    scores = _ENGINE.predict(X)
+    return scores, time.perf_counter() - start
+
+
+# ----------------------------
+# Escritura y métricas
+# ----------------------------
+
+def _scores_table(user_ids, scores):
+    segments = pa.DictionaryArray.from_arrays(pa.array(assign_segments(scores)), pa.array(SEGMENT_LABELS))
+    return pa.table({"user_id": user_ids, "propensity_score": scores, "propensity_segment": segments})
+
+
+def score_dataset(features_path=FEATURES_PATH, ids_path=IDS_PATH, model_version=CURRENT,
+                  output_path=OUTPUT_PATH, chunk_size=CHUNK_SIZE, max_workers=None, threads_per_worker=1,
+                  backend="booster", verbose=True, registry_dir=REGISTRY_DIR):
+    start = time.perf_counter()
+    # Sin versión promovida los workers caen al pkl legado (como load_model)
+    model_version = resolve_version(model_version, registry_dir) or CURRENT
+    max_workers = max_workers or os.cpu_count() or 1
+    metrics = {"rows": 0, "chunks": 0, "score_s": 0.0, "chunk_latency_s": []}
+    tmp_path = f"{output_path}.tmp"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    writer = None
+
+    def write(user_ids, scores, seconds):
+        nonlocal writer
+        table = _scores_table(user_ids, scores)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, table.schema)
+        writer.write_table(table)
+        metrics["rows"] += len(scores)
+        metrics["chunks"] += 1
+        metrics["score_s"] += seconds
+        metrics["chunk_latency_s"].append(seconds)
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"   {metrics['rows']:,} filas puntuadas ({metrics['rows'] / elapsed:,.0f} filas/s)")
+
+    # "spawn": se llama desde threads del pipeline y del worker caliente, y un fork
+    # heredaría locks tomados por otros threads (OpenMP de XGBoost, logging, pyplot)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(model_version, registry_dir, threads_per_worker, backend)) as pool:
+        # A lo sumo 2 bloques en vuelo por worker: memoria acotada y salida en orden
+        in_flight = deque()
+        for user_ids, X in iter_scoring_chunks(features_path, ids_path, chunk_size):
+            in_flight.append((user_ids, pool.submit(_score_chunk, X)))
+            if len(in_flight) >= 2 * max_workers:
+                user_ids, future = in_flight.popleft()
+                write(user_ids, *future.result())
+        while in_flight:
+            user_ids, future = in_flight.popleft()
+            write(user_ids, *future.result())
+
+    if writer is None:
+        raise ValueError(f"{features_path} no tiene filas para puntuar")
+    writer.close()
+    os.replace(tmp_path, output_path)
+
+    elapsed = time.perf_counter() - start
+    latencies = np.array(metrics.pop("chunk_latency_s"))
+    metrics.update({
+        "elapsed_s": elapsed,
+        "rows_per_s": metrics["rows"] / elapsed if elapsed else 0.0,
+        "chunk_p50_s": float(np.percentile(latencies, 50)),
+        "chunk_max_s": float(latencies.max()),
+        "workers": max_workers,
+        "threads_per_worker": threads_per_worker,
+        "backend": backend,
+        "chunk_size": chunk_size,
+        "model_version": model_version if model_version != CURRENT else LEGACY_MODEL_PATH,
+    })
+    with open(f"{os.path.splitext(output_path)[0]}_metrics.json", "w") as f:
+        json.dump(metrics, f, indent=2)
+    return metrics
@@ -0,0 +1,95 @@
+import datetime
+import json
+import multiprocessing
+import os
+import subprocess
+import time
+from contextlib import contextmanager
+from queue import Empty
+
+from src.instrumentation import close_rss_window, open_rss_window, peak_rss_mb
+
+# Utilidades de benchmark: medición de un bloque de código (tiempo, CPU y pico
+# de RSS), ejecución aislada en un proceso nuevo y resultados persistidos como
+# JSON lines para comparar contra corridas anteriores.
+
+RESULTS_PATH = "outputs/benchmarks/stages.jsonl"
+POLL_SECONDS = 1.0
+
+
+@contextmanager
+def measure():
+    # Comparte la ventana de pico de RSS con los bloques instrumentados que corran dentro
+    record = {}
+    open_rss_window()
+    try:
+        start, cpu_start = time.perf_counter(), time.process_time()
+        yield record
+        record["seconds"] = time.perf_counter() - start
+        record["cpu_seconds"] = time.process_time() - cpu_start
+        record["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        close_rss_window()
+
+
+def _run_child(func, args, queue):
+    try:
+        queue.put(("ok", func(*args)))
+    except Exception as e:
+        queue.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def run_isolated(func, *args):
+    # Proceso nuevo ("spawn") por medición: no arrastra memoria ni caches de corridas previas
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_child, args=(func, args, queue))
+    process.start()
+    # Si el hijo muere sin responder (OOM, señal, segfault) la cola nunca recibe nada:
+    # se espera en intervalos cortos y se verifica que siga vivo
+    while True:
+        try:
+            status, result = queue.get(timeout=POLL_SECONDS)
+            break
+        except Empty:
+            if not process.is_alive():
+                process.join()
+                try:
+                    # Pudo haber respondido justo antes de terminar
+                    status, result = queue.get(timeout=POLL_SECONDS)
+                    break
+                except Empty:
+                    raise RuntimeError(f"El proceso de medición terminó sin resultado "
+                                       f"(exit code {process.exitcode})") from None
+    process.join()
+    if status == "error":
+        raise RuntimeError(result)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_results(records, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    run = {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"), "revision": git_revision()}
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps({**run, **record}) + "\n")
+
+
+def previous_result(history, **key):
+    matches = [r for r in history if all(r.get(k) == v for k, v in key.items())]
+    return matches[-1] if matches else None
@@ -0,0 +1,82 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Capa de consultas para el dashboard: scores calculados una vez, índices bitmap
+# (np.packbits, 1 bit por cliente) por cada valor de filtro, métricas y
+# histogramas pre-agregados por combinación de filtros y top-N por selección parcial.
+
+ALL = "Todos"
+SEGMENT_LABELS = ["Bajo", "Medio", "Alto"]
+SEGMENT_BINS = [0, 0.3, 0.6, 1]
+HIST_EDGES = np.linspace(0, 1, 21)
+
+
+class CustomerQueryIndex:
+    def __init__(self, df, scores):
+        self.n = len(df)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        segments = pd.cut(self.scores, bins=SEGMENT_BINS, labels=SEGMENT_LABELS, include_lowest=True)
+        self.segment_codes = segments.codes
+
+        self.income_cols = df.filter(like="income_range").columns.tolist()
+        self.risk_cols = df.filter(like="risk_profile").columns.tolist()
+        self.table = df[self.income_cols + self.risk_cols].reset_index(drop=True)
+        self.table.insert(0, "segment", segments)
+        self.table.insert(0, "pred_proba", self.scores)
+
+        self.bitmaps = {("segment", label): np.packbits(self.segment_codes == code)
+                        for code, label in enumerate(SEGMENT_LABELS)}
+        for col in self.income_cols:
+            self.bitmaps[("income", col)] = np.packbits(df[col].to_numpy() == 1)
+        for col in self.risk_cols:
+            self.bitmaps[("risk", col)] = np.packbits(df[col].to_numpy() == 1)
+
+        self.aggregates = self._precompute_aggregates()
+
+    def segment_options(self):
+        return [label for code, label in enumerate(SEGMENT_LABELS) if (self.segment_codes == code).any()]
+
+    def _bitmap(self, segment=ALL, income=ALL, risk=ALL):
+        selected = [self.bitmaps[(kind, value)]
+                    for kind, value in (("segment", segment), ("income", income), ("risk", risk))
+                    if value != ALL]
+        if not selected:
+            return None
+        bitmap = selected[0]
+        for other in selected[1:]:
+            bitmap = np.bitwise_and(bitmap, other)
+        return bitmap
+
+    def positions(self, segment=ALL, income=ALL, risk=ALL):
+        bitmap = self._bitmap(segment, income, risk)
+        if bitmap is None:
+            return np.arange(self.n)
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n))
+
+    def _summarize(self, positions):
+        scores = self.scores[positions]
+        return {
+            "count": len(positions),
+            "mean_proba": float(scores.mean()) if len(scores) else float("nan"),
+            "high_share": float((self.segment_codes[positions] == 2).mean()) if len(scores) else float("nan"),
+            "hist": np.histogram(scores, bins=HIST_EDGES)[0],
+        }
+
+    def _precompute_aggregates(self):
+        # Una entrada por cada combinación (segmento, ingreso, riesgo), incluyendo "Todos"
+        combos = itertools.product([ALL] + SEGMENT_LABELS, [ALL] + self.income_cols, [ALL] + self.risk_cols)
+        return {combo: self._summarize(self.positions(*combo)) for combo in combos}
+
+    def metrics(self, segment=ALL, income=ALL, risk=ALL):
+        return self.aggregates[(segment, income, risk)]
+
+    def top_n(self, n=15, segment=ALL, income=ALL, risk=ALL):
+        positions = self.positions(segment, income, risk)
+        if len(positions) > n:
+            # Selección parcial O(N) y orden sólo de los n elegidos
+            partial = np.argpartition(-self.scores[positions], n - 1)[:n]
+            positions = positions[partial]
+        positions = positions[np.argsort(-self.scores[positions], kind="stable")]
+        return self.table.iloc[positions]
@@ -1,6 +1,20 @@
+import numpy as np
 import pandas as pd
+from src.aggregations import transaction_summary
+from src.schema import read_table, share_user_ids, decode_categoricals, sorted_codes
+from src.sparse_features import product_holdings
+from src.instrumentation import instrument
+
+@instrument("data_preparation.load_datasets")
+def load_datasets(demo_path, products_path, trans_path, compact=False):
+    if compact:
+        # Lectura por esquema: columnas podadas, categóricos, user_id codificado y float32
+        return share_user_ids(
+            read_table(demo_path, "demographics"),
+            read_table(products_path, "products"),
+            read_table(trans_path, "transactions"),
+        )
 
-def load_datasets(demo_path, products_path, trans_path):
     demographics = pd.read_csv(demo_path)
     products = pd.read_csv(products_path)
     transactions = pd.read_csv(trans_path)
@@ -12,36 +26,55 @@ def load_datasets(demo_path, products_path, trans_path):
     return demographics, products, transactions
 
 
+@instrument("data_preparation.preprocess_transactions")
 def preprocess_transactions(transactions):
     # Agregar año y mes para análisis temporal
     transactions["year_month"] = transactions["date"].dt.to_period("M")
     return transactions
 
 
+@instrument("data_preparation.generate_product_flags")
 def generate_product_flags(products):
-    # Crear columnas binarias por tipo de producto
-    product_flags = products.pivot_table(index="user_id", 
-                                         columns="product_type", 
-                                         aggfunc="size", 
-                                         fill_value=0)
-    product_flags.columns = [f"has_{col}" for col in product_flags.columns]
-    return product_flags.reset_index()
+    # Crear columnas binarias por tipo de producto: conteo por (usuario, producto)
+    # como matriz dispersa, igual que pivot_table(aggfunc="size") pero sin la tabla densa intermedia
+    user_codes, user_values = sorted_codes(products["user_id"])
+    product_codes, product_values = sorted_codes(products["product_type"])
+    users = pd.Index(np.asarray(user_values[np.unique(user_codes[user_codes >= 0])], dtype=object))
+    product_types = list(product_values[np.unique(product_codes[product_codes >= 0])])
+
+    holdings = product_holdings(products, users, product_types)
+    product_flags = pd.DataFrame(holdings.toarray().astype("int64"), columns=[f"has_{p}" for p in product_types])
+    user_id = users.to_numpy()
+    if isinstance(products["user_id"].dtype, pd.CategoricalDtype):
+        user_id = pd.Categorical(user_id, dtype=products["user_id"].dtype)
+    product_flags.insert(0, "user_id", user_id)
+    return product_flags
 
 
-def merge_datasets(demographics, transactions, products):
+@instrument("data_preparation.merge_datasets")
+def merge_datasets(demographics, transactions, products, vectorized=True):
     product_flags = generate_product_flags(products)
 
     # Agregación de transacciones por usuario
-    txn_summary = transactions.groupby("user_id").agg(
-        total_spent=("amount", "sum"),
-        avg_spent=("amount", "mean"),
-        txn_count=("amount", "count"),
-        favorite_category=("merchant_category", lambda x: x.mode().iloc[0] if not x.mode().empty else None)
-    ).reset_index()
-
-    # Merge final
+    if vectorized:
+        txn_summary = transaction_summary(transactions)
+    else:
+        # Implementación original con lambda por grupo (referencia de equivalencia)
+        txn_summary = transactions.groupby("user_id", observed=True).agg(
+            total_spent=("amount", "sum"),
+            avg_spent=("amount", "mean"),
+            txn_count=("amount", "count"),
+            favorite_category=("merchant_category", lambda x: x.mode().iloc[0] if not x.mode().empty else None)
+        ).reset_index()
+
+    return assemble_customer_table(demographics, txn_summary, product_flags)
+
+
+def assemble_customer_table(demographics, txn_summary, product_flags):
+    # Merge final (compartido con la ingesta por bloques de src/streaming.py)
     df = demographics.merge(txn_summary, on="user_id", how="left") \
                      .merge(product_flags, on="user_id", how="left")
+    df = decode_categoricals(df)
 
     df.fillna({"total_spent": 0, "avg_spent": 0, "txn_count": 0, "favorite_category": "unknown"}, inplace=True)
 
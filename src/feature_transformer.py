@@ -0,0 +1,213 @@
+import numbers
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from src.aggregations import rfm_features, spending_volatility
+from src.data_preparation import merge_datasets
+
+TARGET = "has_insurance"
+RFM_COLS = ["recency", "frequency", "monetary", "spending_volatility"]
+NUM_COLS = [
+    "age", "total_spent", "avg_spent", "txn_count", "product_count",
+    "recency", "frequency", "monetary", "spending_volatility",
+    "age_x_product_count", "avg_spent_x_frequency"
+]
+CATEGORICAL_VARS = ["income_range", "risk_profile", "favorite_category_enc", "occupation_enc"]
+# Variables cuyo valor no puede aparecer por primera vez al puntuar (drift de esquema)
+STRICT_VARS = ["income_range", "risk_profile"]
+DROP_COLS = ["user_id", "favorite_category", "occupation"]
+
+
+def product_flag_columns(df):
+    return [col for col in df.columns if col.startswith("has_") and col != TARGET]
+
+
+def add_transaction_features(df, transactions, reference_date=None, aggregates=None):
+    # Pasos de 02_feature_engineering previos a cualquier ajuste (no dependen de parámetros aprendidos).
+    # Con `aggregates` (tabla de scripts/update_user_aggregates.py) el RFM y la volatilidad
+    # salen del estado incremental en lugar de recorrer todas las transacciones
+    df = df.copy()
+    if TARGET not in df.columns:
+        df[TARGET] = 0
+    df[TARGET] = df[TARGET].astype(int)
+
+    df["product_count"] = df[product_flag_columns(df)].sum(axis=1)
+
+    if aggregates is not None:
+        rfm = aggregates[["user_id", "recency", "frequency", "monetary"]]
+        volatility = aggregates[["user_id", "spending_volatility"]]
+    else:
+        if reference_date is None:
+            reference_date = transactions["date"].max() + pd.Timedelta(days=1)
+        rfm = rfm_features(transactions, reference_date)
+        volatility = spending_volatility(transactions)
+    df = pd.merge(df, rfm, on="user_id", how="left")
+    df["recency"] = df["recency"].fillna(999)
+    df["frequency"] = df["frequency"].fillna(0)
+    df["monetary"] = df["monetary"].fillna(0)
+
+    df = pd.merge(df, volatility, on="user_id", how="left")
+    df["spending_volatility"] = df["spending_volatility"].fillna(0)
+    return df
+
+
+def build_customer_frame(demographics, products, transactions, reference_date=None):
+    # Desde filas crudas (demographics/products/transactions) hasta la tabla previa a la codificación
+    df = merge_datasets(demographics, transactions, products)
+    df["product_count_eda"] = df[product_flag_columns(df)].sum(axis=1)
+    return add_transaction_features(df, transactions, reference_date)
+
+
+class FeatureTransformer:
+    # Encapsula todo lo que 02_feature_engineering aprende de los datos: top de
+    # categorías favoritas, ocupaciones frecuentes, layout de dummies y escalado.
+
+    def __init__(self, top_categories=5, occupation_threshold=5):
+        self.top_categories = top_categories
+        self.occupation_threshold = occupation_threshold
+
+    def fit(self, df, reference_date=None):
+        self.reference_date_ = reference_date
+        self.top_categories_ = list(df["favorite_category"].value_counts().index[:self.top_categories])
+        occupation_counts = df["occupation"].value_counts()
+        self.frequent_occupations_ = set(occupation_counts[occupation_counts >= self.occupation_threshold].index)
+
+        prepared = self._prepare(df)
+        self.categories_ = {var: sorted(prepared[var].dropna().unique()) for var in CATEGORICAL_VARS}
+        self.product_flags_ = product_flag_columns(df)
+        self.input_columns_ = [col for col in df.columns if col not in self.product_flags_ + [TARGET, "user_id"]]
+
+        self.scaler_ = StandardScaler().fit(prepared[NUM_COLS])
+
+        encoded = self._encode(prepared)
+        self.columns_ = list(encoded.columns)
+        self.feature_names_ = [col for col in self.columns_ if col != TARGET]
+        self._build_record_index()
+        return self
+
+    def fit_transform(self, df, reference_date=None, include_target=False):
+        return self.fit(df, reference_date).transform(df, include_target=include_target)
+
+    def transform(self, df, include_target=False):
+        self._validate(df)
+        df = df.copy()
+        for col in self.product_flags_:
+            if col not in df.columns:
+                df[col] = 0
+
+        encoded = self._encode(self._prepare(df))
+        encoded[NUM_COLS] = self.scaler_.transform(encoded[NUM_COLS])
+
+        columns = self.columns_ if include_target and TARGET in encoded.columns else self.feature_names_
+        return encoded[columns]
+
+    def transform_raw(self, demographics, products, transactions, reference_date=None):
+        if reference_date is None:
+            reference_date = self.reference_date_
+        return self.transform(build_customer_frame(demographics, products, transactions, reference_date))
+
+    def transform_record(self, record):
+        # Camino rápido para un único cliente (dict con las columnas de build_customer_frame):
+        # sin DataFrames, escribe directamente en un vector con el orden del modelo.
+        # Mismo esquema que valida transform(): claves y tipos se revisan antes de escribir
+        unknown = [key for key in record if key not in self._record_keys]
+        if unknown:
+            raise ValueError(f"Columnas no vistas en entrenamiento: {sorted(unknown)}")
+        missing = [col for col in self._required_keys if col not in record]
+        if missing:
+            raise ValueError(f"Columnas faltantes respecto al entrenamiento: {missing}")
+        non_numeric = [col for col in self._numeric_keys
+                       if col in record and not isinstance(record[col], numbers.Real)]
+        if non_numeric:
+            raise ValueError(f"Columnas numéricas con tipo inválido: {non_numeric}")
+        for var in STRICT_VARS:
+            if record[var] not in self._strict_values[var]:
+                raise ValueError(f"Valor no visto en entrenamiento para {var}: {record[var]!r}")
+
+        x = np.zeros(len(self.feature_names_))
+        index = self._record_index
+
+        product_count = 0
+        for col in self.product_flags_:
+            value = record.get(col, 0)
+            product_count += value
+            x[index[col]] = value
+        for col in self._passthrough_cols:
+            x[index[col]] = record[col]
+
+        values = {col: record[col] for col in NUM_COLS if col in record}
+        values["product_count"] = product_count
+        values["age_x_product_count"] = record["age"] * product_count
+        values["avg_spent_x_frequency"] = record["avg_spent"] * record["frequency"]
+        for i, col in enumerate(NUM_COLS):
+            x[index[col]] = (values[col] - self._mean[i]) / self._scale[i]
+
+        favorite = record["favorite_category"]
+        occupation = record["occupation"]
+        encoded = {
+            "income_range": record["income_range"],
+            "risk_profile": record["risk_profile"],
+            "favorite_category_enc": favorite if favorite in self.top_categories_ else "other",
+            "occupation_enc": occupation if occupation in self.frequent_occupations_ else "Other_Occupation",
+        }
+        for var, value in encoded.items():
+            position = index.get(f"{var}_{value}")
+            if position is not None:
+                x[position] = 1
+        return x
+
+    def _prepare(self, df):
+        df = df.copy()
+        df["favorite_category_enc"] = df["favorite_category"].where(
+            df["favorite_category"].isin(self.top_categories_), "other")
+        df["occupation_enc"] = df["occupation"].where(
+            df["occupation"].isin(self.frequent_occupations_), "Other_Occupation")
+        df["age_x_product_count"] = df["age"] * df["product_count"]
+        df["avg_spent_x_frequency"] = df["avg_spent"] * df["frequency"]
+        return df
+
+    def _encode(self, df):
+        # Equivalente a pd.get_dummies(drop_first=True) pero con el layout fijado en fit
+        dummies = {}
+        for var in CATEGORICAL_VARS:
+            values = df[var]
+            for category in self.categories_[var][1:]:
+                dummies[f"{var}_{category}"] = (values == category).to_numpy()
+        df = df.drop(columns=CATEGORICAL_VARS + [col for col in DROP_COLS if col in df.columns])
+        return pd.concat([df, pd.DataFrame(dummies, index=df.index)], axis=1)
+
+    def _validate(self, df):
+        missing = [col for col in self.input_columns_ if col not in df.columns]
+        if missing:
+            raise ValueError(f"Columnas faltantes respecto al entrenamiento: {missing}")
+
+        unknown_flags = [col for col in product_flag_columns(df) if col not in self.product_flags_]
+        if unknown_flags:
+            raise ValueError(f"Productos no vistos en entrenamiento: {unknown_flags}")
+
+        non_numeric = [col for col in NUM_COLS if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])]
+        if non_numeric:
+            raise ValueError(f"Columnas numéricas con tipo inválido: {non_numeric}")
+
+        for var in STRICT_VARS:
+            unseen = set(df[var].dropna().unique()) - set(self.categories_[var])
+            if unseen:
+                raise ValueError(f"Valores no vistos en entrenamiento para {var}: {sorted(unseen)}")
+
+    def _build_record_index(self):
+        self._record_index = {col: i for i, col in enumerate(self.feature_names_)}
+        self._passthrough_cols = [
+            col for col in self.feature_names_
+            if col not in NUM_COLS and col not in self.product_flags_
+            and not any(col.startswith(f"{var}_") for var in CATEGORICAL_VARS)
+        ]
+        self._strict_values = {var: set(self.categories_[var]) for var in STRICT_VARS}
+        # Esquema de transform_record: product_count se recalcula a partir de los productos
+        self._record_keys = set(self.input_columns_) | set(self.product_flags_) | {TARGET, "user_id"}
+        self._required_keys = [col for col in self.input_columns_ if col != "product_count"]
+        self._numeric_keys = [col for col in NUM_COLS if col in self._record_keys] \
+            + self.product_flags_ + self._passthrough_cols
+        self._mean = self.scaler_.mean_
+        self._scale = self.scaler_.scale_
@@ -0,0 +1,167 @@
+import inspect
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.storage import read_cache, update_cache
+
+# Render de figuras en paralelo e incremental: cada figura se declara como un
+# dict con el archivo de salida, la función que la dibuja y los datos YA
+# agregados (conteos, medias, histogramas) o submuestreados que necesita. Se
+# dibujan en un pool de procesos con backend Agg y se omiten las figuras cuyo
+# hash (datos + opciones + código del renderer) no cambió desde la última corrida.
+
+CACHE_PATH = "outputs/cache/figures.json"
+MAX_PLOT_ROWS = 50_000
+
+
+# ----------------------------
+# Preparación de datos (en el proceso principal, antes de mandar al pool)
+# ----------------------------
+
+def histogram_data(df, columns, bins=20):
+    data = {}
+    for col in columns:
+        values = df[col].dropna().to_numpy()
+        data[col] = np.histogram(values, bins=bins)
+    return data
+
+
+def downsample(df, max_rows=MAX_PLOT_ROWS, random_state=42):
+    # Para gráficos que muestran intervalos de confianza no alcanza con la media:
+    # se manda una muestra fija (semilla) en lugar de toda la tabla
+    if len(df) <= max_rows:
+        return df
+    return df.sample(n=max_rows, random_state=random_state)
+
+
+# ----------------------------
+# Renderers: reciben datos pequeños y dibujan en la figura actual
+# ----------------------------
+
+def bar_chart(data, figsize=(10, 6), horizontal=False, title=None, xlabel=None, ylabel=None,
+              palette=None, rotation=None):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=figsize)
+    if horizontal:
+        sns.barplot(y=data.index.astype(str), x=data.values, palette=palette)
+    else:
+        sns.barplot(x=data.index.astype(str), y=data.values, palette=palette)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    if rotation:
+        plt.xticks(rotation=rotation)
+
+
+def sample_bar_chart(data, x, y, order=None, figsize=(8, 5), title=None, xlabel=None, ylabel=None,
+                     palette=None):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=figsize)
+    sns.barplot(data=data, x=x, y=y, order=order, palette=palette)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+
+
+def histogram_grid(data, figsize=(12, 6), title=None):
+    import matplotlib.pyplot as plt
+
+    n_cols = int(np.ceil(np.sqrt(len(data))))
+    n_rows = int(np.ceil(len(data) / n_cols))
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=figsize, squeeze=False)
+    for ax, (col, (counts, edges)) in zip(axes.ravel(), data.items()):
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge")
+        ax.set_title(col)
+    for ax in axes.ravel()[len(data):]:
+        ax.set_visible(False)
+    fig.suptitle(title)
+
+
+def heatmap(data, figsize=(12, 6), title=None, cmap="coolwarm"):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=figsize)
+    sns.heatmap(data, annot=True, cmap=cmap)
+    plt.title(title)
+
+
+def mean_abs_bar(data, max_display=20):
+    # Equivalente a shap.summary_plot(plot_type="bar") usando sólo la media de |SHAP|
+    import matplotlib.pyplot as plt
+
+    top = data.sort_values(ascending=False).head(max_display)[::-1]
+    plt.figure(figsize=(8, 0.4 * len(top) + 1.5))
+    plt.barh(top.index, top.values, color="#1E88E5")
+    plt.xlabel("mean(|SHAP value|) (average impact on model output magnitude)")
+    plt.gca().spines[["top", "right"]].set_visible(False)
+
+
+# ----------------------------
+# Ejecución
+# ----------------------------
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_figure(spec):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    start = time.perf_counter()
+    plt.rcdefaults()
+    if spec.get("style"):
+        sns.set_theme(style=spec["style"])
+    spec["render"](spec["data"], **spec.get("options", {}))
+    if spec.get("tight_layout", True):
+        plt.tight_layout()
+    os.makedirs(os.path.dirname(spec["output"]) or ".", exist_ok=True)
+    tmp_path = f"{spec['output']}.tmp.png"
+    plt.savefig(tmp_path)
+    plt.close("all")
+    os.replace(tmp_path, spec["output"])
+    return time.perf_counter() - start
+
+
+def figure_key(spec):
+    with open(inspect.getsourcefile(spec["render"]), "rb") as f:
+        code = f.read()
+    return joblib.hash((spec["render"].__name__, code, spec["data"], spec.get("options", {}),
+                        spec.get("style"), spec.get("tight_layout", True)))
+
+
+def render_figures(specs, max_workers=None, force=False, cache_path=CACHE_PATH, verbose=True):
+    cache = read_cache(cache_path)
+    keys = {spec["output"]: figure_key(spec) for spec in specs}
+    pending = [spec for spec in specs
+               if force or cache.get(spec["output"]) != keys[spec["output"]] or not os.path.exists(spec["output"])]
+
+    timings = {spec["output"]: None for spec in specs}
+    if pending:
+        # "spawn": el pool puede abrirse desde un thread del pipeline sin heredar locks de pyplot
+        workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker) as pool:
+            futures = {spec["output"]: pool.submit(render_figure, spec) for spec in pending}
+            for output, future in futures.items():
+                timings[output] = future.result()
+        # eda_figures e insights renderizan a la vez: sólo se actualizan las claves propias
+        update_cache(cache_path, {spec["output"]: keys[spec["output"]] for spec in pending})
+
+    if verbose:
+        for output, seconds in timings.items():
+            status = "sin cambios" if seconds is None else f"{seconds:.2f}s"
+            print(f"🖼️  {output}: {status}")
+    return timings
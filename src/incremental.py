@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.aggregations import month_key
+
+# Estado agregado por usuario que permite incorporar nuevos lotes de transacciones
+# sin reprocesar el historial completo. Se compone de tres tablas:
+#   users      -> suma y conteo de montos, conteo de transacciones y última fecha
+#   categories -> conteo de transacciones por (usuario, categoría)
+#   months     -> suma de montos por (usuario, mes)
+#
+# En disco el estado es una base más una partición (delta) por lote, ambas con
+# las tres tablas; manifest.json lista las vigentes y se reemplaza atómicamente.
+# Incorporar un lote sólo escribe su delta (costo proporcional al lote); los
+# deltas se combinan al leer y se compactan en una base nueva cada MAX_DELTAS.
+STATE_TABLES = ("users", "categories", "months")
+MANIFEST_NAME = "manifest.json"
+MAX_DELTAS = 32
+# Bytes finales de lo ya incorporado que se comparan para detectar reescrituras
+TAIL_BYTES = 1 << 16
+
+
+def empty_state():
+    users = pd.DataFrame({
+        "amount_sum": pd.Series(dtype="float64"),
+        "amount_count": pd.Series(dtype="int64"),
+        "txn_count": pd.Series(dtype="int64"),
+        "last_date": pd.Series(dtype="datetime64[ns]"),
+    }, index=pd.Index([], name="user_id", dtype="object"))
+    categories = pd.Series(dtype="int64", name="n",
+                           index=pd.MultiIndex.from_tuples([], names=["user_id", "merchant_category"]))
+    months = pd.Series(dtype="float64", name="amount",
+                       index=pd.MultiIndex.from_tuples([], names=["user_id", "month"]))
+    return {"users": users, "categories": categories, "months": months}
+
+
+def aggregate_batch(transactions):
+    # Resumen de un lote con la misma forma que el estado (costo proporcional al lote)
+    grouped = transactions.groupby("user_id")
+    users = pd.DataFrame({
+        "amount_sum": grouped["amount"].sum(),
+        "amount_count": grouped["amount"].count(),
+        "txn_count": grouped.size(),
+        "last_date": grouped["date"].max(),
+    })
+    categories = transactions.groupby(["user_id", "merchant_category"]).size().rename("n")
+    months = transactions.groupby(["user_id", month_key(transactions["date"]).rename("month")])["amount"].sum()
+    return {"users": users, "categories": categories, "months": months}
+
+
+def combine_states(states):
+    # Combina estados parciales (p.ej. uno por bloque de un archivo) en uno solo:
+    # sumas y conteos se suman, la última fecha es el máximo
+    states = [state for state in states if not state["users"].empty]
+    if not states:
+        return empty_state()
+    if len(states) == 1:
+        return states[0]
+    users = pd.concat([state["users"] for state in states]).groupby(level="user_id", sort=False).agg({
+        "amount_sum": "sum",
+        "amount_count": "sum",
+        "txn_count": "sum",
+        "last_date": "max",
+    })
+    categories = pd.concat([state["categories"] for state in states]) \
+        .groupby(level=["user_id", "merchant_category"], sort=False).sum()
+    months = pd.concat([state["months"] for state in states]).groupby(level=["user_id", "month"], sort=False).sum()
+    return {"users": users, "categories": categories, "months": months}
+
+
+def table_rows(state):
+    return sum(len(state[name]) for name in STATE_TABLES)
+
+
+def derive_user_features(state, reference_date=None):
+    # Reconstruye la tabla de aggregate_user_features() a partir del estado
+    users = state["users"].sort_index()
+    if reference_date is None:
+        reference_date = users["last_date"].max() + pd.Timedelta(days=1)
+
+    categories = state["categories"].reset_index().sort_values(["user_id", "merchant_category"])
+    categories = categories.sort_values(["user_id", "n"], ascending=[True, False], kind="stable")
+    favorite = categories.drop_duplicates("user_id").set_index("user_id")["merchant_category"]
+
+    volatility = state["months"].groupby(level="user_id").std(ddof=0)
+
+    features = pd.DataFrame({
+        "total_spent": users["amount_sum"],
+        "avg_spent": users["amount_sum"] / users["amount_count"].replace(0, np.nan),
+        "txn_count": users["amount_count"],
+        "favorite_category": favorite.reindex(users.index),
+        "recency": (reference_date - users["last_date"]).dt.days,
+        "frequency": users["txn_count"],
+        "monetary": users["amount_sum"],
+        "spending_volatility": volatility.reindex(users.index),
+    })
+    features.index.name = "user_id"
+    return features.reset_index()
+
+
+def _write_tables(state, directory):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in STATE_TABLES:
+        table = state[name]
+        frame = table.to_frame() if isinstance(table, pd.Series) else table
+        frame.reset_index().to_parquet(directory / f"{name}.parquet", index=False)
+
+
+def _read_tables(directory):
+    users = pd.read_parquet(directory / "users.parquet").set_index("user_id")
+    categories = pd.read_parquet(directory / "categories.parquet") \
+        .set_index(["user_id", "merchant_category"])["n"]
+    months = pd.read_parquet(directory / "months.parquet").set_index(["user_id", "month"])["amount"]
+    return {"users": users, "categories": categories, "months": months}
+
+
+def read_manifest(state_dir):
+    state_dir = Path(state_dir)
+    path = state_dir / MANIFEST_NAME
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    # Estado guardado antes de los deltas: las tres tablas sueltas en state_dir
+    if all((state_dir / f"{name}.parquet").exists() for name in STATE_TABLES):
+        return {"base": ".", "deltas": [], "source": None}
+    return {"base": None, "deltas": [], "source": None}
+
+
+def source_marker(path, offset):
+    # Identifica lo leído de un archivo que crece por el final: tamaño y hash de sus últimos bytes
+    with open(path, "rb") as f:
+        f.seek(max(offset - TAIL_BYTES, 0))
+        tail = f.read(offset - f.tell())
+    return {"path": os.path.abspath(path), "offset": offset, "tail_sha256": hashlib.sha256(tail).hexdigest()}
+
+
+def matches_source(state_dir, path):
+    # True si el estado cubre exactamente el contenido actual de `path`
+    source = read_manifest(state_dir)["source"]
+    return (source is not None and source["path"] == os.path.abspath(path)
+            and os.path.getsize(path) == source["offset"] and source_marker(path, source["offset"]) == source)
+
+
+def _write_manifest(manifest, state_dir):
+    path = Path(state_dir) / MANIFEST_NAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def save_state(state, state_dir, source=None):
+    # Estado completo (reconstrucción o compactación): base nueva y sin deltas.
+    # Las particiones anteriores se borran recién después de publicar el manifest
+    state_dir = Path(state_dir)
+    base = f"base-{uuid.uuid4().hex[:12]}"
+    _write_tables(state, state_dir / base)
+    _write_manifest({"base": base, "deltas": [], "source": source}, state_dir)
+    for path in state_dir.iterdir():
+        if path.is_dir() and path.name != base and path.name.startswith(("base-", "delta-")):
+            shutil.rmtree(path)
+        elif path.name in {f"{name}.parquet" for name in STATE_TABLES}:
+            path.unlink()
+
+
+def append_delta(delta, state_dir, source=None):
+    # Agregados de un lote (aggregate_batch) como partición aparte. Un lote suelto
+    # (sin `source`) desliga el estado del archivo que seguía: ya no lo cubre exactamente
+    state_dir = Path(state_dir)
+    manifest = read_manifest(state_dir)
+    name = f"delta-{len(manifest['deltas']) + 1:06d}-{uuid.uuid4().hex[:8]}"
+    _write_tables(delta, state_dir / name)
+    manifest["deltas"].append(name)
+    manifest["source"] = source
+    _write_manifest(manifest, state_dir)
+    return name
+
+
+def load_state(state_dir):
+    state_dir = Path(state_dir)
+    manifest = read_manifest(state_dir)
+    parts = ([manifest["base"]] if manifest["base"] else []) + manifest["deltas"]
+    return combine_states([empty_state()] + [_read_tables(state_dir / part) for part in parts])
+
+
+def compact_state(state_dir, max_deltas=None, state=None):
+    # Con muchos deltas la lectura se encarece: se combinan en una base nueva
+    manifest = read_manifest(state_dir)
+    if len(manifest["deltas"]) < (max_deltas or MAX_DELTAS):
+        return False
+    save_state(state if state is not None else load_state(state_dir), state_dir, manifest["source"])
+    return True
@@ -0,0 +1,180 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.model_registry import CURRENT, LEGACY_MODEL_PATH, REGISTRY_DIR, load_model
+
+# Motor de inferencia para el XGBoost ajustado: el modelo se carga una vez, el
+# orden de features se valida una sola vez por layout de columnas y las
+# predicciones van directo al booster (inplace_predict) sobre buffers float32
+# contiguos, sin la validación/conversión de DataFrame de predict_proba.
+# Opcionalmente los árboles se compilan a arrays de NumPy y se evalúan todos a
+# la vez (backend "numpy"), útil donde no se quiere depender del runtime de XGBoost.
+
+MODEL_PATH = LEGACY_MODEL_PATH
+NUMPY_CHUNK_SIZE = 1_024
+
+
+class CompiledTrees:
+    # Todos los árboles en arrays planos de nodos (ids globales). Por bloque de filas
+    # se evalúan de una vez todas las condiciones de split (filas x splits) y luego
+    # se baja por nivel; los árboles van ordenados por profundidad, así en el nivel
+    # d sólo se mueven los que todavía no llegaron a una hoja. iteration_range como
+    # en inplace_predict: con early stopping sólo cuentan las iteraciones hasta la mejor
+    def __init__(self, booster, iteration_range=(0, 0)):
+        model = json.loads(booster.save_raw(raw_format="json"))
+        learner = model["learner"]
+        if learner["objective"]["name"] != "binary:logistic":
+            raise ValueError(f"Objetivo no soportado por el evaluador NumPy: {learner['objective']['name']}")
+        gbtree = learner["gradient_booster"]["model"]
+        trees = gbtree["trees"]
+        start, end = iteration_range
+        if end:
+            # iteration_indptr: primer árbol de cada iteración (varios con num_parallel_tree)
+            trees = trees[gbtree["iteration_indptr"][start]:gbtree["iteration_indptr"][end]]
+        if any(tree["categories_nodes"] for tree in trees):
+            raise ValueError("El evaluador NumPy no soporta splits categóricos")
+
+        depths = [_tree_depth(tree["left_children"], tree["right_children"]) for tree in trees]
+        order = np.argsort(depths, kind="stable")[::-1]
+        left, right, split_index, value, roots = [], [], [], [], []
+        split_feature, split_threshold, split_default_left = [], [], []
+        offset = 0
+        for t in order:
+            tree = trees[t]
+            children_left = np.asarray(tree["left_children"], dtype=np.int64)
+            nodes = np.arange(len(children_left)) + offset
+            is_leaf = children_left == -1
+            splits = np.flatnonzero(~is_leaf)
+            index = np.full(len(children_left), -1, dtype=np.int64)
+            index[splits] = np.arange(len(splits)) + len(split_feature)
+
+            # Las hojas apuntan a sí mismas; en ellas split_conditions guarda el valor de la hoja
+            left.append(np.where(is_leaf, nodes, children_left + offset))
+            right.append(np.where(is_leaf, nodes, np.asarray(tree["right_children"]) + offset))
+            value.append(np.where(is_leaf, tree["split_conditions"], 0))
+            split_index.append(index)
+            split_feature.extend(np.asarray(tree["split_indices"])[splits])
+            split_threshold.extend(np.asarray(tree["split_conditions"])[splits])
+            split_default_left.extend(np.asarray(tree["default_left"], dtype=bool)[splits])
+            roots.append(offset)
+            offset += len(children_left)
+
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.split_index = np.concatenate(split_index)
+        self.value = np.concatenate(value).astype(np.float32)
+        # Los árboles de una sola hoja no dependen de la fila: se suman al margen base
+        sorted_depths = np.asarray(depths)[order]
+        n_split_trees = int((sorted_depths > 0).sum())
+        self.roots = np.asarray(roots[:n_split_trees], dtype=np.int64)
+        constant = self.value[np.asarray(roots[n_split_trees:], dtype=np.int64)].sum(dtype=np.float64)
+        self.split_feature = np.asarray(split_feature, dtype=np.int64)
+        self.split_threshold = np.asarray(split_threshold, dtype=np.float32)
+        self.split_default_left = np.asarray(split_default_left, dtype=bool)
+        # Árboles que siguen activos en cada nivel (profundidad > nivel)
+        self.active_trees = [int((sorted_depths > level).sum())
+                             for level in range(int(sorted_depths.max(initial=0)))]
+
+        base_score = float(learner["learner_model_param"]["base_score"])
+        self.base_margin = np.log(base_score / (1 - base_score)) + constant
+
+    def margin(self, X):
+        values = X[:, self.split_feature]
+        decisions = np.where(np.isnan(values), self.split_default_left, values < self.split_threshold).ravel()
+        row_offset = (np.arange(len(X)) * len(self.split_feature))[:, None]
+        positions = np.tile(self.roots, (len(X), 1))
+        for n_active in self.active_trees:
+            current = positions[:, :n_active]
+            go_left = decisions[row_offset + self.split_index[current]]
+            positions[:, :n_active] = np.where(go_left, self.left[current], self.right[current])
+        return self.value[positions].sum(axis=1, dtype=np.float64) + self.base_margin
+
+    def predict(self, X, chunk_size=NUMPY_CHUNK_SIZE):
+        # Por bloques de filas: decisiones y posiciones son matrices filas x splits / árboles
+        margins = np.concatenate([self.margin(X[start:start + chunk_size])
+                                  for start in range(0, max(len(X), 1), chunk_size)])
+        return (1 / (1 + np.exp(-margins))).astype(np.float32)
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while frontier:
+        frontier = [child for node in frontier for child in (left[node], right[node]) if child != -1]
+        depth += 1 if frontier else 0
+    return depth
+
+
+class InferenceEngine:
+    def __init__(self, model, n_threads=None, backend="booster"):
+        if backend not in ("booster", "numpy"):
+            raise ValueError(f"Backend desconocido: {backend}")
+        # model puede ser el XGBClassifier o directamente el Booster (registro de modelos)
+        self.model = model
+        self.booster = model.get_booster() if hasattr(model, "get_booster") else model
+        self.feature_names = list(self.booster.feature_names or [])
+        self.n_features = self.booster.num_features()
+        self.iteration_range = self._iteration_range(model)
+        self.backend = backend
+        self.set_threads(n_threads)
+        self.compiled = CompiledTrees(self.booster, self.iteration_range) if backend == "numpy" else None
+        self._validated_layouts = {}
+
+    @classmethod
+    def load(cls, model_path=MODEL_PATH, n_threads=None, backend="booster"):
+        return cls(joblib.load(model_path), n_threads=n_threads, backend=backend)
+
+    @classmethod
+    def from_registry(cls, version=CURRENT, registry_dir=REGISTRY_DIR, n_threads=None, backend="booster",
+                      fallback_path=MODEL_PATH):
+        # Sólo el booster nativo (sin unpickling ni wrapper de sklearn)
+        booster = load_model(version, registry_dir, kind="booster", fallback_path=fallback_path)
+        return cls(booster, n_threads=n_threads, backend=backend)
+
+    @staticmethod
+    def _iteration_range(model):
+        # Igual que predict_proba: hasta best_iteration si hubo early stopping
+        try:
+            return (0, model.best_iteration + 1)
+        except AttributeError:
+            return (0, 0)
+
+    def set_threads(self, n_threads):
+        self.n_threads = n_threads or os.cpu_count() or 1
+        self.booster.set_param({"nthread": self.n_threads})
+
+    def validate_columns(self, columns):
+        # Se resuelve una vez por layout de columnas y se reutiliza en cada llamada
+        columns = tuple(columns)
+        if columns not in self._validated_layouts:
+            missing = [col for col in self.feature_names if col not in columns]
+            if missing:
+                raise ValueError(f"Faltan features requeridas por el modelo: {missing}")
+            order = [columns.index(col) for col in self.feature_names]
+            self._validated_layouts[columns] = None if order == list(range(len(columns))) else order
+        return self._validated_layouts[columns]
+
+    def as_matrix(self, X):
+        if isinstance(X, pd.DataFrame):
+            order = self.validate_columns(X.columns)
+            X = X.to_numpy(dtype=np.float32)
+            if order is not None:
+                X = X[:, order]
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Se esperaban {self.n_features} features, llegaron {X.shape[1]}")
+        if X.dtype != np.float32 or not X.flags.c_contiguous:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+        return X
+
+    def predict(self, X):
+        X = self.as_matrix(X)
+        if self.compiled is not None:
+            return self.compiled.predict(X)
+        return self.booster.inplace_predict(X, iteration_range=self.iteration_range,
+                                            predict_type="value", missing=np.nan)
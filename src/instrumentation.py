@@ -0,0 +1,215 @@
+import cProfile
+import datetime
+import functools
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+
+# Instrumentación de etapas y funciones: instrument("nombre") se usa como
+# context manager o como decorador y registra tiempo de pared, tiempo de CPU,
+# pico de memoria (RSS y, opcionalmente, tracemalloc) y filas de entrada/salida,
+# una línea JSON por bloque. Los bloques anidados registran a su padre.
+#
+#   INSTRUMENT=0                  desactiva el registro (costo casi nulo)
+#   INSTRUMENT_LOG=<ruta>         archivo JSON lines (por defecto outputs/logs/instrumentation.jsonl)
+#   INSTRUMENT_TRACEMALLOC=1      agrega el pico de memoria de Python según tracemalloc (más lento)
+#   PROFILE_DIR=<dir>             guarda un volcado cProfile por cada bloque con profile=True
+#
+# La memoria es del proceso: el pico de RSS se reinicia sólo al abrirse el primer
+# bloque (o measure() de src/benchmarking.py) sin otro abierto en ningún thread; los
+# anidados y los de etapas en paralelo leen el mismo pico, que incluye lo de los demás.
+
+LOG_PATH = "outputs/logs/instrumentation.jsonl"
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_rss_lock = threading.Lock()
+_rss_windows = 0
+
+
+def enabled():
+    return os.environ.get("INSTRUMENT", "1") != "0"
+
+
+def reset_peak_rss():
+    # En Linux el pico de RSS (VmHWM) se puede reiniciar; en otros sistemas queda el de todo el proceso
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def open_rss_window():
+    # Reiniciar el pico con otro bloque abierto borraría el suyo: sólo lo hace el primero
+    global _rss_windows
+    with _rss_lock:
+        if _rss_windows == 0:
+            reset_peak_rss()
+        _rss_windows += 1
+
+
+def close_rss_window():
+    global _rss_windows
+    with _rss_lock:
+        _rss_windows -= 1
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def count_rows(value):
+    # Filas de un DataFrame/array, o la suma si es una tupla/lista de ellos
+    if isinstance(value, (tuple, list)):
+        counts = [count_rows(v) for v in value]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+    shape = getattr(value, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span():
+    # Sin bloque activo (o con INSTRUMENT=0) devuelve uno suelto que no se registra
+    stack = _stack()
+    return stack[-1] if stack else Span(None)
+
+
+class Span:
+    def __init__(self, name, rows_in=None, profile=False, **fields):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.profile = profile
+        self.fields = fields
+        self.child_peak_traced = 0
+
+    def update(self, rows_in=None, rows_out=None, **fields):
+        if rows_in is not None:
+            self.rows_in = rows_in
+        if rows_out is not None:
+            self.rows_out = rows_out
+        self.fields.update(fields)
+        return self
+
+    def __enter__(self):
+        if not enabled():
+            return self
+        stack = _stack()
+        self.parent = stack[-1] if stack else None
+        self.tracing = os.environ.get("INSTRUMENT_TRACEMALLOC") == "1"
+        if self.tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            elif self.parent is not None:
+                # Antes de reiniciar el pico se guarda en el padre para no perderlo
+                self.parent.child_peak_traced = max(self.parent.child_peak_traced, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        open_rss_window()
+
+        self.profiler = None
+        if self.profile and os.environ.get("PROFILE_DIR"):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        stack.append(self)
+        self.started_at = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not enabled():
+            return False
+        seconds = time.perf_counter() - self.start
+        cpu_seconds = time.process_time() - self.cpu_start
+        _stack().pop()
+        peak_rss = peak_rss_mb()
+        close_rss_window()
+        if self.profiler is not None:
+            self.profiler.disable()
+            profile_dir = os.environ["PROFILE_DIR"]
+            os.makedirs(profile_dir, exist_ok=True)
+            self.profiler.dump_stats(os.path.join(profile_dir, f"{self.name.replace(':', '_')}.prof"))
+
+        record = {
+            "event": self.name,
+            "parent": self.parent.name if self.parent is not None else None,
+            "started_at": self.started_at,
+            "seconds": round(seconds, 6),
+            "cpu_seconds": round(cpu_seconds, 6),
+            "peak_rss_mb": round(peak_rss, 1),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "pid": os.getpid(),
+            "status": "error" if exc_type else "ok",
+            **self.fields,
+        }
+        if self.tracing:
+            peak_traced = max(tracemalloc.get_traced_memory()[1], self.child_peak_traced)
+            record["peak_traced_mb"] = round(peak_traced / 1024 ** 2, 1)
+        if self.parent is not None and self.tracing:
+            self.parent.child_peak_traced = max(self.parent.child_peak_traced, peak_traced)
+        write_record(record)
+        return False
+
+
+def write_record(record, path=None):
+    path = path or os.environ.get("INSTRUMENT_LOG", LOG_PATH)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(record, default=str)
+    with _write_lock:
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+
+def instrument(name, rows_in=None, profile=False, **fields):
+    # Como context manager: `with instrument("x") as span: span.update(rows_out=...)`.
+    # Como decorador: filas de entrada = DataFrames recibidos, de salida = lo que devuelve.
+    class _Instrument:
+        def __enter__(self):
+            self.span = Span(name, rows_in=rows_in, profile=profile, **fields)
+            return self.span.__enter__()
+
+        def __exit__(self, *exc):
+            return self.span.__exit__(*exc)
+
+        def __call__(self, func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not enabled():
+                    return func(*args, **kwargs)
+                rows = rows_in if rows_in is not None else count_rows(list(args) + list(kwargs.values()))
+                with Span(name, rows_in=rows, profile=profile, **fields) as span:
+                    result = func(*args, **kwargs)
+                    if span.rows_out is None:
+                        span.rows_out = count_rows(result)
+                    return result
+            return wrapper
+
+    return _Instrument()
+
+
+def load_records(path=None):
+    path = path or os.environ.get("INSTRUMENT_LOG", LOG_PATH)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
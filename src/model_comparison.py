@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed, parallel_config
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+
+# Comparación concurrente de modelos: todas las combinaciones (modelo, fold) se
+# entrenan en paralelo leyendo una única copia memmapeada de los datos, y las
+# predicciones por fold se cachean en disco por hash de datos + parámetros + fold.
+# Las copias memmapeadas viven en un directorio temporal de la corrida, que se
+# borra al terminar: sólo persisten las predicciones cacheadas.
+
+CACHE_DIR = "outputs/cache/model_comparison"
+
+
+def share_arrays(shared_dir, **arrays):
+    # Guarda cada array como .npy y devuelve rutas y hashes de contenido; los workers
+    # los abren con mmap_mode="r" en lugar de recibir una copia serializada
+    paths, hashes = {}, {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        hashes[name] = joblib.hash(array)
+        paths[name] = str(Path(shared_dir) / f"{name}.npy")
+        np.save(paths[name], array)
+    return paths, hashes
+
+
+def model_key(model):
+    return f"{type(model).__name__}_{joblib.hash(model.get_params())}"
+
+
+def _fit_fold(model, paths, train_idx, valid_idx, cache_path):
+    if os.path.exists(cache_path):
+        cached = np.load(cache_path)
+        return cached["valid_proba"], cached["test_proba"], True
+
+    X = np.load(paths["X"], mmap_mode="r")
+    y = np.load(paths["y"], mmap_mode="r")
+    X_test = np.load(paths["X_test"], mmap_mode="r")
+
+    fold_model = clone(model).fit(X[train_idx], y[train_idx])
+    valid_proba = fold_model.predict_proba(X[valid_idx])[:, 1]
+    test_proba = fold_model.predict_proba(X_test)[:, 1]
+
+    tmp_path = f"{cache_path}.tmp.npz"
+    np.savez(tmp_path, valid_proba=valid_proba, test_proba=test_proba)
+    os.replace(tmp_path, cache_path)
+    return valid_proba, test_proba, False
+
+
+def compare_models(models, X, y, X_test, cv, n_jobs=-1, cache_dir=CACHE_DIR):
+    y = np.asarray(y)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Memmaps de versiones anteriores, con nombre por hash y sin limpieza
+    shutil.rmtree(cache_dir / "shared", ignore_errors=True)
+    folds = list(cv.split(np.zeros(len(y)), y))
+
+    with tempfile.TemporaryDirectory(prefix="shared-", dir=cache_dir) as shared_dir:
+        paths, hashes = share_arrays(shared_dir, X=X, y=y, X_test=X_test)
+        data_key = joblib.hash((hashes["X"], hashes["y"], hashes["X_test"]))
+
+        tasks = []
+        for name, model in models.items():
+            for fold, (train_idx, valid_idx) in enumerate(folds):
+                key = joblib.hash((data_key, model_key(model), fold, joblib.hash(train_idx)))
+                cache_path = str(cache_dir / f"{key}.npz")
+                tasks.append((name, fold, model, train_idx, valid_idx, cache_path))
+
+        # Un thread por worker para no sobresuscribir CPUs (XGBoost/BLAS usan todos por defecto)
+        with parallel_config(backend="loky", inner_max_num_threads=1):
+            outputs = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_fold)(model, paths, train_idx, valid_idx, cache_path)
+                for _, _, model, train_idx, valid_idx, cache_path in tasks
+            )
+
+    results = {}
+    for (name, fold, _, _, valid_idx, _), (valid_proba, test_proba, cached) in zip(tasks, outputs):
+        result = results.setdefault(name, {"fold_auc": [], "oof_proba": np.zeros(len(y)),
+                                           "test_proba": [], "cached_folds": 0})
+        result["fold_auc"].append(roc_auc_score(y[valid_idx], valid_proba))
+        result["oof_proba"][valid_idx] = valid_proba
+        result["test_proba"].append(test_proba)
+        result["cached_folds"] += int(cached)
+
+    for result in results.values():
+        result["cv_auc"] = float(np.mean(result["fold_auc"]))
+        result["cv_auc_std"] = float(np.std(result["fold_auc"]))
+        # Predicción de test como promedio de los modelos de cada fold (sin re-entrenar)
+        result["test_proba"] = np.mean(result["test_proba"], axis=0)
+    return results
@@ -0,0 +1,255 @@
+import datetime
+import errno
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from src.storage import file_hash
+
+# Registro local de modelos: cada versión es un directorio inmutable
+# (outputs/models/registry/v0001, v0002, ...) con el booster en formato nativo de
+# XGBoost (model.ubj, se carga sin unpickling) y metadata.json con features, hash
+# de los datos, AUC de CV/test y parámetros. current.json apunta a la versión en
+# uso y guarda las anteriores para rollback; se reemplaza atómicamente (tmp +
+# os.replace), así un lector ve siempre la versión vieja o la nueva completa.
+#
+# Los modelos cargados quedan en un LRU en memoria por (versión, tipo): un
+# proceso que pide "current" varias veces sólo relee el puntero (un JSON chico).
+
+REGISTRY_DIR = "outputs/models/registry"
+CURRENT = "current"
+POINTER_NAME = "current.json"
+MODEL_NAME = "model.ubj"
+METADATA_NAME = "metadata.json"
+# Modelo serializado con joblib por versiones anteriores del pipeline
+LEGACY_MODEL_PATH = "outputs/models/xgboost_tuned_model.pkl"
+MAX_LOADED_MODELS = int(os.environ.get("MODEL_CACHE_SIZE", "4"))
+# Intentos de registrar con el siguiente número libre antes de abandonar
+MAX_REGISTER_ATTEMPTS = 20
+
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def _jsonable(value):
+    # Tipos de NumPy a nativos y NaN a null (JSON estricto)
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _data_hash(data_path):
+    # Mismo criterio que load_dataset: el parquet si existe, si no el CSV
+    path = Path(data_path).with_suffix(".parquet")
+    if not path.exists():
+        path = path.with_suffix(".csv")
+    return {"path": str(path), "sha256": file_hash(path)}
+
+
+def version_dir(version, registry_dir=REGISTRY_DIR):
+    return Path(registry_dir) / version
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    registry_dir = Path(registry_dir)
+    if not registry_dir.exists():
+        return []
+    return sorted(p.name for p in registry_dir.iterdir()
+                  if p.is_dir() and p.name.startswith("v") and (p / METADATA_NAME).exists())
+
+
+def _next_version(registry_dir):
+    # Cualquier directorio vNNNN ocupa su número, aunque esté incompleto (restos de un fallo)
+    numbers = [int(p.name[1:]) for p in Path(registry_dir).iterdir()
+               if p.is_dir() and p.name.startswith("v") and p.name[1:].isdigit()]
+    return f"v{max(numbers, default=0) + 1:04d}"
+
+
+def read_metadata(version=CURRENT, registry_dir=REGISTRY_DIR):
+    resolved = resolve_version(version, registry_dir)
+    if resolved is None:
+        raise FileNotFoundError(f"No hay versión '{version}' en {registry_dir}")
+    return _read_json(version_dir(resolved, registry_dir) / METADATA_NAME)
+
+
+def register_model(model, data_path=None, metrics=None, params=None, extra=None, registry_dir=REGISTRY_DIR,
+                   promote=False):
+    # Guarda el modelo como nueva versión (inmutable) y devuelve su nombre
+    registry_dir = Path(registry_dir)
+    registry_dir.mkdir(parents=True, exist_ok=True)
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+
+    # Se escribe en un directorio temporal y se renombra: una versión visible está siempre completa
+    tmp_dir = registry_dir / f".tmp-{uuid.uuid4().hex}"
+    tmp_dir.mkdir()
+    try:
+        # save_model del wrapper de sklearn guarda además sus atributos (clases, tipo de estimador)
+        model.save_model(tmp_dir / MODEL_NAME)
+        metadata = {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "model_class": type(model).__name__,
+            "format": MODEL_NAME.rsplit(".", 1)[1],
+            "model_sha256": file_hash(tmp_dir / MODEL_NAME),
+            "feature_names": list(booster.feature_names or []),
+            "n_features": booster.num_features(),
+            "n_trees": booster.num_boosted_rounds(),
+            "data": _data_hash(data_path) if data_path is not None else None,
+            "metrics": _jsonable(metrics or {}),
+            "params": _jsonable(params if params is not None else getattr(model, "get_params", dict)()),
+            **_jsonable(extra or {}),
+        }
+
+        for _ in range(MAX_REGISTER_ATTEMPTS):
+            version = _next_version(registry_dir)
+            metadata["version"] = version
+            _write_json(tmp_dir / METADATA_NAME, metadata)
+            try:
+                # rename falla si otro proceso ya creó esa versión (directorio no vacío)
+                os.rename(tmp_dir, version_dir(version, registry_dir))
+                break
+            except OSError as e:
+                if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                    raise
+        else:
+            raise RuntimeError(f"No se pudo registrar el modelo en {registry_dir} tras "
+                               f"{MAX_REGISTER_ATTEMPTS} intentos (versiones creadas en paralelo)")
+    except BaseException:
+        # Un fallo a mitad de camino no deja directorios .tmp-* en el registro
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if promote:
+        promote_version(version, registry_dir)
+    return version
+
+
+def _read_pointer(registry_dir):
+    path = Path(registry_dir) / POINTER_NAME
+    if not path.exists():
+        return {"version": None, "history": []}
+    return _read_json(path)
+
+
+def current_version(registry_dir=REGISTRY_DIR):
+    return _read_pointer(registry_dir)["version"]
+
+
+def resolve_version(version=CURRENT, registry_dir=REGISTRY_DIR):
+    if version == CURRENT:
+        return current_version(registry_dir)
+    if not (version_dir(version, registry_dir) / METADATA_NAME).exists():
+        raise FileNotFoundError(f"No existe la versión {version} en {registry_dir}")
+    return version
+
+
+def promote_version(version, registry_dir=REGISTRY_DIR):
+    # La versión en uso pasa al historial; el puntero se reemplaza de una vez
+    resolve_version(version, registry_dir)
+    pointer = _read_pointer(registry_dir)
+    if pointer["version"] == version:
+        return version
+    history = pointer["history"] + ([pointer["version"]] if pointer["version"] else [])
+    _write_json(Path(registry_dir) / POINTER_NAME, {
+        "version": version,
+        "history": history,
+        "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    })
+    return version
+
+
+def rollback(registry_dir=REGISTRY_DIR):
+    # Vuelve a la versión promovida antes de la actual
+    pointer = _read_pointer(registry_dir)
+    if not pointer["history"]:
+        raise RuntimeError("No hay una versión anterior a la que volver")
+    version = pointer["history"][-1]
+    _write_json(Path(registry_dir) / POINTER_NAME, {
+        "version": version,
+        "history": pointer["history"][:-1],
+        "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    })
+    return version
+
+
+def model_source(version=CURRENT, registry_dir=REGISTRY_DIR, fallback_path=LEGACY_MODEL_PATH):
+    # Archivo que cambia cuando cambia el modelo elegido (puntero, versión fija o
+    # pkl legado): su mtime sirve como clave de caché para los consumidores
+    if version == CURRENT and current_version(registry_dir) is None:
+        return Path(fallback_path)
+    if version == CURRENT:
+        return Path(registry_dir) / POINTER_NAME
+    return version_dir(version, registry_dir) / METADATA_NAME
+
+
+def _load_native(path, kind):
+    if kind == "booster":
+        import xgboost as xgb
+        return xgb.Booster(model_file=str(path))
+    from xgboost import XGBClassifier
+    model = XGBClassifier()
+    model.load_model(path)
+    return model
+
+
+def load_model(version=CURRENT, registry_dir=REGISTRY_DIR, kind="classifier", fallback_path=LEGACY_MODEL_PATH):
+    # kind="classifier": XGBClassifier (predict_proba, SHAP); kind="booster": sólo
+    # el Booster, para el motor de inferencia. Sin versión actual se usa el pkl legado
+    if kind not in ("classifier", "booster"):
+        raise ValueError(f"Tipo de modelo desconocido: {kind}")
+    resolved = resolve_version(version, registry_dir)
+    if resolved is None:
+        if fallback_path is None or not os.path.exists(fallback_path):
+            raise FileNotFoundError(f"No hay modelo promovido en {registry_dir} ni modelo en {fallback_path}")
+        key = ("legacy", os.path.abspath(fallback_path), os.path.getmtime(fallback_path), kind)
+    else:
+        key = (os.path.abspath(registry_dir), resolved, kind)
+
+    with _loaded_lock:
+        if key in _loaded:
+            _loaded.move_to_end(key)
+            return _loaded[key]
+
+    if resolved is None:
+        model = joblib.load(fallback_path)
+        model = model.get_booster() if kind == "booster" else model
+    else:
+        model = _load_native(version_dir(resolved, registry_dir) / MODEL_NAME, kind)
+
+    with _loaded_lock:
+        _loaded[key] = model
+        _loaded.move_to_end(key)
+        while len(_loaded) > MAX_LOADED_MODELS:
+            _loaded.popitem(last=False)
+    return model
+
+
+def clear_loaded_models():
+    with _loaded_lock:
+        _loaded.clear()
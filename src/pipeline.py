@@ -0,0 +1,242 @@
+import ast
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from src.storage import file_hash, read_cache, update_cache
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CACHE_PATH = "outputs/.pipeline_cache.json"
+
+# Declaración de etapas: cada una indica la función a ejecutar ("modulo:funcion"),
+# los archivos que lee y escribe y sus parámetros. El código del que depende se
+# deduce de los imports del módulo de la etapa (code_dependencies) y las
+# dependencias entre etapas, de inputs/outputs. Las rutas son relativas a ROOT_DIR.
+# Las etapas que comparten un recurso (p.ej. el estado global de pyplot) no se
+# ejecutan en paralelo.
+STAGES = [
+    {
+        "name": "unify",
+        "target": "scripts.01_eda:build_unified_dataset",
+        "inputs": ["data/raw/demographics.csv", "data/raw/products.csv", "data/raw/transactions.csv"],
+        "outputs": ["data/processed/clientes_unificados.parquet"],
+    },
+    {
+        "name": "sparse_features",
+        "target": "scripts.sparse_features:run_sparse_features",
+        "inputs": ["data/raw/demographics.csv", "data/raw/products.csv", "data/raw/transactions.csv"],
+        "outputs": [
+            "data/processed/sparse_features.npz", "data/processed/sparse_customer_ids.parquet",
+            "outputs/models/sparse_feature_assembler.pkl",
+        ],
+    },
+    {
+        "name": "eda_figures",
+        "target": "scripts.01_eda:render_eda_figures",
+        "inputs": ["data/processed/clientes_unificados.parquet"],
+        "outputs": [
+            "outputs/figures/gasto_vs_ocupacion_top15.png",
+            "outputs/figures/distribucion_num_productos.png",
+            "outputs/figures/histogramas_numericos.png",
+            "outputs/figures/gasto_vs_ingreso.png",
+            "outputs/figures/heatmap_correlaciones.png",
+        ],
+    },
+    {
+        "name": "user_aggregates",
+        "target": "scripts.update_user_aggregates:run_update",
+        "inputs": ["data/raw/transactions.csv"],
+        "outputs": ["data/processed/user_aggregates.parquet"],
+    },
+    {
+        "name": "features",
+        "target": "scripts.02_feature_engineering:run_feature_engineering",
+        "inputs": [
+            "data/processed/clientes_unificados.parquet", "data/raw/transactions.csv",
+            "data/processed/user_aggregates.parquet",
+        ],
+        "outputs": [
+            "data/processed/final_dataset.parquet", "data/processed/customer_ids.parquet",
+            "data/processed/window_features.parquet", "outputs/models/feature_transformer.pkl",
+        ],
+    },
+    {
+        "name": "modeling",
+        "target": "scripts.03_modeling:run_modeling",
+        "inputs": ["data/processed/final_dataset.parquet"],
+        "outputs": [
+            "outputs/models/xgboost_tuned_model.pkl",
+            "outputs/models/registry/current.json",
+            "outputs/figures/roc_logistic_regression.png",
+            "outputs/figures/roc_random_forest.png",
+            "outputs/figures/roc_xgboost.png",
+            "outputs/figures/shap_summary_bar_xgboost_tuned.png",
+            "outputs/figures/shap_summary_detail_xgboost_tuned.png",
+        ],
+        "resources": ["pyplot"],
+    },
+    {
+        "name": "insights",
+        "target": "scripts.04_business_insights:run_business_insights",
+        "inputs": ["data/processed/final_dataset.parquet", "outputs/models/registry/current.json"],
+        "outputs": [
+            "reports/insights/distribucion_segmentos.png",
+            "reports/insights/edad_promedio_segmentos.png",
+            "reports/insights/gasto_promedio_segmentos.png",
+            "reports/insights/productos_promedio_segmentos.png",
+            "reports/insights/shap_summary.png",
+            "data/processed/propensity_scores.parquet",
+        ],
+    },
+    {
+        "name": "scoring",
+        "target": "scripts.batch_score:run_batch_scoring",
+        "inputs": [
+            "data/processed/final_dataset.parquet", "data/processed/customer_ids.parquet",
+            "outputs/models/registry/current.json",
+        ],
+        "outputs": ["data/processed/customer_scores.parquet"],
+    },
+    {
+        "name": "report",
+        "target": "reports.report_generator:generate_pdf_report",
+        "inputs": [
+            "data/processed/final_dataset.parquet",
+            "outputs/models/registry/current.json",
+            "outputs/figures/gasto_vs_ocupacion_top15.png",
+            "outputs/figures/distribucion_num_productos.png",
+            "outputs/figures/histogramas_numericos.png",
+            "outputs/figures/gasto_vs_ingreso.png",
+            "outputs/figures/heatmap_correlaciones.png",
+            "outputs/figures/roc_logistic_regression.png",
+            "outputs/figures/roc_random_forest.png",
+            "outputs/figures/roc_xgboost.png",
+            "outputs/figures/shap_summary_bar_xgboost_tuned.png",
+            "outputs/figures/shap_summary_detail_xgboost_tuned.png",
+            "reports/insights/distribucion_segmentos.png",
+            "reports/insights/edad_promedio_segmentos.png",
+            "reports/insights/gasto_promedio_segmentos.png",
+            "reports/insights/productos_promedio_segmentos.png",
+            "reports/insights/shap_summary.png",
+        ],
+        "outputs": ["reports/final_report.pdf"],
+        "params": {
+            "data_path": "data/processed/final_dataset.parquet",
+            "model_version": "current",
+        },
+    },
+]
+
+
+def module_path(module_name):
+    path = ROOT_DIR.joinpath(*module_name.split("."))
+    for candidate in (path.with_suffix(".py"), path / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def code_dependencies(module_name):
+    # Archivos del repo que el módulo importa (también dentro de funciones), recursivamente;
+    # los imports de librerías externas no tienen archivo en ROOT_DIR y se ignoran
+    seen = set()
+    pending = [module_name]
+    while pending:
+        path = module_path(pending.pop())
+        if path is None or path in seen:
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_bytes())):
+            if isinstance(node, ast.Import):
+                pending += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                # "from src import x" puede importar el módulo src.x
+                pending += [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+    return sorted(path.relative_to(ROOT_DIR).as_posix() for path in seen)
+
+
+def stage_key(stage):
+    # Hash de contenido de inputs + código + parámetros de la etapa
+    digest = hashlib.sha256()
+    code = code_dependencies(stage["target"].split(":")[0])
+    for path in sorted(stage["inputs"]) + code:
+        digest.update(path.encode())
+        digest.update(file_hash(ROOT_DIR / path).encode())
+    digest.update(json.dumps(stage.get("params", {}), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def stage_dependencies(stages):
+    producers = {out: s["name"] for s in stages for out in s["outputs"]}
+    return {
+        s["name"]: {producers[inp] for inp in s["inputs"] if inp in producers and producers[inp] != s["name"]}
+        for s in stages
+    }
+
+
+def load_target(target):
+    module_name, func_name = target.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_pipeline(stages=STAGES, force=False, max_workers=2, cache_path=CACHE_PATH):
+    # Los scripts de las etapas leen y escriben con rutas relativas a la raíz del repo.
+    # No se cambia el cwd del proceso (lo comparten todos los threads y quien llama)
+    if Path.cwd().resolve() != ROOT_DIR:
+        raise RuntimeError(f"El pipeline se ejecuta desde la raíz del repositorio ({ROOT_DIR}), no desde {Path.cwd()}")
+    cache_path = ROOT_DIR / cache_path
+    # Las etapas corren en threads: backend sin interfaz gráfica para matplotlib
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    cache = read_cache(cache_path)
+    resource_locks = {r: threading.Lock() for s in stages for r in s.get("resources", [])}
+    deps = stage_dependencies(stages)
+
+    def run_stage(stage):
+        name = stage["name"]
+        key = stage_key(stage)
+        if not force and cache.get(name) == key and all((ROOT_DIR / p).exists() for p in stage["outputs"]):
+            print(f"⏭️  {name}: sin cambios, se omite")
+            return "skipped", 0.0
+
+        # Orden fijo al tomar los recursos para evitar deadlocks
+        locks = [resource_locks[r] for r in sorted(stage.get("resources", []))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            print(f"\n🚀 Ejecutando {name}")
+            start = time.perf_counter()
+            load_target(stage["target"])(**stage.get("params", {}))
+            elapsed = time.perf_counter() - start
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        missing = [p for p in stage["outputs"] if not (ROOT_DIR / p).exists()]
+        if missing:
+            raise RuntimeError(f"❌ {name} no generó: {', '.join(missing)}")
+
+        update_cache(cache_path, {name: key})
+        return "ran", elapsed
+
+    results = {}
+    pending = {s["name"]: s for s in stages}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if deps[name] <= results.keys():
+                    running[pool.submit(run_stage, stage)] = name
+                    del pending[name]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+
+    for name, (status, elapsed) in results.items():
+        print(f"  {name:<12} {status:<8} {elapsed:6.1f}s")
+    return results
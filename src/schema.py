@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+# Esquema de lectura de los datos crudos: sólo se leen las columnas que usa el
+# pipeline (transaction_id y description quedan fuera), los textos repetidos se
+# cargan como categóricos, los user_id como categórico compartido entre tablas
+# (códigos enteros) y los montos como float32.
+
+SCHEMAS = {
+    "demographics": {
+        "user_id": "user_id",
+        "age": "int16",
+        "income_range": "category",
+        "risk_profile": "category",
+        "occupation": "category",
+    },
+    "products": {
+        "user_id": "user_id",
+        "product_type": "category",
+        "contract_date": "datetime",
+    },
+    "transactions": {
+        "user_id": "user_id",
+        "date": "datetime",
+        "amount": "float32",
+        "merchant_category": "category",
+    },
+}
+
+ARROW_TYPES = {
+    "user_id": pa.dictionary(pa.int32(), pa.string()),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "int16": pa.int16(),
+    "float32": pa.float32(),
+    "datetime": pa.timestamp("ns"),
+}
+
+
+def read_table(path, name, columns=None):
+    schema = SCHEMAS[name]
+    columns = columns or list(schema)
+    path = Path(path)
+
+    if path.suffix == ".parquet":
+        df = pq.read_table(path, columns=columns).to_pandas()
+    else:
+        # El parser de Arrow descarta las columnas no pedidas sin materializarlas
+        convert_options = pv.ConvertOptions(
+            include_columns=columns,
+            column_types={col: ARROW_TYPES[schema[col]] for col in columns},
+        )
+        df = pv.read_csv(path, convert_options=convert_options).to_pandas()
+
+    for col in columns:
+        kind = schema[col]
+        if kind in ("user_id", "category"):
+            # Categorías ordenadas alfabéticamente: groupby/pivot recorren los grupos
+            # en el mismo orden que con texto plano (desempates, orden de columnas)
+            df[col] = df[col].astype("category")
+            df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+        elif kind == "datetime":
+            df[col] = pd.to_datetime(df[col])
+        else:
+            df[col] = df[col].astype(kind)
+    return df
+
+
+def share_user_ids(*frames):
+    # Mismas categorías (ordenadas) de user_id en todas las tablas: los merges y
+    # groupby trabajan sobre los códigos enteros
+    categories = union_categoricals([frame["user_id"] for frame in frames], ignore_order=True).categories
+    categories = categories.sort_values()
+    for frame in frames:
+        frame["user_id"] = frame["user_id"].cat.set_categories(categories)
+    return frames
+
+
+def sorted_codes(values):
+    # Códigos enteros y categorías en orden alfabético (el mismo que groupby sobre
+    # texto); con categóricos se reutilizan los códigos existentes. Nulos -> -1
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values, sort=True)
+
+
+def decode_categoricals(df):
+    # Las tablas por usuario (chicas) vuelven a texto plano: mismo formato que
+    # antes para clientes_unificados, el transformer y el dashboard
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def downcast_floats(df):
+    # Features de modelado en float32 (XGBoost trabaja internamente en float32)
+    float_cols = df.select_dtypes("float64").columns
+    return df.astype({col: "float32" for col in float_cols})
+
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
@@ -0,0 +1,90 @@
+import json
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Almacén de valores SHAP: se calculan una sola vez por (modelo, datos), por
+# bloques de filas para acotar memoria, y se guardan en un .npy que se abre
+# memmapeado. Junto a la matriz se guardan agregados globales (media de |SHAP|)
+# que se van acumulando bloque a bloque.
+
+STORE_DIR = "outputs/cache/shap"
+
+
+def model_hash(model):
+    if hasattr(model, "get_booster"):
+        return joblib.hash(bytes(model.get_booster().save_raw(raw_format="ubj")))
+    return joblib.hash(model)
+
+
+def data_hash(X):
+    return joblib.hash((list(X.columns), X.to_numpy()))
+
+
+class ShapStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "meta.json") as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        self.expected_value = self.meta["expected_value"]
+        self.mean_abs = pd.Series(self.meta["mean_abs"], index=self.columns).sort_values(ascending=False)
+        self._values = None
+
+    @property
+    def values(self):
+        # Matriz completa memmapeada: sólo se leen del disco las filas que se usan
+        if self._values is None:
+            self._values = np.load(self.path / "values.npy", mmap_mode="r")
+        return self._values
+
+    def explain(self, index):
+        return pd.Series(np.asarray(self.values[index], dtype=np.float64), index=self.columns)
+
+    def __len__(self):
+        return self.meta["n_rows"]
+
+
+def compute_shap_store(model, X, path, chunk_size=10000, dtype="float32"):
+    import shap
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    explainer = shap.TreeExplainer(model)
+
+    tmp_values = path / "values.tmp.npy"
+    values = np.lib.format.open_memmap(tmp_values, mode="w+", dtype=dtype, shape=X.shape)
+    abs_sum = np.zeros(X.shape[1])
+    for start in range(0, len(X), chunk_size):
+        chunk_values = explainer.shap_values(X.iloc[start:start + chunk_size])
+        values[start:start + len(chunk_values)] = chunk_values
+        abs_sum += np.abs(chunk_values).sum(axis=0)
+    values.flush()
+    del values
+    os.replace(tmp_values, path / "values.npy")
+
+    expected_value = np.ravel(explainer.expected_value)[-1]
+    meta = {
+        "columns": list(X.columns),
+        "n_rows": len(X),
+        "dtype": dtype,
+        "expected_value": float(expected_value),
+        "mean_abs": (abs_sum / max(len(X), 1)).tolist(),
+    }
+    # meta.json se publica completo (tmp + os.replace): get_shap_store lo usa como marca de store listo
+    tmp_meta = path / f"meta.{os.getpid()}.tmp"
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, path / "meta.json")
+    return ShapStore(path)
+
+
+def get_shap_store(model, X, store_dir=STORE_DIR, chunk_size=10000, dtype="float32"):
+    path = Path(store_dir) / f"{model_hash(model)[:16]}_{data_hash(X)[:16]}"
+    if (path / "meta.json").exists() and (path / "values.npy").exists():
+        return ShapStore(path)
+    return compute_shap_store(model, X, path, chunk_size=chunk_size, dtype=dtype)
+
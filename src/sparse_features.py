@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.schema import sorted_codes
+
+# Armado de features en matrices dispersas (CSR, float32) cliente x columna:
+# one-hot de los categóricos demográficos, tenencia de productos, antigüedad de
+# cada producto (días desde contract_date) y participación del gasto por
+# merchant_category. Cada bloque se construye directo desde códigos enteros
+# (sin pivot_table ni get_dummies), así la memoria crece con los valores no nulos
+# y no con la cantidad de categorías.
+#
+# XGBoost recibe la CSR tal cual. Ojo: para XGBoost una celda ausente en una
+# matriz dispersa es "faltante" (sigue default_left), no un 0; por eso el modelo
+# se entrena y se puntúa siempre con la misma representación.
+
+TARGET_PRODUCT = "insurance"
+DEMOGRAPHIC_CATEGORICALS = ["income_range", "risk_profile", "occupation"]
+NUMERIC_COLS = ["age"]
+
+
+def _rows(user_ids, users):
+    # Fila de cada registro en el orden de clientes (users); -1 si no está
+    return users.get_indexer(pd.Index(np.asarray(user_ids, dtype=object)))
+
+
+def _csr(rows, cols, data, shape):
+    # COO -> CSR suma los duplicados (misma celda): conteos y sumas salen de acá
+    keep = (rows >= 0) & (cols >= 0)
+    return sparse.csr_matrix((np.asarray(data, dtype=np.float32)[keep], (rows[keep], cols[keep])),
+                             shape=shape, dtype=np.float32)
+
+
+def _vocabulary_codes(values, vocabulary):
+    # Código de cada valor dentro del vocabulario aprendido en fit (-1 si no está)
+    codes, uniques = sorted_codes(values)
+    mapping = pd.Index(vocabulary).get_indexer(uniques)
+    return np.where(codes >= 0, mapping[codes], -1)
+
+
+def one_hot(values, vocabulary, rows, n_rows):
+    cols = _vocabulary_codes(values, vocabulary)
+    return _csr(rows, cols, np.ones(len(cols)), (n_rows, len(vocabulary)))
+
+
+def product_holdings(products, users, product_types):
+    rows = _rows(products["user_id"], users)
+    cols = _vocabulary_codes(products["product_type"], product_types)
+    return _csr(rows, cols, np.ones(len(cols)), (len(users), len(product_types)))
+
+
+def product_tenure(products, users, product_types, reference_date):
+    # Días desde el primer contrato de cada (cliente, producto)
+    rows = _rows(products["user_id"], users)
+    cols = _vocabulary_codes(products["product_type"], product_types)
+    tenure = (reference_date - pd.to_datetime(products["contract_date"])).dt.days.to_numpy()
+    valid = (rows >= 0) & (cols >= 0)
+    rows, cols, tenure = rows[valid], cols[valid], tenure[valid]
+
+    key = rows.astype(np.int64) * len(product_types) + cols
+    order = np.lexsort((-tenure, key))
+    _, first = np.unique(key[order], return_index=True)
+    first = order[first]
+    return _csr(rows[first], cols[first], tenure[first], (len(users), len(product_types)))
+
+
+def category_spend_shares(transactions, users, categories):
+    rows = _rows(transactions["user_id"], users)
+    cols = _vocabulary_codes(transactions["merchant_category"], categories)
+    amount = np.nan_to_num(transactions["amount"].to_numpy(dtype=np.float64))
+    spend = _csr(rows, cols, amount, (len(users), len(categories)))
+
+    # Total por cliente sobre todas las categorías (incluidas las no vistas en fit)
+    valid = rows >= 0
+    totals = np.bincount(rows[valid], weights=amount[valid], minlength=len(users))
+    scale = np.divide(1.0, totals, out=np.zeros(len(users)), where=totals != 0)
+    return sparse.diags(scale.astype(np.float32)) @ spend
+
+
+class SparseFeatureAssembler:
+    # Igual que FeatureTransformer: fit fija el vocabulario de cada bloque (y con
+    # él las columnas); transform arma la CSR con ese layout para clientes nuevos.
+
+    def __init__(self, target_product=TARGET_PRODUCT):
+        self.target_product = target_product
+
+    def fit(self, demographics, products, transactions, reference_date=None):
+        self.reference_date_ = reference_date
+        self.vocabularies_ = {var: list(sorted_codes(demographics[var])[1]) for var in DEMOGRAPHIC_CATEGORICALS}
+        # El producto objetivo queda fuera de las features (sería fuga de la etiqueta)
+        self.product_types_ = [p for p in sorted_codes(products["product_type"])[1] if p != self.target_product]
+        self.categories_ = list(sorted_codes(transactions["merchant_category"])[1])
+
+        self.feature_names_ = (
+            list(NUMERIC_COLS)
+            + [f"{var}_{value}" for var in DEMOGRAPHIC_CATEGORICALS for value in self.vocabularies_[var]]
+            + [f"has_{p}" for p in self.product_types_]
+            + [f"tenure_days_{p}" for p in self.product_types_]
+            + [f"spend_share_{c}" for c in self.categories_]
+        )
+        return self
+
+    def fit_transform(self, demographics, products, transactions, reference_date=None):
+        return self.fit(demographics, products, transactions, reference_date).transform(
+            demographics, products, transactions)
+
+    def transform(self, demographics, products, transactions, reference_date=None):
+        if reference_date is None:
+            reference_date = self.reference_date_
+        if reference_date is None:
+            reference_date = transactions["date"].max() + pd.Timedelta(days=1)
+
+        # Una fila por cliente, en el orden de demographics
+        users = pd.Index(np.asarray(demographics["user_id"], dtype=object))
+        rows = np.arange(len(users))
+        blocks = [sparse.csr_matrix(demographics[NUMERIC_COLS].to_numpy(dtype=np.float32))]
+        blocks += [one_hot(demographics[var], self.vocabularies_[var], rows, len(users))
+                   for var in DEMOGRAPHIC_CATEGORICALS]
+        blocks += [
+            product_holdings(products, users, self.product_types_),
+            product_tenure(products, users, self.product_types_, reference_date),
+            category_spend_shares(transactions, users, self.categories_),
+        ]
+        return sparse.hstack(blocks, format="csr", dtype=np.float32)
+
+    def target(self, demographics, products):
+        users = pd.Index(np.asarray(demographics["user_id"], dtype=object))
+        holders = products.loc[products["product_type"] == self.target_product, "user_id"]
+        return users.isin(np.asarray(holders, dtype=object)).astype(int)
@@ -0,0 +1,93 @@
+import fcntl
+import hashlib
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Formato intermedio por defecto entre etapas del pipeline: Parquet (columnar y tipado).
+# EXPORT_CSV=1 escribe además una copia CSV para compatibilidad con herramientas externas.
+EXPORT_CSV = os.environ.get("EXPORT_CSV", "0") == "1"
+
+
+def save_dataset(df, path, export_csv=None):
+    path = Path(path).with_suffix(".parquet")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, path)
+
+    if export_csv if export_csv is not None else EXPORT_CSV:
+        df.to_csv(path.with_suffix(".csv"), index=False)
+    return path
+
+
+def load_dataset(path, columns=None, memory_map=True):
+    path = Path(path)
+    parquet_path = path.with_suffix(".parquet")
+
+    if parquet_path.exists():
+        # Lectura con proyección de columnas y memory map: sólo se leen las columnas pedidas
+        table = pq.read_table(parquet_path, columns=columns, memory_map=memory_map)
+        return table.to_pandas()
+
+    # Fallback a CSV (datasets generados por versiones anteriores del pipeline)
+    return pd.read_csv(path.with_suffix(".csv"), usecols=columns)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    # sha256 del contenido, leído por bloques (claves de caché y metadata del registro)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_columns(path):
+    # Esquema sin leer datos (útil para proyectar columnas antes de cargar)
+    parquet_path = Path(path).with_suffix(".parquet")
+    if parquet_path.exists():
+        return pq.read_schema(parquet_path).names
+    return pd.read_csv(Path(path).with_suffix(".csv"), nrows=0).columns.tolist()
+
+
+# ----------------------------
+# Cachés de claves en JSON (etapas del pipeline, figuras)
+# ----------------------------
+
+def read_cache(cache_path):
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)
+    return {}
+
+
+@contextmanager
+def _cache_lock(cache_path):
+    # flock sobre un archivo aparte: excluye a threads y procesos que actualicen el mismo caché
+    with open(f"{cache_path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def update_cache(cache_path, entries):
+    # Lectura, merge y reemplazo atómico bajo lock: sólo se pisan las claves de `entries`,
+    # las que otra etapa guardó mientras tanto se conservan
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with _cache_lock(cache_path):
+        cache = read_cache(cache_path)
+        cache.update(entries)
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, cache_path)
+    return cache
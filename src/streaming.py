@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+from src.data_preparation import assemble_customer_table, generate_product_flags
+from src.incremental import aggregate_batch, combine_states, empty_state, table_rows
+from src.instrumentation import instrument
+from src.schema import SCHEMAS, read_table, share_user_ids
+
+# Ingesta por bloques para archivos de transacciones más grandes que la memoria:
+# el CSV se lee en bloques de bytes de tamaño fijo (parseados con Arrow) y cada
+# bloque se acumula en agregados parciales por usuario, que se combinan al final.
+# El pico de memoria depende de memory_mb y de la cantidad de usuarios, no del
+# tamaño del archivo. demographics y products (una fila por usuario/producto) se
+# leen completos.
+#
+# Para la tabla de clientes el universo de usuarios es demographics (merge por
+# izquierda), así que los parciales son arrays densos por código de usuario y
+# los bloques nunca pasan por pandas (códigos con Arrow, sumas con bincount).
+
+MEMORY_MB = 256
+# Bytes aproximados por fila de un agregado parcial de src/incremental (clave de texto + valores)
+STATE_ROW_BYTES = 200
+
+# Texto plano en lugar de diccionarios (cada bloque traería el suyo) y montos en
+# float64, igual que pd.read_csv: el resultado coincide con merge_datasets
+STREAM_TYPES = {
+    "user_id": pa.string(),
+    "category": pa.string(),
+    "int16": pa.int16(),
+    "float32": pa.float64(),
+    "datetime": pa.timestamp("ns"),
+}
+
+
+def stream_budget(memory_mb=MEMORY_MB):
+    # El bloque de texto, su tabla Arrow y sus columnas en NumPy ocupan ~3x el texto:
+    # 1/4 del presupuesto para el bloque y 1/4 para los parciales pendientes
+    block_size_mb = max(memory_mb / 4, 1 / 16)
+    max_partial_rows = max(int(memory_mb * 1024 ** 2 / 4 / STATE_ROW_BYTES), 1)
+    return block_size_mb, max_partial_rows
+
+
+def _iter_csv_blocks(path, block_size, start=0, end=None):
+    # Bloques de bytes cortados en fin de línea, cada uno con el encabezado. Si un
+    # bloque queda con comillas sin cerrar (campo con salto de línea) se extiende.
+    # No se usa pv.open_csv: su lectura anticipada puede cargar gran parte del archivo.
+    # start/end (en fin de línea) acotan la lectura, p. ej. a lo agregado al final
+    with open(path, "rb") as f:
+        header = f.readline()
+        if start > f.tell():
+            f.seek(start)
+        while True:
+            size = block_size if end is None else min(block_size, end - f.tell())
+            block = f.read(size) if size > 0 else b""
+            if not block:
+                return
+            if not block.endswith(b"\n"):
+                block += f.readline()
+            while block.count(b'"') % 2:
+                line = f.readline()
+                if not line:
+                    break
+                block += line
+            yield header + block
+
+
+def iter_csv_batches(path, name, block_size_mb, columns=None, start=0, end=None):
+    schema = SCHEMAS[name]
+    columns = columns or list(schema)
+    read_options = pv.ReadOptions(use_threads=False)
+    convert_options = pv.ConvertOptions(
+        include_columns=columns,
+        column_types={col: STREAM_TYPES[schema[col]] for col in columns},
+        # Campos vacíos como nulos, igual que pd.read_csv
+        strings_can_be_null=True,
+    )
+    for block in _iter_csv_blocks(path, int(block_size_mb * 1024 ** 2), start, end):
+        table = pv.read_csv(pa.py_buffer(block), read_options=read_options, convert_options=convert_options)
+        for batch in table.combine_chunks().to_batches():
+            if batch.num_rows:
+                yield batch
+
+
+class TransactionAccumulator:
+    # Suma y conteo de montos y conteo por categoría para cada usuario de `users`;
+    # las transacciones de usuarios fuera de la lista se ignoran
+    def __init__(self, users):
+        self.users = pd.Index(np.asarray(users, dtype=object))
+        self._user_set = pa.array(self.users.to_numpy(), type=pa.string())
+        self.amount_sum = np.zeros(len(self.users))
+        self.amount_count = np.zeros(len(self.users), dtype=np.int64)
+        self.categories = []
+        self.category_counts = np.zeros((len(self.users), 0), dtype=np.int64)
+        self.rows = 0
+
+    def _category_codes(self, column):
+        encoded = column.dictionary_encode()
+        new = [value for value in encoded.dictionary.to_pylist() if value not in self.categories]
+        if new:
+            self.categories += new
+            self.category_counts = np.pad(self.category_counts, ((0, 0), (0, len(new))))
+        mapping = np.asarray([self.categories.index(value) for value in encoded.dictionary.to_pylist()] + [-1])
+        indices = encoded.indices.fill_null(len(mapping) - 1).to_numpy(zero_copy_only=False)
+        return mapping[indices]
+
+    def add(self, batch):
+        users = pc.index_in(batch.column("user_id"), value_set=self._user_set).fill_null(-1).to_numpy()
+        categories = self._category_codes(batch.column("merchant_category"))
+        amount = batch.column("amount").to_numpy(zero_copy_only=False)
+        self.rows += batch.num_rows
+
+        known = users >= 0
+        users, categories, amount = users[known], categories[known], amount[known]
+        has_amount = ~np.isnan(amount)
+        self.amount_sum += np.bincount(users[has_amount], weights=amount[has_amount], minlength=len(self.users))
+        self.amount_count += np.bincount(users[has_amount], minlength=len(self.users))
+
+        # Conteo por (usuario, categoría) sobre la matriz aplanada
+        has_category = categories >= 0
+        n_categories = len(self.categories)
+        flat = users[has_category].astype(np.int64) * n_categories + categories[has_category]
+        self.category_counts += np.bincount(flat, minlength=len(self.users) * n_categories) \
+            .reshape(len(self.users), n_categories)
+
+    def summary(self):
+        # Misma tabla que transaction_summary, sólo para usuarios con transacciones
+        order = np.argsort(self.categories, kind="stable")
+        counts = self.category_counts[:, order]
+        n_transactions = counts.sum(axis=1)
+        active = (n_transactions > 0) | (self.amount_count > 0)
+
+        # Empates: gana la categoría alfabéticamente menor (argmax devuelve la primera)
+        favorite = np.asarray(self.categories, dtype=object)[order][counts.argmax(axis=1)] \
+            if self.categories else np.full(len(self.users), None, dtype=object)
+        favorite = np.where(n_transactions > 0, favorite, None)
+        count = self.amount_count
+        return pd.DataFrame({
+            "user_id": self.users.to_numpy(),
+            "total_spent": self.amount_sum,
+            "avg_spent": np.divide(self.amount_sum, count, out=np.full(len(count), np.nan), where=count > 0),
+            "txn_count": count,
+            "favorite_category": favorite,
+        })[active].reset_index(drop=True)
+
+
+@instrument("streaming.stream_customer_table")
+def stream_customer_table(demo_path, products_path, trans_path, memory_mb=MEMORY_MB, compact=False, verbose=False):
+    # Misma tabla de clientes que load_datasets(compact=...) + merge_datasets, con
+    # las transacciones leídas por bloques
+    if compact:
+        demographics, products = share_user_ids(read_table(demo_path, "demographics"),
+                                                read_table(products_path, "products"))
+    else:
+        demographics = pd.read_csv(demo_path)
+        products = pd.read_csv(products_path)
+        products["contract_date"] = pd.to_datetime(products["contract_date"])
+
+    accumulator = TransactionAccumulator(demographics["user_id"])
+    block_size_mb, _ = stream_budget(memory_mb)
+    for batch in iter_csv_batches(trans_path, "transactions", block_size_mb,
+                                  columns=["user_id", "amount", "merchant_category"]):
+        accumulator.add(batch)
+        if verbose:
+            print(f"   {accumulator.rows:,} transacciones")
+    txn_summary = accumulator.summary()
+    if compact:
+        # Montos en float32, como read_table
+        txn_summary = txn_summary.astype({"total_spent": "float32", "avg_spent": "float32"})
+    return assemble_customer_table(demographics, txn_summary, generate_product_flags(products))
+
+
+@instrument("streaming.aggregate_transactions")
+def aggregate_transactions(path, memory_mb=MEMORY_MB, state=None, start=0, end=None):
+    # Estado de src/incremental (usuarios sin lista previa, con fechas y meses) a
+    # partir de un archivo leído por bloques; los parciales se combinan cada vez
+    # que superan el presupuesto. Devuelve el estado y las filas leídas
+    block_size_mb, max_partial_rows = stream_budget(memory_mb)
+    state = state if state is not None else empty_state()
+    partials, pending, n_rows = [], 0, 0
+    for batch in iter_csv_batches(path, "transactions", block_size_mb, start=start, end=end):
+        partial = aggregate_batch(batch.to_pandas())
+        partials.append(partial)
+        pending += table_rows(partial)
+        n_rows += batch.num_rows
+        if pending >= max_partial_rows:
+            state = combine_states([state] + partials)
+            partials, pending = [], 0
+    return combine_states([state] + partials), n_rows
@@ -0,0 +1,178 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Generador de datos sintéticos con las mismas distribuciones que data/raw:
+# se arma un perfil de los CSV originales (frecuencias de categorías, cuantiles
+# de edad/montos/fechas, combinaciones de productos y actividad por usuario) y se
+# muestrea a la escala pedida (10^4 a 10^8 transacciones), escribiendo por
+# bloques para no tener todo en memoria. Con la misma semilla y chunk_size los
+# archivos son idénticos.
+
+SOURCE_DIR = "data/raw"
+CHUNK_SIZE = 1_000_000
+
+
+def _frequencies(values):
+    counts = pd.Series(values).value_counts().sort_index()
+    return {"values": counts.index.tolist(), "p": (counts / counts.sum()).tolist()}
+
+
+def _quantiles(values, n=101):
+    return np.quantile(np.asarray(values, dtype=np.float64), np.linspace(0, 1, n)).tolist()
+
+
+def profile_raw_data(demographics, products, transactions):
+    combos = products.groupby("user_id")["product_type"].apply(lambda s: "|".join(sorted(s)))
+    users_with_products = combos.reindex(demographics["user_id"]).fillna("")
+
+    return {
+        "age": _quantiles(demographics["age"]),
+        "income_range": _frequencies(demographics["income_range"]),
+        "risk_profile": _frequencies(demographics["risk_profile"]),
+        "occupation": _frequencies(demographics["occupation"]),
+        "product_combos": _frequencies(users_with_products),
+        "contract_date": _quantiles(_epoch_days(products["contract_date"])),
+        "txn_per_user": _quantiles(transactions.groupby("user_id").size().reindex(demographics["user_id"], fill_value=0)),
+        "mean_txn_per_user": len(transactions) / max(len(demographics), 1),
+        "date": _quantiles(_epoch_days(transactions["date"])),
+        "merchant_category": _frequencies(transactions["merchant_category"]),
+        "amount": {cat: _quantiles(group) for cat, group in transactions.groupby("merchant_category")["amount"]},
+        "description": _frequencies(transactions["description"]),
+    }
+
+
+def load_profile(source_dir=SOURCE_DIR):
+    demographics = pd.read_csv(os.path.join(source_dir, "demographics.csv"))
+    products = pd.read_csv(os.path.join(source_dir, "products.csv"))
+    transactions = pd.read_csv(os.path.join(source_dir, "transactions.csv"))
+    return profile_raw_data(demographics, products, transactions)
+
+
+# ----------------------------
+# Muestreo
+# ----------------------------
+
+def _sample_quantiles(rng, quantiles, size):
+    # Inversa de la CDF empírica, interpolada entre cuantiles
+    return np.interp(rng.random(size), np.linspace(0, 1, len(quantiles)), quantiles)
+
+
+def _sample_categories(rng, freq, size):
+    values = np.asarray(freq["values"], dtype=object)
+    return values[np.searchsorted(np.cumsum(freq["p"]), rng.random(size), side="right").clip(0, len(values) - 1)]
+
+
+def _epoch_days(dates):
+    return (pd.to_datetime(dates) - pd.Timestamp("1970-01-01")).dt.days
+
+
+def _days_to_dates(days):
+    # datetime64[D] se formatea directamente como YYYY-MM-DD
+    return np.round(days).astype(np.int64).astype("datetime64[D]").astype(str)
+
+
+def _user_ids(start, stop, width):
+    return np.array([f"user_{i:0{width}d}" for i in range(start + 1, stop + 1)], dtype=object)
+
+
+def _uuid_strings(rng, size):
+    # UUID v4 en texto sin pasar por uuid.uuid4() fila por fila
+    raw = rng.integers(0, 256, size=(size, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hex_chars = np.frombuffer(raw.tobytes().hex().encode(), dtype="S1").reshape(size, 32)
+    dash = np.full((size, 1), b"-", dtype="S1")
+    parts = [hex_chars[:, :8], dash, hex_chars[:, 8:12], dash, hex_chars[:, 12:16], dash,
+             hex_chars[:, 16:20], dash, hex_chars[:, 20:]]
+    return np.ascontiguousarray(np.hstack(parts)).view("S36").ravel().astype(str)
+
+
+def _chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+class _CsvChunkWriter:
+    # Mismo formato que los CSV originales (pandas.to_csv), agregando bloque a bloque
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            open(self.path, "w").close()
+
+
+def generate_synthetic_data(output_dir, n_transactions, n_users=None, seed=42, chunk_size=CHUNK_SIZE,
+                            profile=None, verbose=True):
+    profile = profile or load_profile()
+    n_users = n_users or max(1, int(round(n_transactions / profile["mean_txn_per_user"])))
+    width = max(3, len(str(n_users)))
+    os.makedirs(output_dir, exist_ok=True)
+    users_seq, products_seq, activity_seq, txn_seq = np.random.SeedSequence(seed).spawn(4)
+
+    # Demográficos y productos, por bloques de usuarios
+    demo_writer = _CsvChunkWriter(os.path.join(output_dir, "demographics.csv"))
+    products_writer = _CsvChunkWriter(os.path.join(output_dir, "products.csv"))
+    users_rng, products_rng = np.random.default_rng(users_seq), np.random.default_rng(products_seq)
+    for start, stop in _chunks(n_users, chunk_size):
+        size = stop - start
+        user_ids = _user_ids(start, stop, width)
+        demo_writer.write(pd.DataFrame({
+            "user_id": user_ids,
+            "age": np.round(_sample_quantiles(users_rng, profile["age"], size)).astype(np.int64),
+            "income_range": _sample_categories(users_rng, profile["income_range"], size),
+            "risk_profile": _sample_categories(users_rng, profile["risk_profile"], size),
+            "occupation": _sample_categories(users_rng, profile["occupation"], size),
+        }))
+
+        combos = pd.Series(_sample_categories(products_rng, profile["product_combos"], size), index=user_ids)
+        holdings = combos[combos != ""].str.split("|").explode()
+        products_writer.write(pd.DataFrame({
+            "user_id": holdings.index.to_numpy(),
+            "product_type": holdings.to_numpy(),
+            "contract_date": _days_to_dates(
+                _sample_quantiles(products_rng, profile["contract_date"], len(holdings))),
+        }))
+    demo_writer.close()
+    products_writer.close()
+
+    # Actividad por usuario: los usuarios con más peso reciben más transacciones
+    activity = _sample_quantiles(np.random.default_rng(activity_seq), profile["txn_per_user"], n_users)
+    activity_cdf = np.cumsum(activity)
+    activity_cdf /= activity_cdf[-1]
+
+    txn_writer = _CsvChunkWriter(os.path.join(output_dir, "transactions.csv"))
+    txn_rng = np.random.default_rng(txn_seq)
+    categories = list(profile["amount"])
+    for start, stop in _chunks(n_transactions, chunk_size):
+        size = stop - start
+        users = np.searchsorted(activity_cdf, txn_rng.random(size), side="right").clip(0, n_users - 1)
+        merchant = _sample_categories(txn_rng, profile["merchant_category"], size)
+        amount = np.empty(size)
+        for cat in categories:
+            mask = merchant == cat
+            amount[mask] = _sample_quantiles(txn_rng, profile["amount"][cat], int(mask.sum()))
+        txn_writer.write(pd.DataFrame({
+            "transaction_id": _uuid_strings(txn_rng, size),
+            "user_id": np.char.add("user_", np.char.zfill((users + 1).astype(str), width)).astype(object),
+            "date": _days_to_dates(_sample_quantiles(txn_rng, profile["date"], size)),
+            "amount": np.round(amount, 2),
+            "merchant_category": merchant,
+            "description": _sample_categories(txn_rng, profile["description"], size),
+        }))
+        if verbose:
+            print(f"   {stop:,}/{n_transactions:,} transacciones")
+    txn_writer.close()
+
+    with open(os.path.join(output_dir, "synthetic.json"), "w") as f:
+        json.dump({"n_transactions": n_transactions, "n_users": n_users, "seed": seed,
+                   "chunk_size": chunk_size}, f, indent=2)
+    return [os.path.join(output_dir, f"{name}.csv") for name in ("demographics", "products", "transactions")]
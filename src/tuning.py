@@ -0,0 +1,101 @@
+import math
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler
+
+# Búsqueda de hiperparámetros de XGBoost por successive halving: muchos candidatos
+# con pocas rondas de boosting, y sólo los mejores 1/eta pasan a la siguiente ronda
+# con eta veces más árboles. Cada fit usa early stopping sobre su fold de validación
+# y las matrices (QuantileDMatrix) de cada fold se construyen una sola vez.
+
+BOOSTER_PARAMS = ["learning_rate", "max_depth", "subsample", "colsample_bytree", "gamma", "scale_pos_weight"]
+
+
+def build_fold_matrices(X, y, cv):
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    folds = []
+    for train_idx, valid_idx in cv.split(X, y):
+        dtrain = xgb.QuantileDMatrix(X[train_idx], label=y[train_idx])
+        dvalid = xgb.QuantileDMatrix(X[valid_idx], label=y[valid_idx], ref=dtrain)
+        folds.append((dtrain, dvalid, y[valid_idx]))
+    return folds
+
+
+def _booster_params(params, random_state):
+    booster_params = {k: params[k] for k in BOOSTER_PARAMS if k in params}
+    booster_params.update({
+        "objective": "binary:logistic",
+        "eval_metric": "auc",
+        "tree_method": "hist",
+        "seed": random_state,
+    })
+    return booster_params
+
+
+def evaluate_candidate(params, folds, num_rounds, early_stopping_rounds, random_state=42):
+    aucs, best_iterations = [], []
+    booster_params = _booster_params(params, random_state)
+    rounds = min(num_rounds, params.get("n_estimators", num_rounds))
+    for dtrain, dvalid, y_valid in folds:
+        booster = xgb.train(
+            booster_params, dtrain, num_boost_round=rounds,
+            evals=[(dvalid, "valid")], early_stopping_rounds=early_stopping_rounds, verbose_eval=False,
+        )
+        best_iteration = getattr(booster, "best_iteration", rounds - 1)
+        y_proba = booster.predict(dvalid, iteration_range=(0, best_iteration + 1))
+        aucs.append(roc_auc_score(y_valid, y_proba))
+        best_iterations.append(best_iteration + 1)
+    return float(np.mean(aucs)), float(np.std(aucs)), int(np.median(best_iterations))
+
+
+def successive_halving_search(X, y, param_distributions, cv, n_candidates=50, min_rounds=30,
+                              max_rounds=500, eta=3, early_stopping_rounds=20, time_budget=None,
+                              random_state=42, verbose=True):
+    start = time.perf_counter()
+    folds = build_fold_matrices(X, y, cv)
+    candidates = list(ParameterSampler(param_distributions, n_iter=n_candidates, random_state=random_state))
+
+    n_rungs = max(1, int(math.floor(math.log(max_rounds / min_rounds, eta))) + 1)
+    history = []
+    survivors = list(range(len(candidates)))
+    n_fits = 0
+
+    for rung in range(n_rungs):
+        num_rounds = max_rounds if rung == n_rungs - 1 else int(min_rounds * eta ** rung)
+        scores = {}
+        for i in survivors:
+            if time_budget is not None and scores and time.perf_counter() - start > time_budget:
+                break
+            mean_auc, std_auc, n_estimators = evaluate_candidate(
+                candidates[i], folds, num_rounds, early_stopping_rounds, random_state)
+            n_fits += len(folds)
+            scores[i] = mean_auc
+            history.append({"rung": rung, "candidate": i, "num_rounds": num_rounds, "mean_auc": mean_auc,
+                            "std_auc": std_auc, "n_estimators": n_estimators, **candidates[i]})
+
+        if verbose:
+            print(f"Rung {rung}: {len(scores)} candidatos con {num_rounds} rondas, "
+                  f"mejor AUC {max(scores.values()) if scores else float('nan'):.4f}")
+
+        if not scores or len(scores) < len(survivors):
+            # Presupuesto agotado: se usa el mejor resultado obtenido hasta ahora
+            break
+        n_keep = max(1, len(survivors) // eta)
+        survivors = sorted(scores, key=scores.get, reverse=True)[:n_keep]
+
+    # El ganador sale de la ronda más profunda evaluada (la de más árboles)
+    last_rung = max(h["rung"] for h in history)
+    best = max((h for h in history if h["rung"] == last_rung), key=lambda h: h["mean_auc"])
+    best_params = {k: v for k, v in candidates[best["candidate"]].items()}
+    best_params["n_estimators"] = best["n_estimators"]
+    return {
+        "best_params": best_params,
+        "best_score": best["mean_auc"],
+        "history": history,
+        "n_fits": n_fits,
+        "elapsed": time.perf_counter() - start,
+    }
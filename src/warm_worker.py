@@ -0,0 +1,212 @@
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from src.pipeline import ROOT_DIR, STAGES, run_pipeline
+
+# Worker persistente: un proceso que importa una sola vez las dependencias
+# pesadas (pandas, sklearn, xgboost, shap, matplotlib...) y queda escuchando en
+# un socket Unix trabajos de etapas del pipeline o de scoring. Cada trabajo corre
+# en el mismo intérprete (módulos de etapas y modelos cargados quedan calientes),
+# de a uno por vez, y la salida impresa vuelve al cliente junto con el resultado.
+# Los pools de procesos que abren las etapas usan "spawn" (el worker tiene threads):
+# sus procesos importan de nuevo lo que necesitan, sólo el proceso principal queda caliente.
+#
+# Si cambia algún .py de src/, scripts/ o reports/ desde que arrancó, el worker
+# responde "restart" y se re-ejecuta a sí mismo; el cliente reintenta solo.
+#
+# Los trabajos llegan como pickles: el socket se crea ya con permisos 0600 y cada
+# conexión se autentica (HMAC) con la clave de AUTHKEY_PATH, también 0600, antes
+# de leer nada.
+
+SOCKET_PATH = "outputs/.warm_worker.sock"
+AUTHKEY_PATH = "outputs/cache/warm_worker.key"
+PRELOAD_MODULES = [
+    "numpy", "pandas", "pyarrow.parquet", "scipy.sparse", "sklearn.model_selection", "sklearn.preprocessing",
+    "xgboost", "imblearn.over_sampling", "shap", "matplotlib.pyplot", "seaborn", "reportlab.pdfgen.canvas",
+]
+CODE_DIRS = ("src", "scripts", "reports")
+CONNECT_TIMEOUT = 60
+
+
+def _socket_path(socket_path):
+    return str(ROOT_DIR / socket_path)
+
+
+def _authkey(create=False):
+    # Clave compartida por el worker y sus clientes; la crea el worker si no existe
+    path = ROOT_DIR / AUTHKEY_PATH
+    if create and not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(os.urandom(32))
+    if path.stat().st_mode & 0o077:
+        raise PermissionError(f"{path} es accesible por otros usuarios: se esperaba modo 0600")
+    return path.read_bytes()
+
+
+def preload(modules=PRELOAD_MODULES):
+    # Backend sin interfaz gráfica antes de importar pyplot (igual que run_pipeline)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def code_snapshot(code_dirs=CODE_DIRS):
+    return {str(path): path.stat().st_mtime_ns for d in code_dirs for path in (ROOT_DIR / d).rglob("*.py")}
+
+
+class _Tee(io.TextIOBase):
+    # Lo impreso durante un trabajo va a la consola del worker y al buffer de respuesta
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = io.StringIO()
+
+    def write(self, text):
+        self.stream.write(text)
+        return self.buffer.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run_job(job):
+    kind = job["job"]
+    if kind == "ping":
+        return {"pid": os.getpid()}
+    if kind == "stage":
+        stages = [stage for stage in STAGES if stage["name"] in job["names"]]
+        unknown = set(job["names"]) - {stage["name"] for stage in stages}
+        if unknown:
+            raise ValueError(f"Etapas desconocidas: {sorted(unknown)}")
+        return run_pipeline(stages, force=job.get("force", False), max_workers=job.get("workers", 1))
+    if kind == "pipeline":
+        return run_pipeline(force=job.get("force", False), max_workers=job.get("workers", 2))
+    if kind == "score":
+        from src.batch_scoring import score_dataset
+        return score_dataset(**job.get("params", {}), verbose=False)
+    raise ValueError(f"Trabajo desconocido: {kind}")
+
+
+def _execute(job):
+    tee = _Tee(sys.stdout)
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(tee):
+            result = run_job(job)
+        reply = {"status": "ok", "result": result}
+    except Exception:
+        reply = {"status": "error", "error": traceback.format_exc()}
+    reply.update(seconds=time.perf_counter() - start, output=tee.buffer.getvalue())
+    return reply
+
+
+def serve(socket_path=SOCKET_PATH, preload_modules=PRELOAD_MODULES):
+    # Para re-ejecutarse con los mismos argumentos desde la raíz del repo (cwd de las etapas)
+    argv = [sys.executable, os.path.abspath(sys.argv[0])] + sys.argv[1:]
+    os.chdir(ROOT_DIR)
+    address = _socket_path(socket_path)
+    if worker_running(socket_path):
+        raise RuntimeError(f"Ya hay un worker escuchando en {address}")
+    if os.path.exists(address):
+        # Socket de un worker que terminó sin cerrarlo
+        os.remove(address)
+
+    start = time.perf_counter()
+    timings = preload(preload_modules)
+    slowest = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in
+                        sorted(timings.items(), key=lambda item: -item[1])[:3])
+    print(f"🔥 Dependencias cargadas en {time.perf_counter() - start:.1f}s ({slowest})")
+    snapshot = code_snapshot()
+
+    restart = False
+    os.makedirs(os.path.dirname(address), exist_ok=True)
+    authkey = _authkey(create=True)
+    # umask antes del bind: el socket nunca existe con permisos más abiertos que 0600
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+    with listener:
+        print(f"✅ Worker {os.getpid()} escuchando en {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError) as e:
+                print(f"⚠️  Conexión rechazada: {e!r}")
+                continue
+            with conn:
+                try:
+                    job = conn.recv()
+                except EOFError:
+                    continue
+                except Exception:
+                    conn.send({"status": "error", "error": traceback.format_exc()})
+                    continue
+                if not isinstance(job, dict) or not isinstance(job.get("job"), str):
+                    conn.send({"status": "error", "error": f"Trabajo inválido: {job!r}"})
+                    continue
+                if job["job"] == "shutdown":
+                    conn.send({"status": "ok"})
+                    break
+                if code_snapshot() != snapshot:
+                    conn.send({"status": "restart"})
+                    restart = True
+                    break
+                print(f"▶️  Trabajo {job}")
+                conn.send(_execute(job))
+
+    if restart:
+        print("🔁 Código modificado: reiniciando el worker")
+        sys.stdout.flush()
+        os.execv(argv[0], argv)
+    print("👋 Worker detenido")
+
+
+def _connect(socket_path, timeout):
+    # Espera a que el worker esté escuchando (p. ej. mientras se reinicia)
+    address = _socket_path(socket_path)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return Client(address, family="AF_UNIX", authkey=_authkey())
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+
+
+def worker_running(socket_path=SOCKET_PATH):
+    try:
+        _connect(socket_path, timeout=0).close()
+        return True
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+
+
+def submit(job, socket_path=SOCKET_PATH, timeout=CONNECT_TIMEOUT):
+    for _ in range(2):
+        with _connect(socket_path, timeout) as conn:
+            conn.send(job)
+            reply = conn.recv()
+        if reply["status"] != "restart":
+            break
+    if reply["status"] == "error":
+        raise RuntimeError(f"El trabajo falló en el worker:\n{reply['error']}")
+    return reply
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from src.schema import sorted_codes
+
+# Features por ventana de tiempo (gasto, cantidad, ticket promedio y participación
+# por categoría en los últimos 30/90/365 días) en una sola pasada: las
+# transacciones se ordenan una vez por (usuario, antigüedad en días) y cada
+# combinación ventana/agregación sale de sumas acumuladas y searchsorted sobre
+# ese orden, sin un groupby por feature. Agregar una ventana o una categoría
+# cuesta dos búsquedas binarias por usuario más una resta de acumulados.
+#
+# Una transacción está en la ventana de w días si reference_date - w <= date < reference_date.
+
+WINDOWS = (30, 90, 365)
+
+
+def _window_sums(cumulative, start, end):
+    return cumulative[end] - cumulative[start]
+
+
+def window_features(transactions, reference_date=None, windows=WINDOWS, categories=None):
+    if reference_date is None:
+        reference_date = transactions["date"].max() + pd.Timedelta(days=1)
+    windows = sorted(windows)
+
+    users, user_index = sorted_codes(transactions["user_id"])
+    merchant, merchant_index = sorted_codes(transactions["merchant_category"])
+    categories = list(merchant_index) if categories is None else list(categories)
+    # Código de la lista pedida para cada código de los datos (-1 si no se pide)
+    category_codes = pd.Index(categories).get_indexer(merchant_index)
+    merchant = np.where(merchant >= 0, category_codes[merchant], -1)
+
+    # Antigüedad en días, acotada a [0, ventana máxima + 1]: alcanza para ordenar
+    # y mantiene la clave (usuario, antigüedad) en un int64 chico
+    age = (reference_date - transactions["date"]).dt.days.to_numpy()
+    age = np.clip(age, 0, windows[-1] + 1)
+    span = windows[-1] + 2
+    valid = users >= 0
+    key = users[valid].astype(np.int64) * span + age[valid]
+
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    amount = np.nan_to_num(transactions["amount"].to_numpy(dtype=np.float64)[valid][order])
+    merchant = merchant[valid][order]
+
+    present = np.flatnonzero(np.bincount(users[valid], minlength=len(user_index)))
+    base = present.astype(np.int64) * span
+    # Transacciones con antigüedad 0 son del día de referencia o posteriores: quedan fuera
+    start = np.searchsorted(key, base, side="right")
+    ends = {w: np.searchsorted(key, base + w, side="right") for w in windows}
+
+    cumulative = np.concatenate([[0.0], np.cumsum(amount)])
+    features = {"user_id": user_index[present]}
+    for w in windows:
+        spend = _window_sums(cumulative, start, ends[w])
+        count = ends[w] - start
+        features[f"spend_{w}d"] = spend
+        features[f"txn_count_{w}d"] = count
+        features[f"avg_spent_{w}d"] = np.divide(spend, count, out=np.zeros(len(spend)), where=count > 0)
+
+    # Una suma acumulada por categoría, reutilizada por todas las ventanas
+    for code, category in enumerate(categories):
+        category_cumulative = np.concatenate([[0.0], np.cumsum(np.where(merchant == code, amount, 0.0))])
+        for w in windows:
+            spend = features[f"spend_{w}d"]
+            category_spend = _window_sums(category_cumulative, start, ends[w])
+            features[f"share_{category}_{w}d"] = np.divide(category_spend, spend, out=np.zeros(len(spend)),
+                                                           where=spend != 0)
+    return pd.DataFrame(features)
+
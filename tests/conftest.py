@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos se importan como en los scripts (src.*, api_mock.*, scripts/*) desde la raíz del repo
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
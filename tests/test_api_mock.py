@@ -0,0 +1,150 @@
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import api_mock.main as api
+
+
+def total_bytes(cache):
+    return sum(entry.nbytes for entry in cache.entries.values())
+
+
+def test_cache_keeps_running_byte_total():
+    cache = api.ResponseCache(max_mb=0.01)
+    body = b'{"data": "' + b"x" * 3000 + b'"}'
+    for i in range(6):
+        cache.put(("transactions", i), body)
+        assert cache.nbytes == total_bytes(cache) <= cache.max_bytes
+
+    # Reemplazo de una clave existente y desalojo del más viejo
+    cache.put(("transactions", 5), body + b" ")
+    assert cache.nbytes == total_bytes(cache)
+    cache.put(("demographics", 0), body)
+    assert cache.nbytes == total_bytes(cache)
+    assert ("demographics", 0) in cache.entries
+
+    cache.invalidate("transactions")
+    assert list(cache.entries) == [("demographics", 0)]
+    assert cache.nbytes == total_bytes(cache)
+
+
+def test_gzip_is_counted_when_stored():
+    entry = api.CachedBody(b"a" * 5000)
+    assert entry.gzipped is not None
+    assert entry.nbytes == 5000 + len(entry.gzipped)
+    assert api.CachedBody(b"{}").gzipped is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "response_cache", api.ResponseCache())
+    return TestClient(api.app)
+
+
+def test_conditional_request_returns_304(client):
+    response = client.get("/transactions/", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    assert etag.startswith("W/")
+
+    repeated = client.get("/transactions/", params={"limit": 50}, headers={"If-None-Match": etag})
+    assert repeated.status_code == 304
+    assert repeated.content == b""
+    other = client.get("/transactions/", params={"limit": 51}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def expected_rows(name, **filters):
+    spec = api.DATASET_SPECS[name]
+    df = pd.read_csv(api.DATA_DIR / spec["file"]).sort_values(spec["sort_by"], kind="stable")
+    if "user_id" in filters:
+        df = df[df["user_id"] == filters["user_id"]]
+    if "merchant_category" in filters:
+        df = df[df["merchant_category"] == filters["merchant_category"]]
+    dates = pd.to_datetime(df[spec.get("date_col", "user_id")]) if spec.get("date_col") else None
+    if "date_from" in filters:
+        df = df[dates >= pd.Timestamp(filters["date_from"])]
+        dates = dates[df.index]
+    if "date_to" in filters:
+        df = df[dates <= pd.Timestamp(filters["date_to"])]
+    return json.loads(df.to_json(orient="records"))
+
+
+def fetch_pages(client, path, limit, **filters):
+    rows, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, **filters, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        body = response.json()
+        rows += body["data"]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+
+@pytest.mark.parametrize("name,limit", [("transactions", 97), ("products", 10), ("demographics", 100)])
+def test_cursor_pagination_returns_every_row_once(client, name, limit):
+    rows, pages = fetch_pages(client, f"/{name}/", limit)
+    expected = expected_rows(name)
+    assert rows == expected
+    assert pages == -(-len(expected) // limit)
+
+
+FILTERS = [
+    ("transactions", {"user_id": "user_010"}),
+    ("transactions", {"merchant_category": "travel"}),
+    ("transactions", {"date_from": "2023-03-01"}),
+    ("transactions", {"date_to": "2023-03-31"}),
+    ("transactions", {"date_from": "2023-03-01", "date_to": "2023-03-31", "merchant_category": "food"}),
+    ("transactions", {"user_id": "user_010", "date_from": "2023-06-01"}),
+    # products no está ordenado por fecha: filtro por bloque en lugar de búsqueda binaria
+    ("products", {"date_from": "2021-01-01", "date_to": "2021-12-31"}),
+    ("products", {"user_id": "user_002"}),
+    ("demographics", {"user_id": "user_050"}),
+]
+
+
+@pytest.mark.parametrize("name,filters", FILTERS)
+def test_filters_match_pandas(client, name, filters):
+    expected = expected_rows(name, **filters)
+    assert expected
+    assert client.get(f"/{name}/", params=filters).json() == expected
+    rows, _ = fetch_pages(client, f"/{name}/", 7, **filters)
+    assert rows == expected
+
+
+@pytest.mark.parametrize("date_param", ["2023-13-01", "marzo", "2023-03-01' OR 1=1"])
+def test_invalid_dates_return_422(client, date_param):
+    assert client.get("/transactions/", params={"date_from": date_param}).status_code == 422
+    assert client.get("/products/", params={"date_to": date_param}).status_code == 422
+
+
+# Texto que no es base64, base64 de algo que no es un número y de una posición negativa
+@pytest.mark.parametrize("cursor", ["no-es-base64!", "YWJj", "LTE="])
+def test_invalid_cursor_returns_400(client, cursor):
+    response = client.get("/transactions/", params={"limit": 10, "cursor": cursor})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("name,filters", [("transactions", {}), ("transactions", {"merchant_category": "food"}),
+                                          ("products", {"date_from": "2021-06-01"})])
+def test_ndjson_stream_matches_records(client, name, filters):
+    response = client.get(f"/{name}/", params={"stream": "true", **filters})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [line for line in response.text.splitlines() if line]
+    assert [json.loads(line) for line in lines] == expected_rows(name, **filters)
+
+
+def test_stream_blocks_concatenate_to_records():
+    _, dataset = api.get_dataset("transactions")
+    filters = {"date_from": api.date(2023, 2, 1), "merchant_category": "food"}
+    chunks = list(dataset.stream(chunk_size=64, **filters))
+    assert len(chunks) > 1
+    rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines() if line]
+    assert rows == expected_rows("transactions", date_from="2023-02-01", merchant_category="food")
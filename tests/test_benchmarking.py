@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+from src.benchmarking import run_isolated
+
+
+def crash(code):
+    os._exit(code)
+
+
+def test_run_isolated_returns_result():
+    assert run_isolated(sum, [1, 2, 3]) == 6
+
+
+def test_run_isolated_reports_exceptions():
+    with pytest.raises(RuntimeError, match="ZeroDivisionError"):
+        run_isolated(divmod, 1, 0)
+
+
+def test_run_isolated_raises_when_child_dies():
+    # Sin el sondeo, queue.get() esperaría para siempre
+    with pytest.raises(RuntimeError, match="exit code 3"):
+        run_isolated(crash, 3)
@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregations import rfm_features, spending_volatility, transaction_summary
+from src.data_preparation import merge_datasets
+
+RAW_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw")
+
+
+# Implementaciones originales (callbacks por grupo y Period), como referencia
+
+def reference_transaction_summary(transactions):
+    return transactions.groupby("user_id").agg(
+        total_spent=("amount", "sum"),
+        avg_spent=("amount", "mean"),
+        txn_count=("amount", "count"),
+        favorite_category=("merchant_category", lambda x: x.mode().iloc[0] if not x.mode().empty else None)
+    ).reset_index()
+
+
+def reference_rfm(transactions, reference_date):
+    return transactions.groupby("user_id").agg(
+        recency=("date", lambda x: (reference_date - x.max()).days),
+        frequency=("transaction_id", "count"),
+        monetary=("amount", "sum")
+    ).reset_index()
+
+
+def reference_volatility(transactions):
+    transactions = transactions.assign(month=transactions["date"].dt.to_period("M"))
+    monthly_spending = transactions.groupby(["user_id", "month"])["amount"].sum().reset_index()
+    volatility = monthly_spending.groupby("user_id")["amount"].std(ddof=0).reset_index()
+    return volatility.rename(columns={"amount": "spending_volatility"})
+
+
+def raw_datasets(categorical=False):
+    demographics = pd.read_csv(os.path.join(RAW_DIR, "demographics.csv"))
+    products = pd.read_csv(os.path.join(RAW_DIR, "products.csv"), parse_dates=["contract_date"])
+    transactions = pd.read_csv(os.path.join(RAW_DIR, "transactions.csv"), parse_dates=["date"])
+    if categorical:
+        transactions = transactions.astype({"user_id": "category", "merchant_category": "category"})
+    return demographics, products, transactions
+
+
+def synthetic_datasets():
+    # Pocas categorías y pocas transacciones por usuario: muchos empates de moda,
+    # montos y categorías nulos, usuarios sólo con nulos y usuarios sin transacciones
+    rng = np.random.default_rng(7)
+    users = [f"user_{i:03d}" for i in range(60)]
+    n = 400
+    transactions = pd.DataFrame({
+        "transaction_id": np.arange(n),
+        "user_id": rng.choice(users[:50], n),
+        "date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+        "amount": np.round(rng.uniform(1, 100, n), 2),
+        "merchant_category": rng.choice(["food", "travel", "health", "shopping"], n),
+    })
+    transactions.loc[rng.random(n) < 0.15, "amount"] = np.nan
+    transactions.loc[rng.random(n) < 0.15, "merchant_category"] = np.nan
+    only_nans = pd.DataFrame({"transaction_id": np.arange(n, n + 3), "user_id": ["user_050"] * 3,
+                              "date": pd.Timestamp("2023-05-01"), "amount": np.nan, "merchant_category": np.nan})
+    transactions = pd.concat([transactions, only_nans], ignore_index=True)
+
+    demographics = pd.DataFrame({
+        "user_id": users,
+        "age": rng.integers(18, 80, len(users)),
+        "income_range": rng.choice(["<30k", "30k-50k", ">50k"], len(users)),
+        "risk_profile": rng.choice(["conservative", "moderate", "aggressive"], len(users)),
+        "occupation": rng.choice(["A", "B", "C"], len(users)),
+    })
+    products = pd.DataFrame({
+        "user_id": rng.choice(users, 80),
+        "product_type": rng.choice(["checking_account", "credit_card", "insurance"], 80),
+        "contract_date": pd.Timestamp("2022-01-01"),
+    })
+    return demographics, products, transactions
+
+
+def assert_equivalent(demographics, transactions, products):
+    vectorized = merge_datasets(demographics, transactions, products, vectorized=True)
+    reference = merge_datasets(demographics, transactions, products, vectorized=False)
+    pd.testing.assert_frame_equal(vectorized, reference)
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_merge_matches_reference_on_raw_data(categorical):
+    demographics, products, transactions = raw_datasets(categorical)
+    assert_equivalent(demographics, transactions, products)
+
+
+def test_merge_matches_reference_with_ties_and_nans():
+    demographics, products, transactions = synthetic_datasets()
+    assert_equivalent(demographics, transactions, products)
+
+
+def by_user(frame):
+    frame = frame.astype({"user_id": str}).sort_values("user_id").reset_index(drop=True)
+    return frame.fillna({"favorite_category": np.nan}) if "favorite_category" in frame else frame
+
+
+@pytest.mark.parametrize("transactions", [raw_datasets()[2], synthetic_datasets()[2]], ids=["raw", "synthetic"])
+def test_aggregations_match_reference(transactions):
+    reference_date = transactions["date"].max() + pd.Timedelta(days=1)
+    pd.testing.assert_frame_equal(by_user(transaction_summary(transactions)),
+                                  by_user(reference_transaction_summary(transactions)))
+    pd.testing.assert_frame_equal(by_user(rfm_features(transactions, reference_date)),
+                                  by_user(reference_rfm(transactions, reference_date)))
+    pd.testing.assert_frame_equal(by_user(spending_volatility(transactions)),
+                                  by_user(reference_volatility(transactions)))
+
+
+def test_favorite_category_ties_and_single_month_users():
+    transactions = pd.DataFrame({
+        "transaction_id": np.arange(9),
+        "user_id": ["a", "a", "a", "a", "b", "b", "b", "c", "c"],
+        "date": pd.to_datetime(["2023-01-05", "2023-01-20", "2023-02-01", "2023-03-10",
+                                "2023-04-01", "2023-04-15", "2023-04-30", "2023-06-01", "2023-07-01"]),
+        "amount": [10.0, 20.0, 30.0, 40.0, 5.0, 7.0, 9.0, 1.0, 3.0],
+        # a: empate travel/food (gana food); b: empate de tres; c: empate con un nulo
+        "merchant_category": ["travel", "food", "travel", "food", "shopping", "health", "zoo", "zoo", np.nan],
+    })
+    summary = transaction_summary(transactions).set_index("user_id")
+    reference = reference_transaction_summary(transactions).set_index("user_id")
+    assert summary["favorite_category"].to_dict() == {"a": "food", "b": "health", "c": "zoo"}
+    pd.testing.assert_frame_equal(summary, reference)
+
+    # b tiene todas sus transacciones en abril: volatilidad 0, no NaN
+    volatility = spending_volatility(transactions).set_index("user_id")["spending_volatility"]
+    assert volatility["b"] == 0.0
+    assert volatility["a"] == pytest.approx(np.std([30.0, 30.0, 40.0]))
+    reference_volatilities = reference_volatility(transactions).set_index("user_id")["spending_volatility"]
+    pd.testing.assert_series_equal(volatility, reference_volatilities)
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_transformer import FeatureTransformer, build_customer_frame, product_flag_columns
+
+RAW_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw")
+
+
+@pytest.fixture(scope="module")
+def frame():
+    demographics = pd.read_csv(os.path.join(RAW_DIR, "demographics.csv"))
+    products = pd.read_csv(os.path.join(RAW_DIR, "products.csv"), parse_dates=["contract_date"])
+    transactions = pd.read_csv(os.path.join(RAW_DIR, "transactions.csv"), parse_dates=["date"])
+    return build_customer_frame(demographics, products, transactions)
+
+
+@pytest.fixture(scope="module")
+def transformer(frame):
+    return FeatureTransformer(top_categories=5, occupation_threshold=5).fit(frame)
+
+
+@pytest.fixture
+def record(frame):
+    return frame.iloc[0].to_dict()
+
+
+def test_record_matches_frame_transform(frame, transformer):
+    expected = transformer.transform(frame).to_numpy(dtype=float)
+    records = np.vstack([transformer.transform_record(row) for row in frame.to_dict(orient="records")])
+    np.testing.assert_allclose(records, expected, rtol=1e-6, atol=1e-9)
+
+
+def test_record_rejects_unknown_product(transformer, record):
+    record["has_crypto_wallet"] = 1
+    with pytest.raises(ValueError, match="has_crypto_wallet"):
+        transformer.transform_record(record)
+
+
+def test_record_rejects_unknown_column(transformer, record):
+    record["nickname"] = "x"
+    with pytest.raises(ValueError, match="nickname"):
+        transformer.transform_record(record)
+
+
+def test_record_rejects_missing_column(transformer, record):
+    del record["avg_spent"]
+    with pytest.raises(ValueError, match="avg_spent"):
+        transformer.transform_record(record)
+
+
+@pytest.mark.parametrize("column", ["age", "product_count_eda", "has_credit_card"])
+def test_record_rejects_non_numeric_values(transformer, record, column):
+    assert column in transformer._numeric_keys
+    record[column] = "abc"
+    with pytest.raises(ValueError, match=column):
+        transformer.transform_record(record)
+
+
+def test_record_rejects_unseen_strict_value(transformer, record):
+    record["risk_profile"] = "yolo"
+    with pytest.raises(ValueError, match="risk_profile"):
+        transformer.transform_record(record)
+
+
+def test_product_flags_are_known(frame, transformer):
+    assert transformer.product_flags_ == product_flag_columns(frame)
@@ -0,0 +1,110 @@
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregations import aggregate_user_features
+from src.incremental import read_manifest
+from scripts.update_user_aggregates import run_update
+
+feature_engineering = importlib.import_module("scripts.02_feature_engineering")
+
+TRANSACTIONS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "transactions.csv")
+
+
+@pytest.fixture
+def lines():
+    with open(TRANSACTIONS_PATH, "rb") as f:
+        return f.readlines()
+
+
+def expected_features(path):
+    transactions = pd.read_csv(path, parse_dates=["date"])
+    return aggregate_user_features(transactions).sort_values("user_id").reset_index(drop=True)
+
+
+def assert_matches_rebuild(features, path):
+    expected = expected_features(path)
+    features = features.sort_values("user_id").reset_index(drop=True)
+    pd.testing.assert_frame_equal(features[expected.columns], expected)
+
+
+def test_appended_transactions_are_read_as_delta(tmp_path, monkeypatch, lines):
+    monkeypatch.chdir(tmp_path)
+    source, state_dir = tmp_path / "transactions.csv", tmp_path / "state"
+    source.write_bytes(b"".join(lines[:400]))
+    run_update(state_dir=state_dir, source_path=source)
+
+    # Lo nuevo se agrega al final, como el extractor incremental
+    with open(source, "ab") as f:
+        f.writelines(lines[400:])
+    features = run_update(state_dir=state_dir, source_path=source)
+
+    manifest = read_manifest(state_dir)
+    assert len(manifest["deltas"]) == 1
+    assert manifest["source"]["offset"] == source.stat().st_size
+    assert_matches_rebuild(features, source)
+
+
+def test_rewritten_source_triggers_rebuild(tmp_path, monkeypatch, lines):
+    monkeypatch.chdir(tmp_path)
+    source, state_dir = tmp_path / "transactions.csv", tmp_path / "state"
+    source.write_bytes(b"".join(lines[:400]))
+    run_update(state_dir=state_dir, source_path=source)
+
+    # Mismo tamaño o mayor pero otro contenido: no se puede leer sólo el final
+    rng = np.random.default_rng(0)
+    source.write_bytes(lines[0] + b"".join(rng.permutation(lines[1:])))
+    features = run_update(state_dir=state_dir, source_path=source)
+
+    assert read_manifest(state_dir)["deltas"] == []
+    assert_matches_rebuild(features, source)
+
+
+def test_deltas_are_compacted(tmp_path, monkeypatch, lines):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("src.incremental.MAX_DELTAS", 3)
+    source, state_dir = tmp_path / "transactions.csv", tmp_path / "state"
+    source.write_bytes(lines[0])
+    for chunk in np.array_split(np.arange(1, len(lines)), 4):
+        with open(source, "ab") as f:
+            f.writelines(lines[i] for i in chunk)
+        features = run_update(state_dir=state_dir, source_path=source)
+
+    assert len(read_manifest(state_dir)["deltas"]) < 3
+    assert len([p for p in state_dir.iterdir() if p.is_dir()]) == 1 + len(read_manifest(state_dir)["deltas"])
+    assert_matches_rebuild(features, source)
+
+
+def test_aggregates_are_used_only_if_manifest_matches_source(tmp_path, monkeypatch, lines):
+    monkeypatch.chdir(tmp_path)
+    source, state_dir = tmp_path / "transactions.csv", tmp_path / "state"
+    source.write_bytes(b"".join(lines[:400]))
+    expected = run_update(state_dir=state_dir, source_path=source)
+
+    def load():
+        return feature_engineering.load_user_aggregates(state_dir=state_dir, source_path=source)
+
+    aggregates = load()
+    assert aggregates is not None
+    pd.testing.assert_frame_equal(aggregates, expected[aggregates.columns])
+
+    # Mismo tamaño y mismas transacciones en otro orden: cambia el hash del final
+    source.write_bytes(b"".join(lines[:398]) + lines[399] + lines[398])
+    assert load() is None
+    run_update(state_dir=state_dir, source_path=source)
+    assert load() is not None
+
+    # Transacciones agregadas sin actualizar el estado
+    with open(source, "ab") as f:
+        f.writelines(lines[401:])
+    assert load() is None
+
+    # Un lote suelto desliga el estado de transactions.csv
+    run_update(state_dir=state_dir, source_path=source)
+    batch = tmp_path / "batch.csv"
+    batch.write_bytes(lines[0] + lines[1])
+    run_update([str(batch)], state_dir=state_dir, source_path=source)
+    assert load() is None
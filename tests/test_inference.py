@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from xgboost import XGBClassifier
+
+from src.inference import CompiledTrees, InferenceEngine
+
+FEATURES = ["a", "b", "c", "d", "e"]
+
+
+def make_data(n, seed):
+    # Faltantes que dependen de la clase en "a" y "b": el split aprende default izquierda
+    # o derecha según la columna; "e" nunca falta en entrenamiento (dirección por defecto)
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, len(FEATURES))).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] - X[:, 2] + rng.normal(0, 0.5, n) > 0).astype(int)
+    X[(y == 1) & (rng.random(n) < 0.3), 0] = np.nan
+    X[(y == 0) & (rng.random(n) < 0.3), 1] = np.nan
+    X[rng.random(n) < 0.1, 3] = np.nan
+    return pd.DataFrame(X, columns=FEATURES), y
+
+
+@pytest.fixture(scope="module")
+def model():
+    X, y = make_data(600, 0)
+    return XGBClassifier(n_estimators=30, max_depth=4, learning_rate=0.3).fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def scoring_data():
+    X, _ = make_data(300, 1)
+    X = X.to_numpy()
+    # Filas con todo faltante y con "e" faltante (nunca vista así en entrenamiento)
+    X[:5] = np.nan
+    X[5:20, 4] = np.nan
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def test_missing_directions_cover_both_sides(model):
+    compiled = CompiledTrees(model.get_booster())
+    assert compiled.split_default_left.any() and not compiled.split_default_left.all()
+
+
+def test_compiled_trees_match_booster(model, scoring_data):
+    booster = model.get_booster()
+    expected = booster.inplace_predict(scoring_data, missing=np.nan)
+    np.testing.assert_allclose(CompiledTrees(booster).predict(scoring_data), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(CompiledTrees(booster).predict(scoring_data, chunk_size=7), expected,
+                               rtol=1e-5, atol=1e-6)
+    proba = model.predict_proba(pd.DataFrame(scoring_data, columns=FEATURES))[:, 1]
+    np.testing.assert_allclose(InferenceEngine(model, backend="numpy").predict(scoring_data), proba,
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_compiled_trees_respect_early_stopping(scoring_data):
+    X, y = make_data(600, 2)
+    model = XGBClassifier(n_estimators=300, max_depth=3, learning_rate=0.5, early_stopping_rounds=3)
+    model.fit(X[:400], y[:400], eval_set=[(X[400:], y[400:])], verbose=False)
+    assert model.best_iteration + 1 < model.get_booster().num_boosted_rounds()
+
+    proba = model.predict_proba(pd.DataFrame(scoring_data, columns=FEATURES))[:, 1]
+    for backend in ("booster", "numpy"):
+        engine = InferenceEngine(model.get_booster(), backend=backend)
+        np.testing.assert_allclose(engine.predict(scoring_data), proba, rtol=1e-5, atol=1e-6)
+
+
+def test_compiled_trees_reject_other_objectives():
+    X, y = make_data(100, 3)
+    booster = xgb.train({"objective": "reg:squarederror"}, xgb.DMatrix(X, y), num_boost_round=2)
+    with pytest.raises(ValueError, match="Objetivo no soportado"):
+        CompiledTrees(booster)
+
+
+def test_engine_validates_column_layout(model, scoring_data):
+    engine = InferenceEngine(model, backend="numpy")
+    frame = pd.DataFrame(scoring_data, columns=FEATURES)
+
+    # Otro orden de columnas: se reordena y da lo mismo
+    reordered = frame[FEATURES[::-1]]
+    np.testing.assert_allclose(engine.predict(reordered), engine.predict(frame))
+    assert engine.validate_columns(reordered.columns) == list(range(len(FEATURES)))[::-1]
+    assert engine.validate_columns(frame.columns) is None
+
+    with pytest.raises(ValueError, match="Faltan features requeridas por el modelo: \\['c'\\]"):
+        engine.predict(frame.drop(columns=["c"]))
+    with pytest.raises(ValueError, match="Se esperaban 5 features, llegaron 4"):
+        engine.predict(scoring_data[:, :4])
@@ -0,0 +1,49 @@
+import json
+import threading
+
+import numpy as np
+
+from src.benchmarking import measure
+from src.instrumentation import instrument
+
+
+@instrument("test:small")
+def small_step():
+    return np.zeros(10)
+
+
+def test_nested_span_keeps_outer_peak(tmp_path, monkeypatch):
+    log_path = tmp_path / "instrumentation.jsonl"
+    monkeypatch.setenv("INSTRUMENT_LOG", str(log_path))
+    with measure() as record:
+        with instrument("test:outer"):
+            big = np.ones(400 * 1024 ** 2 // 8)
+            del big
+            small_step()
+    outer = [json.loads(line) for line in log_path.read_text().splitlines()][-1]
+    assert outer["event"] == "test:outer"
+    assert outer["peak_rss_mb"] > 400
+    assert record["peak_rss_mb"] > 400
+
+
+def test_parallel_spans_do_not_reset_each_other(tmp_path, monkeypatch):
+    log_path = tmp_path / "instrumentation.jsonl"
+    monkeypatch.setenv("INSTRUMENT_LOG", str(log_path))
+    freed, release = threading.Event(), threading.Event()
+
+    def heavy():
+        with instrument("test:heavy"):
+            big = np.ones(400 * 1024 ** 2 // 8)
+            del big
+            freed.set()
+            release.wait(timeout=30)
+
+    thread = threading.Thread(target=heavy)
+    thread.start()
+    freed.wait(timeout=30)
+    # Un bloque que abre otro thread mientras el primero sigue en curso no borra su pico
+    small_step()
+    release.set()
+    thread.join()
+    records = {r["event"]: r for r in map(json.loads, log_path.read_text().splitlines())}
+    assert records["test:heavy"]["peak_rss_mb"] > 400
@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import api_mock.main as api
+import scripts.mock_data_extractor as extractor
+
+API_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "api_mock", "data")
+PAGE_SIZE = 100
+
+
+class ApiSession:
+    # La API mock en proceso (TestClient) en lugar de la sesión HTTP; puede cortar
+    # la conexión después de `fail_after` pedidos a `fail_path`
+    def __init__(self, fail_path=None, fail_after=None):
+        self.client = TestClient(api.app)
+        self.fail_path = fail_path
+        self.fail_after = fail_after
+        self.calls = 0
+        self.statuses = []
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        path = url.removeprefix(extractor.API_URL)
+        if path == self.fail_path:
+            self.calls += 1
+            if self.calls > self.fail_after:
+                raise ConnectionError("Conexión cortada")
+        response = self.client.get(path, params=params, headers=headers)
+        self.statuses.append(response.status_code)
+        return response
+
+
+@pytest.fixture
+def api_data(tmp_path, monkeypatch):
+    data_dir = tmp_path / "api"
+    shutil.copytree(API_DATA_DIR, data_dir)
+    monkeypatch.setattr(api, "DATA_DIR", data_dir)
+    monkeypatch.setattr(api, "_datasets", {})
+    monkeypatch.setattr(api, "response_cache", api.ResponseCache())
+    return data_dir
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    monkeypatch.setattr(extractor, "RAW_DATA_DIR", raw_dir)
+    monkeypatch.setattr(extractor, "STATE_PATH", raw_dir / ".extraction_state.json")
+    return raw_dir
+
+
+def run_extraction(monkeypatch, session):
+    monkeypatch.setattr(extractor, "build_session", lambda pool_size: session)
+    return extractor.run_incremental_extraction(max_workers=3, page_size=PAGE_SIZE)
+
+
+def assert_same_rows(raw_dir, api_data, name, key):
+    extracted = pd.read_csv(raw_dir / f"{name}.csv")
+    expected = pd.read_csv(api_data / f"{name}.csv")
+    assert not extracted.duplicated(key).any()
+    assert sorted(map(tuple, extracted[key].astype(str).values)) == sorted(map(tuple, expected[key].astype(str).values))
+
+
+def test_resumes_after_interruption(api_data, raw_dir, monkeypatch):
+    with pytest.raises(ConnectionError):
+        run_extraction(monkeypatch, ApiSession("/transactions/", fail_after=3))
+
+    # Las páginas ya escritas quedan en el .partial y el cursor en el estado
+    state = json.loads((raw_dir / ".extraction_state.json").read_text())
+    assert state["transactions"]["cursor"] is not None
+    assert len(pd.read_csv(raw_dir / "transactions.csv.partial")) == 3 * PAGE_SIZE
+    assert not (raw_dir / "transactions.csv").exists()
+
+    session = ApiSession()
+    run_extraction(monkeypatch, session)
+    assert_same_rows(raw_dir, api_data, "transactions", ["transaction_id"])
+    assert_same_rows(raw_dir, api_data, "demographics", ["user_id"])
+    assert_same_rows(raw_dir, api_data, "products", ["user_id", "product_type"])
+    assert not (raw_dir / "transactions.csv.partial").exists()
+    assert json.loads((raw_dir / ".extraction_state.json").read_text())["transactions"]["cursor"] is None
+
+
+def test_incremental_run_appends_only_new_transactions(api_data, raw_dir, monkeypatch):
+    run_extraction(monkeypatch, ApiSession())
+    state = json.loads((raw_dir / ".extraction_state.json").read_text())
+    last_date = state["transactions"]["last_date"]
+
+    # Nuevas transacciones en la última fecha ya vista y posteriores
+    transactions = pd.read_csv(api_data / "transactions.csv")
+    new = transactions.sample(2 * PAGE_SIZE + 5, random_state=0).assign(
+        transaction_id=lambda df: [f"new-{i:04d}" for i in range(len(df))])
+    new["date"] = [last_date] * 5 + ["2024-01-15"] * (len(new) - 5)
+    pd.concat([transactions, new]).to_csv(api_data / "transactions.csv", index=False)
+
+    with pytest.raises(ConnectionError):
+        run_extraction(monkeypatch, ApiSession("/transactions/", fail_after=1))
+    run_extraction(monkeypatch, ApiSession())
+    assert_same_rows(raw_dir, api_data, "transactions", ["transaction_id"])
+
+
+def test_unchanged_pages_are_not_downloaded_again(api_data, raw_dir, monkeypatch):
+    # La segunda corrida ya es incremental para transactions (páginas desde la marca de agua)
+    run_extraction(monkeypatch, ApiSession())
+    run_extraction(monkeypatch, ApiSession())
+    files = {name: (raw_dir / f"{name}.csv").read_bytes() for name in extractor.endpoints}
+    stamps = {name: (raw_dir / f"{name}.csv").stat().st_mtime_ns for name in extractor.endpoints}
+
+    # Sin cambios en la API: todas las páginas responden 304 y no se reescribe nada
+    session = ApiSession()
+    assert run_extraction(monkeypatch, session) == {name: 0 for name in extractor.endpoints}
+    assert set(session.statuses) == {304}
+    assert {name: (raw_dir / f"{name}.csv").stat().st_mtime_ns for name in extractor.endpoints} == stamps
+
+    # Cambia una fila de la segunda página de products: la primera se copia del archivo anterior
+    products = pd.read_csv(api_data / "products.csv").sort_values(["user_id", "product_type"], kind="stable")
+    products.iloc[PAGE_SIZE + 1, products.columns.get_loc("contract_date")] = "2020-01-01"
+    products.to_csv(api_data / "products.csv", index=False)
+    session = ApiSession()
+    run_extraction(monkeypatch, session)
+    extracted = pd.read_csv(raw_dir / "products.csv")
+    assert len(extracted) == len(products)
+    assert extracted["contract_date"].tolist() == products["contract_date"].tolist()
+    assert (raw_dir / "demographics.csv").read_bytes() == files["demographics"]
+    assert (raw_dir / "transactions.csv").read_bytes() == files["transactions"]
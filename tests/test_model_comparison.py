@@ -0,0 +1,23 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+
+from src.model_comparison import compare_models
+
+
+def test_memmaps_are_removed_and_predictions_cached(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.random((120, 4))
+    y = (X[:, 0] + rng.normal(0, 0.2, 120) > 0.5).astype(int)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=0)
+    # Memmaps que dejaban las versiones anteriores
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "X_0123.npy").write_bytes(b"")
+
+    first = compare_models({"lr": LogisticRegression()}, X, y, X[:20], cv, n_jobs=1, cache_dir=tmp_path)
+    second = compare_models({"lr": LogisticRegression()}, X, y, X[:20], cv, n_jobs=1, cache_dir=tmp_path)
+
+    assert first["lr"]["cached_folds"] == 0 and second["lr"]["cached_folds"] == 3
+    assert second["lr"]["cv_auc"] == first["lr"]["cv_auc"]
+    np.testing.assert_array_equal(second["lr"]["test_proba"], first["lr"]["test_proba"])
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".npz"] * 3
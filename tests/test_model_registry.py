@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from xgboost import XGBClassifier
+
+from src.model_registry import current_version, list_versions, register_model
+
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    return XGBClassifier(n_estimators=3).fit(rng.random((50, 3)), rng.integers(0, 2, 50))
+
+
+def test_register_skips_incomplete_version_dir(tmp_path, model):
+    # Restos de un registro interrumpido: el número queda ocupado, no se reintenta para siempre
+    (tmp_path / "v0001").mkdir()
+    (tmp_path / "v0001" / "junk").write_text("x")
+    assert register_model(model, registry_dir=tmp_path, promote=True) == "v0002"
+    assert list_versions(tmp_path) == ["v0002"]
+    assert current_version(tmp_path) == "v0002"
+
+
+def test_register_reraises_other_errors(tmp_path, model, monkeypatch):
+    def failing_rename(src, dst):
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr("src.model_registry.os.rename", failing_rename)
+    with pytest.raises(PermissionError):
+        register_model(model, registry_dir=tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_register_removes_tmp_dir(tmp_path, model):
+    # Falla después de guardar el modelo en el directorio temporal (datos inexistentes)
+    with pytest.raises(FileNotFoundError):
+        register_model(model, data_path=tmp_path / "missing.csv", registry_dir=tmp_path / "registry")
+    assert list((tmp_path / "registry").iterdir()) == []
+    assert list_versions(tmp_path / "registry") == []
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from src.pipeline import ROOT_DIR, code_dependencies, run_pipeline
+
+
+def test_code_dependencies_follow_repo_imports():
+    code = code_dependencies("scripts.02_feature_engineering")
+    assert code[0] == "scripts/02_feature_engineering.py"
+    # Directos, transitivos (feature_transformer -> aggregations) y sin librerías externas
+    assert {"src/feature_transformer.py", "src/window_features.py", "src/aggregations.py"} <= set(code)
+    assert all((ROOT_DIR / path).is_file() for path in code)
+    assert "reports/report_generator.py" not in code
+
+
+def dummy_stage(tmp_path):
+    output = tmp_path / "out.json"
+    return {
+        "name": "dummy",
+        "target": "src.storage:update_cache",
+        "inputs": ["data/raw/demographics.csv"],
+        "outputs": [str(output)],
+        "params": {"cache_path": str(output), "entries": {"ok": True}},
+    }
+
+
+def test_pipeline_keeps_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT_DIR)
+    stages, cache_path = [dummy_stage(tmp_path)], tmp_path / "pipeline.json"
+    assert run_pipeline(stages, cache_path=cache_path)["dummy"][0] == "ran"
+    assert run_pipeline(stages, cache_path=cache_path)["dummy"][0] == "skipped"
+    assert os.getcwd() == str(ROOT_DIR)
+
+
+def test_pipeline_refuses_other_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(RuntimeError, match="raíz del repositorio"):
+        run_pipeline([dummy_stage(tmp_path)], cache_path=tmp_path / "pipeline.json")
+    assert os.getcwd() == str(tmp_path)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBClassifier
+
+from reports.report_generator import iter_score_batches
+from src.model_registry import promote_version, register_model
+
+
+@pytest.fixture
+def features(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.random((200, 3)), columns=["a", "b", "c"])
+    frame["has_insurance"] = (frame["a"] + rng.normal(0, 0.2, 200) > 0.5).astype(int)
+    path = tmp_path / "final_dataset.parquet"
+    frame.to_parquet(path)
+    return path, frame
+
+
+def scores(data_path, scores_path, registry_dir):
+    return np.concatenate(list(iter_score_batches(data_path, scores_path=scores_path, batch_size=64,
+                                                  registry_dir=registry_dir)))
+
+
+def test_scores_follow_promoted_model(tmp_path, features):
+    data_path, frame = features
+    registry_dir, scores_path = tmp_path / "registry", tmp_path / "cache" / "scores.parquet"
+    X, y = frame.drop(columns=["has_insurance"]), frame["has_insurance"]
+    first = XGBClassifier(n_estimators=2, max_depth=1).fit(X, y)
+    second = XGBClassifier(n_estimators=20, max_depth=3).fit(X, y)
+    v1 = register_model(first, registry_dir=registry_dir, promote=True)
+    v2 = register_model(second, registry_dir=registry_dir)
+
+    np.testing.assert_allclose(scores(data_path, scores_path, registry_dir), first.predict_proba(X)[:, 1])
+    assert list(pd.read_parquet(scores_path).columns) == ["propensity_score"]
+
+    # Mismo mtime de los scores, otro modelo en uso: se recalculan
+    promote_version(v2, registry_dir)
+    np.testing.assert_allclose(scores(data_path, scores_path, registry_dir), second.predict_proba(X)[:, 1])
+    promote_version(v1, registry_dir)
+    np.testing.assert_allclose(scores(data_path, scores_path, registry_dir), first.predict_proba(X)[:, 1])
+
+
+def test_fresh_scores_are_reused(tmp_path, features, monkeypatch):
+    data_path, frame = features
+    registry_dir, scores_path = tmp_path / "registry", tmp_path / "cache" / "scores.parquet"
+    X, y = frame.drop(columns=["has_insurance"]), frame["has_insurance"]
+    register_model(XGBClassifier(n_estimators=2).fit(X, y), registry_dir=registry_dir, promote=True)
+    expected = scores(data_path, scores_path, registry_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("no debería cargar el modelo")
+
+    monkeypatch.setattr("reports.report_generator.load_model", fail)
+    np.testing.assert_allclose(scores(data_path, scores_path, registry_dir), expected)
@@ -0,0 +1,137 @@
+import asyncio
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from xgboost import XGBClassifier
+
+import api_mock.scoring_service as service
+from src.feature_transformer import TARGET, FeatureTransformer, build_customer_frame
+from src.model_registry import register_model
+
+RAW_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw")
+
+
+@pytest.fixture(scope="module")
+def frame():
+    demographics = pd.read_csv(os.path.join(RAW_DIR, "demographics.csv"))
+    products = pd.read_csv(os.path.join(RAW_DIR, "products.csv"), parse_dates=["contract_date"])
+    transactions = pd.read_csv(os.path.join(RAW_DIR, "transactions.csv"), parse_dates=["date"])
+    return build_customer_frame(demographics, products, transactions)
+
+
+@pytest.fixture(scope="module")
+def artifacts(frame, tmp_path_factory):
+    # Transformer y modelo chicos, registrados en un directorio temporal
+    root = tmp_path_factory.mktemp("scoring")
+    transformer = FeatureTransformer(top_categories=5, occupation_threshold=5).fit(frame)
+    X = transformer.transform(frame)
+    model = XGBClassifier(n_estimators=10, max_depth=3).fit(X, frame[TARGET])
+    register_model(model, registry_dir=root / "registry", promote=True)
+    joblib.dump(transformer, root / "feature_transformer.pkl")
+    expected = model.predict_proba(X)[:, 1]
+    return root, expected
+
+
+@pytest.fixture
+def client(artifacts, monkeypatch):
+    root, _ = artifacts
+    monkeypatch.setattr(service, "REGISTRY_DIR", root / "registry")
+    monkeypatch.setattr(service, "TRANSFORMER_PATH", root / "feature_transformer.pkl")
+    monkeypatch.setattr(service, "MODEL_PATH", root / "missing.pkl")
+    with TestClient(service.app) as client:
+        yield client
+
+
+@pytest.fixture
+def records(frame):
+    return frame.drop(columns=[TARGET]).head(20).to_dict(orient="records")
+
+
+def test_score_matches_model(client, artifacts, records):
+    _, expected = artifacts
+    for record, score in zip(records[:5], expected):
+        response = client.post("/score", json=record)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["propensity_score"] == pytest.approx(score, rel=1e-5)
+        assert body["propensity_segment"] == service.segment_for(score)
+
+
+def test_score_batch_matches_model(client, artifacts, records):
+    _, expected = artifacts
+    response = client.post("/score/batch", json=records)
+    assert response.status_code == 200
+    scores = [row["propensity_score"] for row in response.json()]
+    np.testing.assert_allclose(scores, expected[:len(records)], rtol=1e-5)
+    assert client.post("/score/batch", json=[]).json() == []
+
+
+@pytest.mark.parametrize("change", [{"age": "abc"}, {"has_credit_card": "si"}, {"has_crypto_wallet": 1},
+                                    {"risk_profile": "yolo"}, {"age": None}])
+def test_invalid_records_return_422(client, records, change):
+    record = {**records[0], **change}
+    assert client.post("/score", json=record).status_code == 422
+    assert client.post("/score/batch", json=[records[1], record]).status_code == 422
+
+
+def test_missing_column_returns_422(client, records):
+    record = dict(records[0])
+    del record["avg_spent"]
+    assert client.post("/score", json=record).status_code == 422
+
+
+def test_metrics_report_latency_percentiles(client, records):
+    for record in records[:10]:
+        client.post("/score", json=record)
+    client.post("/score/batch", json=records)
+    metrics = client.get("/metrics").json()
+    assert metrics["requests"] == 11
+    assert metrics["records"] == 10 + len(records)
+    assert 0 < metrics["p50_ms"] <= metrics["p99_ms"]
+    assert metrics["model_version"] == "v0001"
+
+
+class CountingEngine:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return X[:, 0]
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    engine = CountingEngine()
+    stats = service.LatencyStats()
+
+    async def run():
+        batcher = service.MicroBatcher(engine, stats, max_batch_size=64, max_wait_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(*[batcher.submit(np.array([float(i), 0.0])) for i in range(10)])
+        finally:
+            await batcher.stop()
+
+    scores = asyncio.run(run())
+    assert scores == [float(i) for i in range(10)]
+    assert engine.calls == [10]
+    assert stats.batches == 1
+
+
+def test_micro_batcher_respects_max_batch_size():
+    engine = CountingEngine()
+
+    async def run():
+        batcher = service.MicroBatcher(engine, service.LatencyStats(), max_batch_size=4, max_wait_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(*[batcher.submit(np.array([float(i)])) for i in range(10)])
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == [float(i) for i in range(10)]
+    assert engine.calls == [4, 4, 2]
@@ -0,0 +1,30 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.storage import read_cache, update_cache
+
+
+def write_keys(cache_path, prefix, n=25):
+    for i in range(n):
+        update_cache(cache_path, {f"{prefix}-{i}": i})
+
+
+def test_concurrent_updates_keep_every_key(tmp_path):
+    cache_path = str(tmp_path / "cache" / "figures.json")
+    update_cache(cache_path, {"old": "x"})
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(write_keys, [cache_path] * 4, ["thread-a", "thread-b", "thread-c", "thread-d"]))
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(write_keys, [cache_path] * 2, ["process-a", "process-b"]))
+
+    cache = read_cache(cache_path)
+    assert len(cache) == 1 + 6 * 25
+    assert cache["old"] == "x" and cache["process-b-24"] == 24
+    assert [p.name for p in (tmp_path / "cache").iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_update_overwrites_only_given_keys(tmp_path):
+    cache_path = str(tmp_path / "pipeline.json")
+    assert read_cache(cache_path) == {}
+    update_cache(cache_path, {"a": 1, "b": 2})
+    assert update_cache(cache_path, {"b": 3}) == {"a": 1, "b": 3}
@@ -0,0 +1,91 @@
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregations import aggregate_user_features
+from src.data_preparation import load_datasets, merge_datasets
+from src.incremental import derive_user_features
+from src.streaming import _iter_csv_blocks, aggregate_transactions, stream_budget, stream_customer_table
+
+RAW_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw")
+DEMOGRAPHICS_PATH = os.path.join(RAW_DIR, "demographics.csv")
+PRODUCTS_PATH = os.path.join(RAW_DIR, "products.csv")
+# Presupuesto mínimo: bloques del tamaño más chico que admite stream_budget
+MEMORY_MB = 0.01
+BLOCK_SIZE = int(stream_budget(MEMORY_MB)[0] * 1024 ** 2)
+HEADER = ["transaction_id", "user_id", "date", "amount", "merchant_category", "description"]
+
+
+def csv_line(row):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(row)
+    return buffer.getvalue().encode()
+
+
+def random_row(rng, i, users):
+    description = rng.choice(["compra", "pago, cuota", 'pedido "express"', "viaje\nida y vuelta"])
+    return [
+        f"t{i:06d}",
+        rng.choice(users),
+        f"2023-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}",
+        "" if rng.random() < 0.05 else f"{rng.uniform(1, 500):.2f}",
+        "" if rng.random() < 0.05 else rng.choice(["food", "travel", "health", "shopping", "education"]),
+        description,
+    ]
+
+
+@pytest.fixture(scope="module")
+def transactions_path(tmp_path_factory):
+    # Descripciones con comas, comillas y saltos de línea; usuarios fuera de demographics
+    # y nulos. Una descripción multilínea cruza el primer corte de bloque
+    rng = np.random.default_rng(3)
+    users = list(pd.read_csv(DEMOGRAPHICS_PATH)["user_id"]) + ["user_999"]
+    body, i = b"", 0
+    while True:
+        line = csv_line(random_row(rng, i, users))
+        if len(body) + len(line) > BLOCK_SIZE - 100:
+            break
+        body, i = body + line, i + 1
+    straddling = csv_line([f"t{i:06d}", users[0], "2023-06-15", "10.50", "food", "x" * 150 + "\n" + "y" * 150])
+    description_start = len(body) + straddling.index(b'"')
+    assert description_start < BLOCK_SIZE < description_start + 300
+    lines = [body, straddling]
+    lines += [csv_line(random_row(rng, j, users)) for j in range(i + 1, i + 8000)]
+
+    path = tmp_path_factory.mktemp("streaming") / "transactions.csv"
+    path.write_bytes(csv_line(HEADER) + b"".join(lines))
+    return path
+
+
+def test_blocks_split_on_record_boundaries(transactions_path):
+    header = csv_line(HEADER)
+    blocks = list(_iter_csv_blocks(transactions_path, BLOCK_SIZE))
+    assert len(blocks) > 5
+    assert all(block.startswith(header) and block.endswith(b"\n") for block in blocks)
+    assert all(block.count(b'"') % 2 == 0 for block in blocks)
+    assert b"".join(block[len(header):] for block in blocks) == transactions_path.read_bytes()[len(header):]
+    # El primer corte cae dentro de la descripción multilínea: el bloque se extiende hasta cerrarla
+    assert blocks[0].rstrip(b"\n").endswith(b"y" * 150 + b'"')
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_stream_customer_table_matches_merge(transactions_path, compact):
+    streamed = stream_customer_table(DEMOGRAPHICS_PATH, PRODUCTS_PATH, transactions_path, memory_mb=MEMORY_MB,
+                                     compact=compact)
+    demographics, products, transactions = load_datasets(DEMOGRAPHICS_PATH, PRODUCTS_PATH, transactions_path,
+                                                         compact=compact)
+    pd.testing.assert_frame_equal(streamed, merge_datasets(demographics, transactions, products))
+
+
+def test_aggregate_transactions_matches_user_features(transactions_path):
+    state, n_rows = aggregate_transactions(transactions_path, memory_mb=MEMORY_MB)
+    transactions = pd.read_csv(transactions_path, parse_dates=["date"])
+    assert n_rows == len(transactions)
+
+    expected = aggregate_user_features(transactions).sort_values("user_id").reset_index(drop=True)
+    features = derive_user_features(state).sort_values("user_id").reset_index(drop=True)
+    pd.testing.assert_frame_equal(features[expected.columns], expected)
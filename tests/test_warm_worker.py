@@ -0,0 +1,71 @@
+import os
+import stat
+import subprocess
+import sys
+from multiprocessing.connection import Client
+
+import pytest
+
+import src.warm_worker as warm_worker
+
+SERVE_CODE = """
+import sys
+import src.warm_worker as warm_worker
+warm_worker.AUTHKEY_PATH = sys.argv[2]
+warm_worker.serve(sys.argv[1], preload_modules=[])
+"""
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    socket_path, key_path = str(tmp_path / "w.sock"), str(tmp_path / "cache" / "w.key")
+    monkeypatch.setattr(warm_worker, "AUTHKEY_PATH", key_path)
+    process = subprocess.Popen([sys.executable, "-c", SERVE_CODE, socket_path, key_path],
+                               cwd=warm_worker.ROOT_DIR, stdout=subprocess.DEVNULL)
+    try:
+        assert warm_worker.submit({"job": "ping"}, socket_path, timeout=30)["result"]["pid"] == process.pid
+        yield socket_path, key_path
+        warm_worker.submit({"job": "shutdown"}, socket_path)
+        process.wait(timeout=30)
+    finally:
+        process.kill()
+
+
+def ping(socket_path):
+    return warm_worker.submit({"job": "ping"}, socket_path)["status"]
+
+
+def test_socket_and_key_are_private(worker):
+    socket_path, key_path = worker
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(key_path).st_mode) == 0o600
+
+
+def test_connections_without_the_key_are_rejected(worker):
+    socket_path, _ = worker
+    with pytest.raises(Exception):
+        with Client(socket_path, family="AF_UNIX", authkey=b"otra clave") as conn:
+            conn.send({"job": "ping"})
+            conn.recv()
+    with pytest.raises(Exception):
+        with Client(socket_path, family="AF_UNIX") as conn:
+            conn.send({"job": "ping"})
+            conn.recv()
+    assert ping(socket_path) == "ok"
+
+
+@pytest.mark.parametrize("job", [["ping"], "ping", {"nombre": "ping"}, {"job": 3}])
+def test_malformed_jobs_get_an_error_reply(worker, job):
+    socket_path, _ = worker
+    with pytest.raises(RuntimeError, match="Trabajo inválido"):
+        warm_worker.submit(job, socket_path)
+    assert ping(socket_path) == "ok"
+
+
+def test_failing_jobs_keep_the_worker_alive(worker):
+    socket_path, _ = worker
+    with pytest.raises(RuntimeError, match="Trabajo desconocido"):
+        warm_worker.submit({"job": "nada"}, socket_path)
+    with pytest.raises(RuntimeError, match="KeyError"):
+        warm_worker.submit({"job": "stage"}, socket_path)
+    assert ping(socket_path) == "ok"